@@ -1,14 +1,36 @@
+import argparse
+import hashlib
+import json
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import yaml
+import openai
 from openai import OpenAI
 
 from common.config import API_KEY, AI_URL
-from utils.swagger_utils import fetch_swagger_doc, parse_swagger_paths, SWAGGER_URL
+from utils.rate_limit import TokenBucket
+from utils.swagger_utils import fetch_swagger_doc, parse_swagger_paths, prompt_text, SWAGGER_URL
 
 # 配置
 TEMPLATE_FILE = "template.yaml"
 PROMPT_FILE = "prompt.md"
 OUTPUT_DIR = "../data/ai_testcases"
+MODEL = "qwen-long-latest"
+# 生成索引：记录每个接口的规格哈希与输出哈希，规格未变化的接口不再重新生成，中断后重新运行时跳过已完成的接口
+INDEX_FILE = os.path.join(OUTPUT_DIR, ".generation_index.json")
+# 并发数 / 每分钟最多调用次数 / 失败重试次数 / 重试退避基数(秒)
+GEN_WORKERS = int(os.getenv("GEN_WORKERS", "4"))
+GEN_RATE_PER_MIN = float(os.getenv("GEN_RATE_PER_MIN", "30"))
+GEN_RETRIES = int(os.getenv("GEN_RETRIES", "3"))
+GEN_BACKOFF = float(os.getenv("GEN_BACKOFF", "2"))
+
+# 可重试的接口错误：限流、超时、连接失败、服务端 5xx
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                    openai.InternalServerError)
 
 # 创建输出目录
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -17,17 +39,34 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 with open(PROMPT_FILE, "r", encoding="utf-8") as f:
     system_prompt = f.read()
 
+# 模板文件不存在时不影响生成，只是不参与版本计算
+template_text = ""
+if os.path.exists(TEMPLATE_FILE):
+    with open(TEMPLATE_FILE, "r", encoding="utf-8") as f:
+        template_text = f.read()
+
 # 初始化AI客户端
 client = OpenAI(api_key=API_KEY, base_url=AI_URL)
 
+# 多个线程同时输出到控制台时，按块加锁避免字符交错
+console_lock = threading.Lock()
+
+
+def _echo(text, end="\n"):
+    with console_lock:
+        print(text, end=end, flush=True)
 
-def generate_yaml(api_info):
-    """单个接口生成YAML用例"""
+
+def generate_yaml(api_info, stream_console=False):
+    """
+    单个接口生成YAML用例
+    :param stream_console: 是否把思考过程和生成内容实时输出到控制台（并发时各接口输出会交错）
+    """
     # 把接口文档转为YAML字符串，提升AI解析准确率
-    api_doc_str = yaml.dump(api_info, allow_unicode=True, sort_keys=False)
+    api_doc_str = prompt_text(api_info)
 
     response = client.chat.completions.create(
-        model="qwen-long-latest",
+        model=MODEL,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f"接口文档：{api_doc_str}\n请直接返回可用的YAML用例"}
@@ -43,7 +82,8 @@ def generate_yaml(api_info):
     reasoning_content = ""
     answer_content = ""
     is_answering = False
-    print("\n" + "=" * 20 + f"生成用例：{api_info.get('接口名称', '未知接口')}" + "=" * 20)
+    if stream_console:
+        _echo("\n" + "=" * 20 + f"生成用例：{api_info.get('接口名称', '未知接口')}" + "=" * 20)
 
     for chunk in response:
         if not chunk.choices:
@@ -51,22 +91,24 @@ def generate_yaml(api_info):
 
         delta = chunk.choices[0].delta
         if hasattr(delta, "reasoning_content") and delta.reasoning_content is not None:
-            if not is_answering:
-                print(delta.reasoning_content, end="", flush=True)
+            if stream_console and not is_answering:
+                _echo(delta.reasoning_content, end="")
             reasoning_content += delta.reasoning_content
 
         if hasattr(delta, "content") and delta.content:
             if not is_answering:
-                print("\n" + "=" * 20 + "用例内容" + "=" * 20)
+                if stream_console:
+                    _echo("\n" + "=" * 20 + "用例内容" + "=" * 20)
                 is_answering = True
-            print(delta.content, end="", flush=True)
+            if stream_console:
+                _echo(delta.content, end="")
             answer_content += delta.content
 
     return answer_content.strip()
 
 
 def save_yaml(content, filename):
-    """保存单个接口的YAML用例文件"""
+    """保存单个接口的YAML用例文件，返回实际写入的内容"""
     path = os.path.join(OUTPUT_DIR, filename)
 
     # 去除 markdown 代码块格式
@@ -83,43 +125,223 @@ def save_yaml(content, filename):
     try:
         yaml.safe_load(content)
     except yaml.YAMLError as e:
-        print(f"\n❌ 生成的YAML格式非法，文件：{filename}，错误：{e}")
+        _echo(f"\n❌ 生成的YAML格式非法，文件：{filename}，错误：{e}")
         # 即使格式异常也保存文件，方便人工修正
         with open(path, "w", encoding="utf-8") as f:
             f.write(content)
-        return
+        return content
 
     with open(path, "w", encoding="utf-8") as f:
         f.write(content)
-    print(f"\n✅ 用例生成成功：{path}")
+    _echo(f"\n✅ 用例生成成功：{path}")
+    return content
 
 
-if __name__ == "__main__":
+def _sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(path):
+    """文件内容哈希，文件不存在时返回 None"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return _sha256(f.read())
+    except OSError:
+        return None
+
+
+def generation_version():
+    """模型、系统提示词、模板任一变化都视为所有接口需要重新生成"""
+    return _sha256("\0".join([MODEL, system_prompt, template_text]))
+
+
+def spec_hash(api_doc, version):
+    """接口规格哈希：规格按键排序后序列化，与字段顺序、空白无关"""
+    normalized = json.dumps(api_doc, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return _sha256(version + normalized)
+
+
+class GenerationIndex:
+    """
+    生成索引：{文件名: {"api", "spec_hash", "output_hash", "status": done/failed, "attempts", "error"}}
+    每完成一个接口原子写入一次
+    """
+
+    def __init__(self, path=INDEX_FILE, fresh=False):
+        self.path = path
+        self.fresh = fresh
+        self._lock = threading.Lock()
+        self.entries = {}
+        if not fresh and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def plan(self, api_list, version, keep_edited=True):
+        """
+        对比当前规格与索引
+        :param keep_edited: 生成后被手工修改过（或不在索引中的已有文件）不重新生成；fresh 时不生效
+        :return: (待生成的接口列表, 报告 {added, changed, unchanged, removed, edited, retry: [文件名]})
+        """
+        report = {key: [] for key in ("added", "changed", "unchanged", "removed", "edited", "retry")}
+        todo = []
+        names = set()
+        for api in api_list:
+            name = api["file_name"]
+            names.add(name)
+            api["spec_hash"] = spec_hash(api["api_doc"], version)
+            entry = self.entries.get(name)
+            current = file_hash(os.path.join(OUTPUT_DIR, name))
+            # 已有文件但没有索引记录(历史用例)同样按手工维护处理
+            edited = current is not None and (entry is None or entry.get("output_hash") != current)
+            if edited:
+                report["edited"].append(name)
+
+            if entry is None:
+                kind = "added"
+            elif entry["status"] != "done" or current is None:
+                kind = "retry"
+            elif entry["spec_hash"] != api["spec_hash"]:
+                kind = "changed"
+            else:
+                kind = "unchanged"
+            report[kind].append(name)
+            # fresh 时索引为空，所有接口都是新增，已有文件一律覆盖
+            if kind != "unchanged" and (self.fresh or not (edited and keep_edited)):
+                todo.append(api)
+        report["removed"] = sorted(set(self.entries) - names)
+        return todo, report
+
+    def record(self, api, status, attempts, output=None, error=None):
+        with self._lock:
+            previous = self.entries.get(api["file_name"]) or {}
+            # 生成失败时文件未被改写，沿用上次的输出哈希，否则下次会被误判为手工修改而不再重试
+            output_hash = _sha256(output) if output is not None else previous.get("output_hash")
+            self.entries[api["file_name"]] = {
+                "api": api["api_name"], "spec_hash": api.get("spec_hash"),
+                "output_hash": output_hash,
+                "status": status, "attempts": attempts, "error": error,
+                "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def print_report(report, keep_edited=True):
+    labels = [("added", "新增"), ("changed", "规格变化"), ("retry", "上次失败/文件缺失"),
+              ("unchanged", "未变化"), ("removed", "文档中已删除")]
+    _echo("📋 " + "，".join(f"{label} {len(report[key])} 个" for key, label in labels))
+    for key, label in labels:
+        if key != "unchanged":
+            for name in report[key]:
+                _echo(f"   [{label}] {name}")
+    if report["edited"]:
+        action = "保留不覆盖" if keep_edited else "将被覆盖"
+        _echo(f"✋ 手工修改过或不在索引中的用例 {len(report['edited'])} 个（{action}）：")
+        for name in report["edited"]:
+            _echo(f"   {name}")
+
+
+def generate_with_retry(api, bucket, retries=GEN_RETRIES, backoff=GEN_BACKOFF, stream_console=False):
+    """
+    限流 + 指数退避重试地生成单个接口用例
+    :return: (生成内容, 尝试次数)
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        bucket.acquire()
+        try:
+            return generate_yaml(api["api_doc"], stream_console), attempt
+        except RETRYABLE_ERRORS as e:
+            if attempt > retries:
+                raise
+            # 指数退避加随机抖动，避免多个线程同时重试
+            delay = backoff * 2 ** (attempt - 1) * (0.5 + random.random())
+            _echo(f"\n⚠️ 接口 {api['api_name']} 第 {attempt} 次调用失败({type(e).__name__})，{delay:.1f}s 后重试")
+            time.sleep(delay)
+
+
+def run_pipeline(api_list, workers=GEN_WORKERS, rate_per_min=GEN_RATE_PER_MIN, retries=GEN_RETRIES,
+                 stream_console=False, fresh=False, keep_edited=True, dry_run=False):
+    """
+    并发生成用例，只生成新增、规格变化、上次失败的接口
+    :param fresh: 忽略生成索引，全部重新生成(包括手工修改过的用例)
+    :param keep_edited: 不覆盖生成后被手工修改过的用例
+    :param dry_run: 只输出变化报告，不调用 AI 接口
+    :return: (成功数, 失败数, 跳过数)
+    """
+    index = GenerationIndex(fresh=fresh)
+    pending, report = index.plan(api_list, generation_version(), keep_edited)
+    print_report(report, keep_edited and not fresh)
+    skipped = len(api_list) - len(pending)
+    if dry_run:
+        return 0, 0, skipped
+
+    bucket = TokenBucket(rate_per_min / 60, capacity=workers)
+    success_count = failed_count = 0
+
+    def task(api):
+        yaml_content, attempts = generate_with_retry(api, bucket, retries, stream_console=stream_console)
+        if not yaml_content:
+            raise ValueError("生成内容为空")
+        return attempts, save_yaml(yaml_content, api["file_name"])
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generator") as executor:
+        futures = {executor.submit(task, api): api for api in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            api = futures[future]
+            try:
+                attempts, output = future.result()
+                index.record(api, "done", attempts, output)
+                success_count += 1
+            except Exception as e:
+                index.record(api, "failed", None, error=str(e))
+                failed_count += 1
+                _echo(f"\n❌ 接口 {api['api_name']} 生成失败：{str(e)}")
+            _echo(f"==================== 进度：{done}/{len(pending)} ====================")
+    return success_count, failed_count, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="根据 Swagger 文档并发生成 YAML 用例")
+    parser.add_argument("--workers", type=int, default=GEN_WORKERS, help="并发生成的接口数")
+    parser.add_argument("--rate", type=float, default=GEN_RATE_PER_MIN, help="每分钟最多调用 AI 接口的次数")
+    parser.add_argument("--retries", type=int, default=GEN_RETRIES, help="限流/超时/5xx 时的重试次数")
+    parser.add_argument("--stream", action="store_true", help="实时输出思考过程与生成内容")
+    parser.add_argument("--fresh", action="store_true", help="忽略生成索引，全部重新生成(包括手工修改过的用例)")
+    parser.add_argument("--overwrite-edited", action="store_true", help="覆盖生成后被手工修改过的用例")
+    parser.add_argument("--dry-run", action="store_true", help="只输出新增/变化/删除的接口，不生成")
+    parser.add_argument("--spec", default=SWAGGER_URL, help="接口文档 URL、本地 JSON/YAML 文件或目录")
+    parser.add_argument("--offline", action="store_true", help="不请求接口文档地址，只使用本地缓存")
+    args = parser.parse_args()
+
     try:
-        # 1. 拉取Swagger接口文档
-        swagger_doc = fetch_swagger_doc(SWAGGER_URL)
+        # 1. 拉取Swagger接口文档（未变化时直接使用本地缓存）
+        swagger_doc = fetch_swagger_doc(args.spec, offline=args.offline)
         # 2. 解析拆分单个接口
         api_list = parse_swagger_paths(swagger_doc)
         if not api_list:
             print("❌ 未解析到有效接口，程序退出")
             exit(0)
-        # 3. 批量生成用例
-        success_count = 0
-        for index, api in enumerate(api_list, 1):
-            print(f"\n==================== 进度：{index}/{len(api_list)} ====================")
-            try:
-                yaml_content = generate_yaml(api["api_doc"])
-                if yaml_content:
-                    save_yaml(yaml_content, api["file_name"])
-                    success_count += 1
-                else:
-                    print(f"\n❌ 接口 {api['api_name']} 生成内容为空，跳过")
-            except Exception as e:
-                print(f"\n❌ 接口 {api['api_name']} 生成失败：{str(e)}")
-                continue
+        # 3. 并发生成用例
+        success_count, failed_count, skipped = run_pipeline(
+            api_list, args.workers, args.rate, args.retries, args.stream, args.fresh,
+            keep_edited=not args.overwrite_edited, dry_run=args.dry_run)
+        if args.dry_run:
+            return
 
-        print(f"\n🎉 全部执行完成！成功生成 {success_count}/{len(api_list)} 个接口用例")
+        print(f"\n🎉 全部执行完成！成功生成 {success_count}/{len(api_list) - skipped} 个接口用例，"
+              f"失败 {failed_count} 个，跳过 {skipped} 个")
+        if failed_count:
+            print("💡 失败的接口已记录在生成索引中，重新运行即可只生成剩余接口")
         print(f"📂 用例保存目录：{os.path.abspath(OUTPUT_DIR)}")
 
     except Exception as e:
-        print(f"\n❌ 程序执行失败：{str(e)}")
\ No newline at end of file
+        print(f"\n❌ 程序执行失败：{str(e)}")
+
+
+if __name__ == "__main__":
+    main()
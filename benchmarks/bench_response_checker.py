@@ -0,0 +1,63 @@
+"""
+断言微基准：对比逐条解释执行的 expected 与编译后的断言计划在大列表响应上的耗时
+
+运行：python -m benchmarks.bench_response_checker
+"""
+
+import timeit
+
+from common.response_checker import _run_assertions, _check_list, compile_expected
+
+EXPECTED = {
+    "status_code": 200,
+    "response": {
+        "code": 200,
+        "msg": "success",
+        "data": {
+            "required_fields": ["records", "total"],
+            "assert": {"type": {"total": "int"}},
+            "list_check": {
+                "records": {
+                    "object_required_items": ["id", "projectId", "status", "reason"],
+                    "every_item_assert": {
+                        "type": {"id": "int", "reason": "str"},
+                        "gte": {"status": 0},
+                        "regex": {"reason": "^reason-[0-9]+$"},
+                    },
+                },
+            },
+        },
+    },
+}
+
+
+def make_payload(rows):
+    records = [{"id": i, "projectId": i % 97, "status": i % 3, "reason": f"reason-{i}"} for i in range(rows)]
+    return {"code": 200, "msg": "success", "data": {"records": records, "total": rows}}
+
+
+def legacy_check(expected, json_data):
+    """旧版实现中与 data 层相关的解释执行部分"""
+    errors = []
+    data_config = expected["response"]["data"]
+    data = json_data["data"]
+    for field in data_config["required_fields"]:
+        if field and field not in data:
+            errors.append(f"缺少字段: data.{field}")
+    _run_assertions(data, data_config["assert"], "data", errors)
+    _check_list(data, data_config["list_check"], "data", errors)
+    return errors
+
+
+def main():
+    for rows in (1_000, 10_000, 50_000):
+        payload = make_payload(rows)
+        number = max(1, 200_000 // rows)
+        legacy = timeit.timeit(lambda: legacy_check(EXPECTED, payload), number=number) / number
+        compiled = timeit.timeit(lambda: compile_expected(EXPECTED).run(200, payload), number=number) / number
+        print(f"{rows:>6} 行: 解释执行 {legacy * 1000:8.2f} ms, 断言计划 {compiled * 1000:8.2f} ms, "
+              f"加速比 {legacy / compiled:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
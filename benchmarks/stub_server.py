@@ -0,0 +1,110 @@
+"""
+基准测试用的本地替身服务：固定、极快的应答，测得的耗时基本都是框架自身的开销
+
+- POST /login                     返回带 exp 的 JWT
+- GET  任意路径?rows=N            返回 N 行 records 的分页结构（默认 10 行）
+- 其余请求                         返回 {"code": 200, "msg": "success", "data": null}
+
+单独运行：python -m benchmarks.stub_server --port 18080，再把 SERVER_URL 指向它
+"""
+
+import argparse
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+def make_records(rows):
+    return [{"id": i, "projectId": i % 97, "status": i % 3, "reason": f"reason-{i}"} for i in range(rows)]
+
+
+def _token():
+    payload = base64.urlsafe_b64encode(json.dumps({"id": 1, "exp": int(time.time()) + 3600}).encode()).rstrip(b"=")
+    return f"eyJhbGciOiJIUzI1NiJ9.{payload.decode()}.sig"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头与响应体分两次写出，关闭 Nagle 避免与客户端的延迟确认叠加出 40ms 的等待
+    disable_nagle_algorithm = True
+    # 同一 rows 的响应体只序列化一次
+    _bodies = {}
+
+    def _reply(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+    def do_GET(self):
+        # GET 同样可能带请求体(如用例中的 json: {})，不读完会残留在长连接上，被当作下一个请求解析
+        self._read_body()
+        query = parse_qs(urlsplit(self.path).query)
+        rows = int(query.get("rows", ["10"])[0])
+        body = self._bodies.get(rows)
+        if body is None:
+            data = {"records": make_records(rows), "total": rows}
+            body = self._bodies[rows] = json.dumps({"code": 200, "msg": "success", "data": data}).encode()
+        self._reply(body)
+
+    def do_POST(self):
+        self._read_body()
+        if urlsplit(self.path).path == "/login":
+            data = {"token": _token(), "userType": "admin"}
+        else:
+            data = None
+        self._reply(json.dumps({"code": 200, "msg": "success", "data": data}).encode())
+
+    do_PUT = do_DELETE = do_PATCH = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """
+    在后台线程中运行的替身服务，用法: with StubServer() as server: server.url
+    :param port: 监听端口，0 表示随机空闲端口
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-server", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基准测试用的本地替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    print(f"替身服务已启动：http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
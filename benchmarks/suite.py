@@ -0,0 +1,284 @@
+"""
+框架开销基准套件：动态参数渲染、断言、jsonpath 提取、用例读取、密码加密、Allure 加载，
+以及对本地替身服务的端到端执行，每项按规模递增测量，结果输出为 JSON，可与保存的基线对比
+
+运行：
+    python -m benchmarks.suite                                     # 全部基准
+    python -m benchmarks.suite --quick --filter check               # 只跑最小规模、名称含 check 的基准
+    python -m benchmarks.suite --output benchmarks/baseline.json    # 保存结果作为基线
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --fail-on-regression
+"""
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# 必须在导入框架模块之前设置：请求发往替身服务，用例缓存写到临时目录，不读写令牌缓存与录制
+_PORT = _free_port()
+_WORKDIR = tempfile.mkdtemp(prefix="bench-")
+atexit.register(shutil.rmtree, _WORKDIR, True)
+os.environ["SERVER_URL"] = f"http://127.0.0.1:{_PORT}"
+os.environ["CASE_CACHE_DIR"] = os.path.join(_WORKDIR, "cases-cache")
+os.environ["TOKEN_CACHE"] = "off"
+os.environ["CASSETTE_MODE"] = "off"
+
+import requests  # noqa: E402
+import yaml  # noqa: E402
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+
+from benchmarks.bench_response_checker import EXPECTED, make_payload  # noqa: E402
+from benchmarks.stub_server import StubServer  # noqa: E402
+from common.api_utils import ApiRunner  # noqa: E402
+from common.response import ApiResponse  # noqa: E402
+from common.response_checker import ResponseChecker  # noqa: E402
+from utils.allure_utils import AllureUtils  # noqa: E402
+from utils.case_cache import set_enabled  # noqa: E402
+from utils.data_utils import get_testcases, resolve_dynamic_params  # noqa: E402
+from utils.extract_store import get_store  # noqa: E402
+from utils.rsa_utils import PasswordEncryptor  # noqa: E402
+
+# 已注册的基准：[(名称, 规模列表, --quick 时的规模列表, setup)]，setup(size) 返回被测的无参函数
+BENCHMARKS = []
+
+
+def benchmark(name, sizes, quick_sizes=None):
+    def decorator(setup):
+        BENCHMARKS.append((name, sizes, quick_sizes or sizes[:1], setup))
+        return setup
+    return decorator
+
+
+def _json_response(payload):
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.headers["Content-Type"] = "application/json;charset=UTF-8"
+    resp.encoding = "utf-8"
+    resp._content = json.dumps(payload).encode("utf-8")
+    return resp
+
+
+@benchmark("resolve_dynamic_params", [10, 100, 1000])
+def bench_resolve(size):
+    """size: 含占位符的字段数"""
+    get_store().set("admin_token", "token")
+    case = {
+        "allure": {"title": "动态参数用例"},
+        "steps": {"request": {"method": "POST", "url": "/project/submit", "json": {
+            f"field{i}": ["name_${random}", "${uuid}", "${timestamp_ms}", "${extract:admin_token}", "固定值"][i % 5]
+            for i in range(size)
+        }}},
+    }
+    return lambda: resolve_dynamic_params(case)
+
+
+@benchmark("check_response", [1_000, 10_000, 50_000])
+def bench_check_response(size):
+    """size: 响应列表行数，包含 JSON 解码与断言"""
+    raw = _json_response(make_payload(size))
+    return lambda: ResponseChecker(ApiResponse(raw)).check_response(EXPECTED)
+
+
+@benchmark("extract_jsonpath", [1_000, 10_000, 50_000])
+def bench_extract(size):
+    """size: 响应列表行数，响应体已解码（与断言共用），只测表达式求值"""
+    runner = ApiRunner({"allure": {"title": "提取"}, "steps": {}})
+    runner.resp = ApiResponse(_json_response(make_payload(size)))
+    runner.resp.json()
+    return lambda: runner.extract("last_reason", "$.data.records[*].reason")
+
+
+def _write_cases(files):
+    directory = os.path.join(_WORKDIR, f"cases-{files}")
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+        for i in range(files):
+            cases = {
+                f"case_{i}_{j}": {
+                    "allure": {"title": f"用例{i}-{j}", "story": "基准", "severity": "normal"},
+                    "steps": {
+                        "request": {"method": "GET", "url": f"/bench/{i}", "params": {"page": j, "ts": "${timestamp}"}},
+                        "expected": EXPECTED,
+                        "extract": {f"total_{i}_{j}": "$.data.total"},
+                    },
+                }
+                for j in range(5)
+            }
+            with open(os.path.join(directory, f"test_{i}.yml"), "w", encoding="utf-8") as f:
+                yaml.safe_dump(cases, f, allow_unicode=True)
+    return directory
+
+
+@benchmark("get_testcases/cached", [10, 100])
+def bench_get_testcases_cached(size):
+    """size: YAML 文件数（每个 5 个用例），命中用例解析缓存"""
+    directory = _write_cases(size)
+
+    def run():
+        set_enabled(True)
+        return get_testcases(directory)
+    run()
+    return run
+
+
+@benchmark("get_testcases/uncached", [10, 100])
+def bench_get_testcases_uncached(size):
+    """size: YAML 文件数（每个 5 个用例），每次都重新解析"""
+    directory = _write_cases(size)
+
+    def run():
+        set_enabled(False)
+        try:
+            return get_testcases(directory)
+        finally:
+            set_enabled(True)
+    return run
+
+
+@benchmark("encrypt_password", [2048, 4096])
+def bench_encrypt(size):
+    """size: RSA 密钥位数"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=size)
+    pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo).decode("utf-8")
+    encryptor = PasswordEncryptor(pem)
+    return lambda: encryptor.encryptPassword("123456")
+
+
+@benchmark("allure_load", [1, 10, 50])
+def bench_allure_load(size):
+    """size: tag 数"""
+    conf = {"title": "用例", "description": "描述", "epic": "接口", "feature": "项目", "story": "提交",
+            "severity": "normal", "tag": [f"tag{i}" for i in range(size)]}
+    utils = AllureUtils()
+    return lambda: utils.allure_load(conf)
+
+
+@benchmark("e2e_case", [10, 1_000])
+def bench_e2e(size):
+    """size: 响应列表行数；对替身服务完整执行一个 请求 + 断言 + 提取 的用例"""
+    case = {
+        "allure": {"title": "端到端"},
+        "steps": {
+            "request": {"method": "GET", "url": "/bench/list", "params": {"rows": size, "ts": "${timestamp}"}},
+            "expected": EXPECTED,
+            "extract": {"bench_total": "$.data.total"},
+        },
+    }
+    return lambda: ApiRunner(case).run()
+
+
+def measure(func, repeat):
+    """自动选择每轮次数使单轮不少于 0.2 秒，返回每次调用的最小/中位耗时(µs)"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [t / number * 1e6 for t in timer.repeat(repeat, number)]
+    return {"number": number, "repeat": repeat, "min_us": round(min(times), 3),
+            "median_us": round(statistics.median(times), 3)}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(name_filter=None, quick=False, repeat=5):
+    """:return: 结果字典 {"meta", "results": [{"name", "size", "number", "repeat", "min_us", "median_us"}]}"""
+    results = []
+    with StubServer(port=_PORT):
+        for name, sizes, quick_sizes, setup in BENCHMARKS:
+            if name_filter and name_filter not in name:
+                continue
+            for size in quick_sizes if quick else sizes:
+                result = dict(name=name, size=size, **measure(setup(size), 3 if quick else repeat))
+                print(f"{name:<26} {size:>8}  {_format_us(result['median_us']):>12}", flush=True)
+                results.append(result)
+    meta = {
+        "commit": _git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+        "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%d %H:%M:%S"), "quick": quick,
+    }
+    return {"meta": meta, "results": results}
+
+
+def _format_us(us):
+    if us >= 1000:
+        return f"{us / 1000:.2f} ms"
+    return f"{us:.2f} µs"
+
+
+def compare(current, baseline, threshold=0.1):
+    """
+    与基线对比中位耗时
+    :param threshold: 变化超过该比例才视为变慢/变快
+    :return: (报告文本, 变慢的基准列表)
+    """
+    base = {(r["name"], r["size"]): r for r in baseline["results"]}
+    # 表头是双宽字符，按显示宽度补齐
+    lines = [f"{'基准':<24} {'规模':>6} {'基线':>10} {'当前':>10} {'变化':>6}"]
+    regressions = []
+    for r in current["results"]:
+        b = base.get((r["name"], r["size"]))
+        if b is None:
+            lines.append(f"{r['name']:<26} {r['size']:>8} {'-':>12} {_format_us(r['median_us']):>12}     新增")
+            continue
+        change = r["median_us"] / b["median_us"] - 1
+        mark = ""
+        if change > threshold:
+            mark = "  ⚠️ 变慢"
+            regressions.append(r)
+        elif change < -threshold:
+            mark = "  ✅ 变快"
+        lines.append(f"{r['name']:<26} {r['size']:>8} {_format_us(b['median_us']):>12} "
+                     f"{_format_us(r['median_us']):>12} {change:>+8.1%}{mark}")
+    lines.append(f"基线：{baseline['meta'].get('commit')} ({baseline['meta'].get('time')})，阈值 {threshold:.0%}")
+    return "\n".join(lines), regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="框架开销基准套件")
+    parser.add_argument("--filter", default=None, help="只运行名称包含该字符串的基准")
+    parser.add_argument("--quick", action="store_true", help="每项只跑最小规模，重复 3 轮")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复轮数")
+    parser.add_argument("--output", default=None, help="结果保存为 JSON")
+    parser.add_argument("--baseline", default=None, help="与该 JSON 基线对比")
+    parser.add_argument("--threshold", type=float, default=0.1, help="变慢/变快的判定比例")
+    parser.add_argument("--fail-on-regression", action="store_true", help="有基准变慢时返回非零退出码")
+    args = parser.parse_args()
+
+    current = run_suite(args.filter, args.quick, args.repeat)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存：{args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report, regressions = compare(current, json.load(f), args.threshold)
+        print(report)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,18 @@
 import logging
-import jsonpath
 import requests
-import os
-from common.config import SERVER_URL
+import time
+from common.config import SERVER_URL, STREAM_CHUNK_SIZE
+from common.response import ApiResponse
 from common.response_checker import ResponseChecker
+from common.result_sink import note_case
+from common.streaming import StreamingBody
+from common.timing import RequestTiming, format_timings
+from common.transport import get_default_session
 from utils.allure_utils import AllureUtils
 from utils.data_utils import extract_yaml, resolve_dynamic_params
+from utils.jsonpath_utils import compile_jsonpath
+from utils.log_utils import LogBody
+from utils.multipart import StreamingMultipart
 
 logger = logging.getLogger("Hsyuan")
 
@@ -13,51 +20,102 @@ logger = logging.getLogger("Hsyuan")
 class ApiRunner:
 
     resp = None
+    # request 中设置 stream: true 时的流式响应体
+    body = None
     allure_utils = AllureUtils()
-    def __init__(self, data, session=requests.Session()):
-        self.session = session
+    def __init__(self, data, session=None):
+        # 未传入会话时使用共享的默认会话（连接池、超时、重试由 common.transport 统一配置）
+        self.session = session if session is not None else get_default_session()
         # 解析动态参数
         data = resolve_dynamic_params(data)
         self.steps = data["steps"]
         self.allure = data["allure"]
+        # 本用例每次请求的耗时记录(RequestTiming)，request.repeat 大于 1 时有多条
+        self.timings = []
+        # 最近一次是 stream 请求且响应体尚未读取
+        self._unread_stream = False
 
     def send_request(self, **kwargs):
+        timing = RequestTiming(kwargs.get("method"), kwargs.get("url", ""))
         try:
             kwargs["url"] = SERVER_URL + kwargs.get("url", "")
+            kwargs["hooks"] = {"response": timing.on_response}
+            if kwargs.get("headers"):
+                # ${extract:VAR} 会保留变量类型，请求头的值需要转回字符串
+                kwargs["headers"] = {k: v if v is None or isinstance(v, (str, bytes)) else str(v)
+                                     for k, v in kwargs["headers"].items()}
             if kwargs.get("files"):
-                # 处理文件路径中的动态参数
-                logger.info(f'正在处理文件上传，原始文件路径: {kwargs["files"]["path"]}')
-                with open(kwargs["files"]["path"], "rb") as f:
-                    kwargs["files"] = {
-                        'file': (os.path.basename(kwargs["files"]["path"]), f,
-                                 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-                    }
-                    response = self.session.request(**kwargs)
+                # 文件按块流式发送，支持磁盘文件与合成数据，内容类型自动识别
+                body = StreamingMultipart(kwargs.pop("files"), kwargs.pop("data", None))
+                logger.info("正在处理文件上传: %s，共 %s 字节", ", ".join(s.filename for s in body.sources), len(body))
+                kwargs["data"] = body
+                kwargs["headers"] = dict(kwargs.get("headers") or {}, **{"Content-Type": body.content_type})
+                try:
+                    with timing.measure():
+                        response = self.session.request(**kwargs)
+                finally:
+                    body.close()
+                timing.set_upload(body.sent, body.upload_seconds)
             else:
-                response = self.session.request(**kwargs)
+                with timing.measure():
+                    response = self.session.request(**kwargs)
+            timing.status_code = response.status_code
+            self.timings.append(timing)
+            self._unread_stream = bool(kwargs.get("stream"))
+            logger.info("请求耗时: %s", timing)
             # 不使用 raise_for_status()，让4xx/5xx响应也能被断言
-            return response
+            return ApiResponse(response)
         except requests.RequestException as e:
-            logger.info(f"请求失败: {e}")
+            logger.info("请求失败: %s", e)
             return None
 
+    @staticmethod
+    def request_kwargs(request):
+        """
+        拆出 request 中的 repeat（同一请求连续发送的次数，用于 p95_latency_ms 等耗时断言）
+        :return: (传给 send_request 的参数, 次数)
+        """
+        if "repeat" not in request:
+            return request, 1
+        kwargs = dict(request)
+        return kwargs, max(int(kwargs.pop("repeat") or 1), 1)
+
+    def discard_body(self):
+        """repeat 时丢弃非最后一次的响应：流式响应读完以记录完整下载耗时并归还连接"""
+        if self.resp is not None and self._unread_stream:
+            self._unread_stream = False
+            start = time.perf_counter()
+            for _ in self.resp.iter_content(STREAM_CHUNK_SIZE):
+                pass
+            self.timings[-1].add_download(time.perf_counter() - start)
+
+    def prepare_body(self, request):
+        """request 中设置 stream: true 时，响应体改为流式解析"""
+        if request.get("stream") and self.resp is not None:
+            self._unread_stream = False
+            self.body = StreamingBody(self.resp, self.steps.get("expected"), self.steps.get("extract"),
+                                      self.timings[-1])
+
     def check_response(self,expected=None):
-        checker = ResponseChecker(self.resp)
+        if self.body is not None and expected is not None:
+            self.body.parse()
+            self.allure_utils.attach_text("响应体预览", self.body.preview_text)
+        checker = ResponseChecker(self.resp, self.body, self.timings)
         checker.check_response(expected)
 
 
     def extract(self,var_name,var_exp):
-        try:
-            self.resp.json = self.resp.json()
-        except Exception:
-            self.resp.json = {}
-        value = jsonpath.jsonpath(self.resp.json,var_exp)
+        if self.body is not None:
+            value = self.body.extract_value(var_name, var_exp)
+        else:
+            # 与断言共用同一份解码结果，表达式编译后缓存
+            value = compile_jsonpath(var_exp)(self.resp.json_data)
         if value:
-            logger.info(f'提取变量成功: {var_name} = {value[0]}')
+            logger.info("提取变量成功: %s = %s", var_name, LogBody(value[0]))
             extract_yaml(var_name,value[0])
             return value[0]
         else:
-            logger.info(f'提取变量失败: {var_name}，表达式: {var_exp}')
+            logger.info("提取变量失败: %s，表达式: %s", var_name, var_exp)
             return None
 
 
@@ -66,11 +124,16 @@ class ApiRunner:
         match k:
             case 'request':
                 logger.info('1.正在发送请求')
-                logger.info(f'{v}')
-                self.resp=self.send_request(**v)
+                logger.info('%s', LogBody(v))
+                kwargs, repeat = self.request_kwargs(v)
+                for i in range(repeat):
+                    if i:
+                        self.discard_body()
+                    self.resp=self.send_request(**kwargs)
+                self.prepare_body(v)
             case 'expected':
                 logger.info('2.正在断言响应')
-                logger.info(f'{v}')
+                logger.info('%s', LogBody(v))
                 self.check_response(v)
             case 'extract':
                 logger.info('3.正在提取变量')
@@ -84,7 +147,15 @@ class ApiRunner:
         self.allure_utils.allure_load(self.allure)
         start =self.allure["title"].center(120,"=")
         logger.info(start)
-        for k,v in self.steps.items():
-            self.core(k,v)
+        try:
+            for k,v in self.steps.items():
+                self.core(k,v)
+        finally:
+            self.attach_timings()
+            note_case(self.allure, self.timings)
+
+    def attach_timings(self):
+        if self.timings:
+            self.allure_utils.attach_text("请求耗时", format_timings(self.timings))
 
 
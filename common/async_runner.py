@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+from common.api_utils import ApiRunner
+from common.auth import DIR_ROLES
+from common.config import SERVER_URL, ASYNC_MAX_IN_FLIGHT, ASYNC_PER_HOST_LIMIT
+from common.transport import create_session, mount_transport, log_transport_stats
+from utils.log_utils import LogBody
+
+logger = logging.getLogger("Hsyuan")
+
+class RequestLimiter:
+    """并发限制器：全局在途请求数 + 单主机在途请求数"""
+
+    def __init__(self, max_in_flight=ASYNC_MAX_IN_FLIGHT, per_host=ASYNC_PER_HOST_LIMIT):
+        self.max_in_flight = max_in_flight
+        self.per_host = per_host
+        self._global = asyncio.Semaphore(max_in_flight)
+        self._hosts = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlparse(url).netloc
+        host_sem = self._hosts.get(host)
+        if host_sem is None:
+            host_sem = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        # 先占主机名额再占全局名额，避免排队等主机时占住全局名额
+        async with host_sem:
+            async with self._global:
+                yield
+
+
+class AsyncApiRunner(ApiRunner):
+    """
+    异步版 ApiRunner：请求在线程池中执行，由 RequestLimiter 控制并发，
+    断言、提取、Allure 加载沿用 ApiRunner 的同步实现，保证与串行执行结果一致
+    """
+
+    def __init__(self, data, session, limiter, executor=None):
+        super().__init__(data, session)
+        self.limiter = limiter
+        self.executor = executor
+
+    async def send_request(self, **kwargs):
+        loop = asyncio.get_running_loop()
+        async with self.limiter.slot(SERVER_URL + kwargs.get("url", "")):
+            return await loop.run_in_executor(
+                self.executor, lambda: ApiRunner.send_request(self, **kwargs))
+
+    async def run(self):
+        self.allure_utils.allure_load(self.allure)
+        start = self.allure["title"].center(120, "=")
+        logger.info(start)
+        try:
+            await self._run_steps()
+        finally:
+            self.attach_timings()
+
+    async def _run_steps(self):
+        for k, v in self.steps.items():
+            if k == 'request':
+                logger.info('1.正在发送请求')
+                logger.info('%s', LogBody(v))
+                kwargs, repeat = self.request_kwargs(v)
+                for i in range(repeat):
+                    if i:
+                        await asyncio.get_running_loop().run_in_executor(self.executor, self.discard_body)
+                    self.resp = await self.send_request(**kwargs)
+                self.prepare_body(v)
+                if self.body is not None:
+                    # 流式读取响应体同样是阻塞 IO，放到线程池中完成
+                    await asyncio.get_running_loop().run_in_executor(self.executor, self.body.parse)
+            else:
+                self.core(k, v)
+
+
+class CaseResult:
+    """单个用例的执行结果"""
+
+    def __init__(self, name, title, passed, error=None, duration=0.0, timings=None):
+        self.name = name
+        self.title = title
+        self.passed = passed
+        self.error = error
+        self.duration = duration
+        # 各次请求的 RequestTiming
+        self.timings = timings or []
+
+
+async def _run_case(name, data, session, limiter, executor):
+    start = time.perf_counter()
+    runner = None
+    try:
+        runner = AsyncApiRunner(data, session, limiter, executor)
+        await runner.run()
+    except AssertionError as e:
+        return CaseResult(name, data["allure"].get("title"), False, str(e), time.perf_counter() - start,
+                          runner and runner.timings)
+    except Exception as e:
+        return CaseResult(name, data["allure"].get("title"), False, f"{type(e).__name__}: {e}",
+                          time.perf_counter() - start, runner and runner.timings)
+    return CaseResult(name, data["allure"].get("title"), True, None, time.perf_counter() - start, runner.timings)
+
+
+async def _run_after(waits, name, data, session, limiter, executor):
+    """依赖的用例全部结束(无论成功与否)后再执行，与串行执行时的行为一致"""
+    if waits:
+        await asyncio.wait(waits)
+    return await _run_case(name, data, session, limiter, executor)
+
+
+async def run_cases_async(cases, max_in_flight=ASYNC_MAX_IN_FLIGHT, per_host=ASYNC_PER_HOST_LIMIT,
+                          dependencies=None):
+    """
+    在同一个事件循环中并发执行用例
+    :param cases: [(用例名, 用例数据, 会话)] 列表
+    :param dependencies: {用例序号: [需先执行完的用例序号]}，按拓扑顺序排列(见 DependencyGraph.dependencies)，
+                         None 表示用例之间没有依赖
+    :return: 与 cases 顺序一致的 CaseResult 列表
+    """
+    limiter = RequestLimiter(max_in_flight, per_host)
+    dependencies = dependencies or {}
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="async-runner") as executor:
+        tasks = {}
+        # 依赖总在拓扑顺序的前面，创建任务时其依赖的任务已经存在
+        for index in list(dependencies) + [i for i in range(len(cases)) if i not in dependencies]:
+            name, data, session = cases[index]
+            waits = [tasks[dep] for dep in dependencies.get(index, ())]
+            tasks[index] = asyncio.ensure_future(_run_after(waits, name, data, session, limiter, executor))
+        return await asyncio.gather(*(tasks[i] for i in range(len(cases))))
+
+
+def load_cases(test_dirs):
+    """
+    按目录加载 YAML 用例，用例的 auth 字段（缺省为目录名）决定登录角色
+    :return: [(用例名, 用例数据, 角色)]，不需要登录的角色为 None
+    """
+    import glob
+
+    from utils.data_utils import read_yaml
+
+    cases = []
+    for test_dir in test_dirs:
+        dir_role = DIR_ROLES.get(os.path.basename(os.path.normpath(test_dir)))
+        # 与 pytest 收集顺序一致，依赖分析中同名变量取之前最近的生产者
+        for yaml_file in sorted(glob.glob(os.path.join(test_dir, "*.yml"))):
+            for name, data in read_yaml(yaml_file).items():
+                role = data.get("auth", dir_role)
+                cases.append((name, data, None if role == "none" else role))
+    return cases
+
+
+def open_sessions(roles, pool_maxsize, auto_refresh=False):
+    """
+    为每个角色登录一次，连接池大小与单主机并发数一致，避免高并发时连接被丢弃重建
+    :param auto_refresh: 是否在令牌到期前后台刷新（长时间压测使用）
+    """
+    from common.auth import get_provider, login_role
+    from utils.data_utils import extract_yaml
+
+    sessions = {}
+    for role in roles:
+        if role is None:
+            sessions[role] = create_session(pool_maxsize=pool_maxsize)
+        else:
+            sessions[role] = login_role(role)
+            extract_yaml(f"{role}_token", sessions[role].headers["Token"])
+            mount_transport(sessions[role], pool_maxsize=pool_maxsize)
+            if auto_refresh:
+                get_provider().start_auto_refresh(role, sessions[role])
+    return sessions
+
+
+def close_sessions(sessions):
+    from common.auth import get_provider
+
+    for role, session in sessions.items():
+        get_provider().stop_auto_refresh(session)
+        log_transport_stats(session, f"({role or 'none'})")
+        session.close()
+
+
+def run_dirs(test_dirs, max_in_flight=ASYNC_MAX_IN_FLIGHT, per_host=ASYNC_PER_HOST_LIMIT):
+    """
+    独立运行入口：按目录加载 YAML 用例，按用例的 auth 字段（缺省为目录名）选择登录角色后并发执行，
+    有变量依赖的用例按依赖链顺序执行(common/dependency.py)，链之间与其余用例并发
+    :param test_dirs: 用例目录列表，如 ["data/ai_testcases/admin"]
+    :return: CaseResult 列表
+    """
+    from common.dependency import DependencyGraph
+    from utils.data_utils import clear_extract_yaml, export_extract_yaml
+
+    clear_extract_yaml()
+    loaded = load_cases(test_dirs)
+    graph = DependencyGraph([(name, data) for name, data, _ in loaded])
+    logger.info(graph.format_report())
+    sessions = open_sessions(dict.fromkeys(role for _, _, role in loaded), per_host)
+    cases = [(name, data, sessions[role]) for name, data, role in loaded]
+
+    try:
+        return asyncio.run(run_cases_async(cases, max_in_flight, per_host, graph.dependencies()))
+    finally:
+        export_extract_yaml()
+        close_sessions(sessions)
@@ -0,0 +1,215 @@
+"""
+登录与令牌管理：角色与账号来自 config/roles.yaml，令牌按角色缓存在磁盘上，
+多个 xdist worker、多次运行共用，根据 JWT 的 exp 在到期前自动重新登录
+"""
+
+import base64
+import json
+import logging
+import os
+import threading
+import time
+
+import yaml
+
+from common.config import (
+    SERVER_URL, PUBLIC_KEY, ROLES_FILE,
+    TOKEN_CACHE, TOKEN_CACHE_PATH, TOKEN_REFRESH_MARGIN, TOKEN_DEFAULT_TTL,
+)
+from common.transport import create_session
+from utils.file_lock import FileLock
+
+logger = logging.getLogger("Hsyuan")
+
+
+def load_roles(path=ROLES_FILE):
+    """读取角色表 {角色: {username, password, user_type, dirs}}"""
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+ROLES = load_roles()
+
+# 角色账号表：{角色: (用户名, 密码, 用户类型)}
+ROLE_ACCOUNTS = {role: (str(conf["username"]), str(conf["password"]), conf.get("user_type", role))
+                 for role, conf in ROLES.items()}
+
+# 角色 -> conftest 中对应的登录 fixture
+ROLE_FIXTURES = {role: f"get_{role}_token" for role in ROLES}
+
+# 用例目录名 -> 默认登录角色，用例中可通过 auth 字段覆盖
+DIR_ROLES = {d: role for role, conf in ROLES.items() for d in conf.get("dirs") or []}
+
+
+def token_expiry(token):
+    """读取 JWT 载荷中的 exp(秒级时间戳)，不是 JWT 或没有 exp 时返回 None（不校验签名）"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+def request_token(username, password, user_type, session=None):
+    """
+    RSA加密密码后调用 /login，返回令牌
+    :param session: 发送登录请求的会话，缺省时临时创建
+    """
+    # 延迟导入，避免只收集用例时也加载 cryptography
+    from utils.rsa_utils import encrypt_password
+
+    password_rsa = encrypt_password(password, PUBLIC_KEY)
+
+    params = {
+        "username": username,
+        "password": password_rsa,
+        "userType": user_type,
+        "timestamp": int(time.time() * 1000)
+    }
+
+    owned = session is None
+    session = session or create_session()
+    try:
+        resp = session.request("POST", SERVER_URL + "/login", json=params)
+        resp.raise_for_status()
+        return resp.json()["data"]["token"]
+    finally:
+        if owned:
+            session.close()
+
+
+def login(username, password, user_type):
+    """
+    RSA加密密码后登录，返回携带Token请求头的会话（不使用令牌缓存）
+    :param username: 用户名
+    :param password: 原始密码
+    :param user_type: 用户类型(admin/user)
+    :return: requests.Session
+    """
+    session = create_session()
+    token = request_token(username, password, user_type, session)
+    session.headers.update({
+        "Token": token
+    })
+    return session
+
+
+class AuthProvider:
+    """
+    按角色提供令牌：进程内缓存 -> 磁盘缓存(文件锁保护) -> 重新登录
+    同一时刻只有一个进程在登录，其余进程等锁释放后直接读取新令牌
+    """
+
+    def __init__(self, accounts=None, cache_path=TOKEN_CACHE_PATH, margin=TOKEN_REFRESH_MARGIN,
+                 use_cache=TOKEN_CACHE):
+        self.accounts = ROLE_ACCOUNTS if accounts is None else accounts
+        self.cache_path = cache_path
+        self.margin = margin
+        self.use_cache = use_cache
+        self._tokens = {}
+        self._lock = threading.Lock()
+        # 后台刷新线程：{id(会话): 停止事件}
+        self._refreshers = {}
+
+    def _key(self, role):
+        # 切换环境或账号时不会误用其他环境的令牌
+        return f"{SERVER_URL}|{role}|{self.accounts[role][0]}"
+
+    def _fresh(self, entry):
+        return entry is not None and entry["expires_at"] - self.margin > time.time()
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self, data):
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cache_path)
+
+    def _login(self, role):
+        token = request_token(*self.accounts[role])
+        expires_at = token_expiry(token) or time.time() + TOKEN_DEFAULT_TTL
+        logger.info(f"角色 {role} 登录成功，令牌有效期至 {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(expires_at))}")
+        return {"token": token, "expires_at": expires_at}
+
+    def _entry(self, role, force=False):
+        if role not in self.accounts:
+            raise ValueError(f"未配置的角色: {role}")
+        with self._lock:
+            entry = self._tokens.get(role)
+            if not force and self._fresh(entry):
+                return entry
+            if not self.use_cache:
+                entry = self._tokens[role] = self._login(role)
+                return entry
+            with FileLock(self.cache_path + ".lock"):
+                cache = self._read_cache()
+                key = self._key(role)
+                entry = cache.get(key)
+                # 强制刷新时，若其他进程已经换过令牌则直接使用
+                stale = self._tokens.get(role)
+                if not self._fresh(entry) or (force and (stale is None or entry["token"] == stale["token"])):
+                    entry = cache[key] = self._login(role)
+                    self._write_cache(cache)
+                self._tokens[role] = entry
+                return entry
+
+    def get_token(self, role, force=False):
+        """
+        获取角色令牌，距到期不足 margin 秒时重新登录
+        :param force: 强制重新登录（如令牌被服务端提前注销）
+        """
+        return self._entry(role, force)["token"]
+
+    def expires_at(self, role):
+        return self._entry(role)["expires_at"]
+
+    def session(self, role):
+        """返回携带该角色 Token 请求头的新会话"""
+        session = create_session()
+        session.headers.update({"Token": self.get_token(role)})
+        return session
+
+    def start_auto_refresh(self, role, session):
+        """后台线程在令牌到期前刷新并更新会话的 Token 请求头，用于长时间的压测"""
+        stop = threading.Event()
+        self._refreshers[id(session)] = stop
+
+        def refresh():
+            wait = 0
+            while not stop.wait(wait):
+                try:
+                    session.headers["Token"] = self.get_token(role)
+                    wait = max(self.expires_at(role) - self.margin - time.time(), 1)
+                except Exception as e:
+                    logger.warning(f"角色 {role} 令牌刷新失败，稍后重试: {e}")
+                    wait = 5
+
+        threading.Thread(target=refresh, name=f"token-refresh-{role}", daemon=True).start()
+
+    def stop_auto_refresh(self, session):
+        stop = self._refreshers.pop(id(session), None)
+        if stop is not None:
+            stop.set()
+
+
+_provider = None
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        _provider = AuthProvider()
+    return _provider
+
+
+def login_role(role):
+    """按角色获取携带 Token 的会话，角色需在 config/roles.yaml 中配置，令牌优先取缓存"""
+    return get_provider().session(role)
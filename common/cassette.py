@@ -0,0 +1,298 @@
+"""
+请求录制/回放：
+- record：请求照常发往真实服务，每个请求/响应写成一行 JSON，保存到 CASSETTE_DIR/<进程>.jsonl
+- replay：不访问网络，按请求匹配录制的响应返回（进程内适配器）；也可以用 serve() 启动本地替身服务
+请求按 方法 + 路径 + 查询参数 + 请求体 (+ 指定的请求头) 匹配，timestamp、Token、加密后的 password 等
+每次都会变化的字段不参与匹配；请求体中含 ${random} 等动态值时精确匹配不到，退回按请求体结构
+(字段名与值的类型)匹配。同一请求录制了多次时按录制顺序依次返回，用完后重复返回最后一次
+"""
+
+import base64
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from common.config import CASSETTE_MODE, CASSETTE_DIR, CASSETTE_IGNORE, CASSETTE_MATCH_HEADERS
+
+logger = logging.getLogger("Hsyuan")
+
+# 录制时不保存的响应头：响应体按解码后的内容保存，长度与编码在回放时重新计算
+_DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection", "keep-alive"}
+
+
+def _split(text):
+    return [s.strip() for s in text.split(",") if s.strip()]
+
+
+def _strip(value, ignore):
+    """递归去掉需要忽略的字段"""
+    if isinstance(value, dict):
+        return {k: _strip(v, ignore) for k, v in value.items() if k not in ignore}
+    if isinstance(value, list):
+        return [_strip(v, ignore) for v in value]
+    return value
+
+
+def _shape(value):
+    """只保留结构：字段名与值的类型"""
+    if isinstance(value, dict):
+        return {k: _shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_shape(v) for v in value[:1]]
+    return type(value).__name__
+
+
+def _hash(key):
+    return hashlib.sha1(json.dumps(key, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def normalize_body(body, content_type, ignore, shape=False):
+    """
+    请求体 -> 参与匹配的文本：JSON 与表单去掉忽略字段后排序，文件上传只比较长度，其余取哈希
+    :param shape: 只保留结构，用于宽松匹配
+    """
+    if body is None or body == b"" or body == "":
+        return None
+    content_type = (content_type or "").lower()
+    if not isinstance(body, (bytes, str)) or content_type.startswith("multipart/"):
+        # 流式上传的请求体只能读一次，分隔符每次随机，按长度匹配
+        return f"<body {len(body)}>"
+    text = body.decode("utf-8", "replace") if isinstance(body, bytes) else body
+    if "x-www-form-urlencoded" in content_type:
+        fields = sorted((k, v) for k, v in parse_qsl(text, keep_blank_values=True) if k not in ignore)
+        return json.dumps([k for k, _ in fields] if shape else fields, ensure_ascii=False)
+    try:
+        value = _strip(json.loads(text), ignore)
+        return json.dumps(_shape(value) if shape else value, sort_keys=True, ensure_ascii=False)
+    except ValueError:
+        return "<text>" if shape else hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CassetteStore:
+    """
+    录制内容：{匹配键: [录制的交互, ...]}
+    :param mode: record / replay
+    :param ignore: 匹配时忽略的字段名
+    :param match_headers: 参与匹配的请求头
+    """
+
+    def __init__(self, directory=CASSETTE_DIR, mode=CASSETTE_MODE, ignore=None, match_headers=None):
+        self.directory = directory
+        self.mode = mode
+        self.ignore = set(_split(CASSETTE_IGNORE) if ignore is None else ignore)
+        self.match_headers = _split(CASSETTE_MATCH_HEADERS) if match_headers is None else list(match_headers)
+        self.interactions = defaultdict(list)
+        self.by_shape = defaultdict(list)
+        self.hits = 0
+        self.loose_hits = 0
+        self.misses = 0
+        self._cursors = defaultdict(int)
+        self._shape_cursors = defaultdict(int)
+        self._file = None
+        self._lock = threading.Lock()
+        if mode == "replay":
+            self.load()
+
+    def keys_for(self, method, url, headers, body):
+        """:return: (精确匹配键, 按结构匹配的宽松键)"""
+        parts = urlsplit(url)
+        headers = headers or {}
+        content_type = headers.get("Content-Type")
+        query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in self.ignore)
+        key = {
+            "method": method.upper(),
+            "path": parts.path,
+            "query": query,
+            "body": normalize_body(body, content_type, self.ignore),
+        }
+        if self.match_headers:
+            key["headers"] = {name: headers.get(name) for name in self.match_headers}
+        loose = dict(key, query=[k for k, _ in query], body=normalize_body(body, content_type, self.ignore, True))
+        return _hash(key), _hash(loose)
+
+    def _add(self, interaction):
+        self.interactions[interaction["key"]].append(interaction)
+        self.by_shape[interaction["shape"]].append(interaction)
+
+    def load(self):
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.jsonl"))):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add(json.loads(line))
+        logger.info(f"已加载录制：{self.directory}，共 {sum(map(len, self.interactions.values()))} 条")
+
+    def _open(self):
+        # 每个进程(xdist worker)写自己的文件，无需跨进程加锁；录制开始时覆盖本进程上次的录制
+        os.makedirs(self.directory, exist_ok=True)
+        name = os.getenv("PYTEST_XDIST_WORKER", "main")
+        self._file = open(os.path.join(self.directory, f"{name}.jsonl"), "w", encoding="utf-8")
+
+    def record(self, keys, request, response):
+        content = response.content
+        try:
+            body, encoding = content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode("ascii"), "base64"
+        parts = urlsplit(request.url)
+        interaction = {
+            "key": keys[0], "shape": keys[1],
+            "method": request.method, "url": parts.path + (f"?{parts.query}" if parts.query else ""),
+            "status": response.status_code, "reason": response.reason,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS},
+            "body": body, "encoding": encoding,
+        }
+        line = json.dumps(interaction, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._file.write(line + "\n")
+            self._file.flush()
+            self._add(interaction)
+
+    def lookup(self, keys):
+        """按录制顺序返回匹配的交互，先精确匹配再按结构匹配，都没有时返回 None"""
+        key, shape = keys
+        with self._lock:
+            if self.interactions.get(key):
+                recorded, cursors = self.interactions[key], self._cursors
+                self.hits += 1
+            elif self.by_shape.get(shape):
+                recorded, cursors, key = self.by_shape[shape], self._shape_cursors, shape
+                self.loose_hits += 1
+            else:
+                self.misses += 1
+                return None
+            index = cursors[key]
+            cursors[key] = index + 1
+            return recorded[min(index, len(recorded) - 1)]
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def interaction_content(interaction):
+    if interaction.get("encoding") == "base64":
+        return base64.b64decode(interaction["body"])
+    return interaction["body"].encode("utf-8")
+
+
+def build_response(request, interaction, connection=None):
+    """录制的交互 -> requests.Response（响应体已在内存中，流式读取同样可用）"""
+    response = requests.Response()
+    response.status_code = interaction["status"]
+    response.reason = interaction.get("reason")
+    response.headers = CaseInsensitiveDict(interaction["headers"])
+    response._content = interaction_content(interaction)
+    response._content_consumed = True
+    response.url = request.url
+    response.request = request
+    response.connection = connection
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    包装真实的传输层适配器：record 时转发并录制，replay 时直接返回录制的响应
+    :param adapter: 真实的适配器（PooledAdapter / Http2Adapter）
+    """
+
+    def __init__(self, adapter, store):
+        super().__init__()
+        self.adapter = adapter
+        self.store = store
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        keys = self.store.keys_for(request.method, request.url, request.headers, request.body)
+        if self.store.mode == "replay":
+            interaction = self.store.lookup(keys)
+            if interaction is None:
+                raise requests.ConnectionError(f"回放模式下没有匹配的录制：{request.method} {request.url}",
+                                               request=request)
+            return build_response(request, interaction, self)
+        response = self.adapter.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert,
+                                     proxies=proxies)
+        self.store.record(keys, request, response)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+    def stats(self):
+        if self.store.mode == "replay":
+            return [{"host": "cassette", "maxsize": None, "connections": 0, "requests": self.store.hits + self.store.loose_hits}]
+        return self.adapter.stats()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_cassette_store():
+    """进程内共享的录制内容，CASSETTE_MODE=off 时返回 None"""
+    global _store
+    if CASSETTE_MODE == "off":
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CassetteStore()
+    return _store
+
+
+def serve(store, host="127.0.0.1", port=18080):
+    """
+    本地替身服务：按录制内容应答，SERVER_URL 指向它即可在真实套接字上离线运行用例
+    :param store: mode=replay 的 CassetteStore
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else None
+            interaction = store.lookup(store.keys_for(self.command, self.path, self.headers, body))
+            if interaction is None:
+                status, headers = 404, {"Content-Type": "application/json;charset=UTF-8"}
+                content = json.dumps({"message": f"没有匹配的录制：{self.command} {self.path}"},
+                                     ensure_ascii=False).encode("utf-8")
+            else:
+                status, headers, content = interaction["status"], interaction["headers"], interaction_content(interaction)
+            self.send_response(status)
+            for name, value in headers.items():
+                # Date、Server 由 send_response 生成
+                if name.lower() not in ("date", "server"):
+                    self.send_header(name, value)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = _handle
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"回放服务已启动：http://{host}:{port}，录制 {sum(map(len, store.interactions.values()))} 条")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"精确命中 {store.hits} 次，按结构命中 {store.loose_hits} 次，未命中 {store.misses} 次")
@@ -17,3 +17,89 @@ API_KEY = os.getenv("API_KEY")
 AI_URL = os.getenv("AI_URL")
 
 
+# 提取变量存储后端：memory(进程内) / sqlite(多进程共享，供 pytest-xdist 的 worker 共用) / SQLite 文件路径
+EXTRACT_BACKEND = os.getenv("EXTRACT_BACKEND", "memory")
+EXTRACT_DB_PATH = os.getenv("EXTRACT_DB_PATH", ".cache/extract.db")
+
+
+# 用例解析缓存(on/off，pytest --case-cache 优先) / 缓存目录
+CASE_CACHE = os.getenv("CASE_CACHE", "on") != "off"
+CASE_CACHE_DIR = os.getenv("CASE_CACHE_DIR", ".cache/cases")
+
+
+# 异步执行引擎：全局最大并发请求数 / 单主机最大并发请求数
+ASYNC_MAX_IN_FLIGHT = int(os.getenv("ASYNC_MAX_IN_FLIGHT", "32"))
+ASYNC_PER_HOST_LIMIT = int(os.getenv("ASYNC_PER_HOST_LIMIT", "16"))
+
+# 压测模式：每个进程的工作线程数
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "64"))
+# 压测模式：登录用例每个密码预先加密的密文数（循环使用）
+LOAD_LOGIN_PAYLOADS = int(os.getenv("LOAD_LOGIN_PAYLOADS", "1000"))
+
+# 流式响应：读取块大小(字节) / 日志与报告保留的响应体字符数 / 每个流式列表保留的前几项
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "65536"))
+STREAM_LOG_LIMIT = int(os.getenv("STREAM_LOG_LIMIT", "4096"))
+STREAM_KEEP_ITEMS = int(os.getenv("STREAM_KEEP_ITEMS", "10"))
+
+# 日志(utils/log_utils.py)：文件 / 级别 / 格式 text 或 json / off 时在测试线程中同步写文件 /
+# 请求/响应体最多输出的字符数(0 不截断) / 列表最多输出的项数(0 不抽样) /
+# 是否同时传给根日志器(pytest 的日志捕获与 allure 的 log 附件依赖它)
+LOG_FILE = os.getenv("LOG_FILE", "./logs/pytest.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_ASYNC = os.getenv("LOG_ASYNC", "on") != "off"
+LOG_BODY_LIMIT = int(os.getenv("LOG_BODY_LIMIT", "4096"))
+LOG_LIST_SAMPLE = int(os.getenv("LOG_LIST_SAMPLE", "5"))
+LOG_PROPAGATE = os.getenv("LOG_PROPAGATE", "on") != "off"
+
+# HTTP 连接池：主机池数量 / 单主机连接数 / 单主机连接数覆盖(如 "api.example.com:64,localhost:8") / 池满时是否阻塞等待
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+HTTP_POOL_MAXSIZE_PER_HOST = os.getenv("HTTP_POOL_MAXSIZE_PER_HOST", "")
+HTTP_POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "false").lower() == "true"
+
+# HTTP 超时(秒)：用例 request 中的 timeout 优先
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+
+# HTTP 重试：次数 / 退避系数 / 需要重试的状态码，只重试幂等请求
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "0"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.3"))
+HTTP_RETRY_STATUS = os.getenv("HTTP_RETRY_STATUS", "502,503,504")
+
+# 是否启用 HTTP/2（需要安装 httpx[http2]，未安装时退回 HTTP/1.1）
+HTTP2 = os.getenv("HTTP2", "false").lower() == "true"
+
+# 登录角色表 / 令牌缓存(on/off，多个 xdist worker 与多次运行共享) / 缓存文件 /
+# 到期前多少秒刷新 / 令牌中没有 exp 时的有效期(秒)
+ROLES_FILE = os.getenv("ROLES_FILE", "config/roles.yaml")
+TOKEN_CACHE = os.getenv("TOKEN_CACHE", "on") != "off"
+TOKEN_CACHE_PATH = os.getenv("TOKEN_CACHE_PATH", ".cache/tokens.json")
+TOKEN_REFRESH_MARGIN = float(os.getenv("TOKEN_REFRESH_MARGIN", "60"))
+TOKEN_DEFAULT_TTL = float(os.getenv("TOKEN_DEFAULT_TTL", "1800"))
+
+# 录制/回放：off 关闭 / record 请求真实服务并录制 / replay 只用录制的响应，不访问网络
+# 录制目录 / 匹配时忽略的请求体与查询参数字段 / 参与匹配的请求头(默认不匹配请求头)，多个用逗号分隔
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off")
+CASSETTE_DIR = os.getenv("CASSETTE_DIR", "data/cassettes")
+CASSETTE_IGNORE = os.getenv("CASSETTE_IGNORE", "timestamp,Token,token,password,random")
+CASSETTE_MATCH_HEADERS = os.getenv("CASSETTE_MATCH_HEADERS", "")
+
+# 用例结果输出文件：.jsonl 或 .db/.sqlite，off 表示不输出（pytest --results 优先）
+RESULTS_FILE = os.getenv("RESULTS_FILE", "results/results.jsonl")
+
+# 用例耗时历史库(off 关闭)：xdist 调度按最近 HISTORY_WINDOW 次运行的中位耗时估算每个用例的开销
+# 每个用例保留的记录数 / xdist 调度方式：lpt 按历史耗时最长优先分配，default 使用 xdist 自带调度
+HISTORY_DB = os.getenv("HISTORY_DB", ".cache/history.db")
+HISTORY_WINDOW = int(os.getenv("HISTORY_WINDOW", "5"))
+HISTORY_KEEP = int(os.getenv("HISTORY_KEEP", "20"))
+XDIST_SCHEDULE = os.getenv("XDIST_SCHEDULE", "lpt")
+
+# 用例依赖调度(on/off)：按 extract/${extract:...} 建立依赖图，按拓扑顺序执行，同一条依赖链留在同一个 xdist worker
+CASE_DAG = os.getenv("CASE_DAG", "on") != "off"
+
+# 变更影响选择：用例索引扫描的目录(逗号分隔) / 不影响用例的文件(fnmatch 模式，逗号分隔) / 是否直接全量执行
+IMPACT_CASE_DIRS = os.getenv("IMPACT_CASE_DIRS", "data")
+IMPACT_IGNORE = os.getenv(
+    "IMPACT_IGNORE", "*.md,docs/*,benchmarks/*,ai_auto_testcases/*,.gitignore,LICENSE,logs/*,results/*,config/extract.yaml")
+IMPACT_FULL = os.getenv("IMPACT_FULL", "false").lower() == "true"
@@ -0,0 +1,204 @@
+"""
+用例依赖分析：extract 块产生变量，${extract:VAR} 使用变量，由此建立用例之间的依赖图(DAG)
+- 一个变量有多个生产者时，取用例顺序中位于消费者之前最近的一个（与串行执行的结果一致），之前没有时取之后的第一个
+- 登录 fixture 产生的 <角色>_token 视为内置变量
+- 报告没有生产者的变量与循环依赖；拓扑排序在满足依赖的前提下尽量保持原有顺序
+- 共享生产者：自身没有依赖、被多个用例使用的生产者(如登录)，各 worker 各执行一次即可，不与使用方绑定
+- 其余有依赖关系的用例组成一条链(连通分量)，链内按拓扑顺序串行，不同的链之间可以并行
+"""
+
+import heapq
+import re
+
+from common.auth import ROLE_FIXTURES
+
+_EXTRACT_REF = re.compile(r"\$\{extract:([^}]+)\}")
+
+
+def builtin_variables():
+    """登录 fixture 写入的变量"""
+    return {f"{role}_token" for role in ROLE_FIXTURES}
+
+
+def _refs(data, found):
+    if isinstance(data, str):
+        if "${extract:" in data:
+            found.update(_EXTRACT_REF.findall(data))
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            _refs(key, found)
+            _refs(value, found)
+    elif isinstance(data, list):
+        for value in data:
+            _refs(value, found)
+    return found
+
+
+def case_variables(case):
+    """:return: (产生的变量, 使用的变量)"""
+    steps = case.get("steps") or {}
+    produced = set((steps.get("extract") or {}).keys())
+    consumed = _refs({k: v for k, v in steps.items() if k != "extract"}, set())
+    return produced, consumed
+
+
+class DependencyGraph:
+    """
+    :param cases: [(用例标识, 用例数据)]，按原有执行顺序排列
+    :param builtins: 不需要生产者的变量，默认为登录 fixture 写入的变量
+    """
+
+    def __init__(self, cases, builtins=None):
+        self.names = [name for name, _ in cases]
+        builtins = builtin_variables() if builtins is None else set(builtins)
+        variables = [case_variables(case) for _, case in cases]
+        self.produces = [produced for produced, _ in variables]
+        self.consumes = [consumed for _, consumed in variables]
+
+        producers = {}
+        for index, produced in enumerate(self.produces):
+            for var in produced:
+                producers.setdefault(var, []).append(index)
+        self.producers = producers
+
+        # deps[i]: i 依赖的用例 -> 经由的变量
+        self.deps = [{} for _ in cases]
+        # 没有生产者的变量 -> 使用它的用例
+        self.missing = {}
+        for index, consumed in enumerate(self.consumes):
+            for var in sorted(consumed):
+                candidates = [p for p in producers.get(var, []) if p != index]
+                if not candidates:
+                    if var not in builtins and var not in self.produces[index]:
+                        self.missing.setdefault(var, []).append(index)
+                    continue
+                before = [p for p in candidates if p < index]
+                producer = before[-1] if before else candidates[0]
+                self.deps[index].setdefault(producer, []).append(var)
+
+        # dependents[i]: 依赖 i 的用例
+        self.dependents = [[] for _ in cases]
+        for index, deps in enumerate(self.deps):
+            for dep in deps:
+                self.dependents[dep].append(index)
+        self.shared = {index for index, dependents in enumerate(self.dependents)
+                       if len(dependents) > 1 and not self.deps[index]}
+
+        self.order, self.cycles = self._toposort()
+        self.components = self._components()
+
+    def _toposort(self):
+        """Kahn 算法，入度为 0 的用例中原有顺序靠前的先出；剩下的用例构成循环依赖，按原有顺序追加"""
+        count = len(self.names)
+        indegree = [len(d) for d in self.deps]
+        dependents = self.dependents
+        ready = [i for i in range(count) if not indegree[i]]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            index = heapq.heappop(ready)
+            order.append(index)
+            for dependent in dependents[index]:
+                indegree[dependent] -= 1
+                if not indegree[dependent]:
+                    heapq.heappush(ready, dependent)
+        placed = set(order)
+        remaining = [i for i in range(count) if i not in placed]
+        order.extend(remaining)
+        return order, self._find_cycles(remaining)
+
+    def _find_cycles(self, nodes):
+        """在未能排序的用例中找出各个强连通分量(Tarjan)，即循环依赖的用例组"""
+        nodes = set(nodes)
+        index_of, low, stack, on_stack, cycles = {}, {}, [], set(), []
+
+        def visit(start):
+            # 迭代实现，避免长链递归过深
+            work = [(start, iter(self.deps[start]))]
+            index_of[start] = low[start] = len(index_of)
+            stack.append(start)
+            on_stack.add(start)
+            while work:
+                node, edges = work[-1]
+                for dep in edges:
+                    if dep not in nodes:
+                        continue
+                    if dep not in index_of:
+                        index_of[dep] = low[dep] = len(index_of)
+                        stack.append(dep)
+                        on_stack.add(dep)
+                        work.append((dep, iter(self.deps[dep])))
+                        break
+                    if dep in on_stack:
+                        low[node] = min(low[node], index_of[dep])
+                else:
+                    work.pop()
+                    if work:
+                        low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                    if low[node] == index_of[node]:
+                        members = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            members.append(member)
+                            if member == node:
+                                break
+                        if len(members) > 1:
+                            cycles.append(sorted(members))
+
+        for node in sorted(nodes):
+            if node not in index_of:
+                visit(node)
+        return sorted(cycles)
+
+    def _components(self):
+        """
+        有依赖关系的用例组成的链(弱连通分量)，每条链按拓扑顺序排列；没有任何依赖的用例不在其中
+        指向共享生产者的依赖不连接成链，否则所有使用登录变量的用例会连成一条链
+        """
+        parent = list(range(len(self.names)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for index, deps in enumerate(self.deps):
+            for dep in deps:
+                if dep not in self.shared:
+                    parent[find(index)] = find(dep)
+        chains = {}
+        for index in self.order:
+            chains.setdefault(find(index), []).append(index)
+        return [chain for chain in chains.values() if len(chain) > 1]
+
+    def dependencies(self):
+        """
+        :return: {用例序号: [拓扑顺序中位于其前的依赖]}，按拓扑顺序排列；
+                 循环依赖中指向后面的边被忽略，按此等待不会死锁
+        """
+        position = {index: pos for pos, index in enumerate(self.order)}
+        return {index: [dep for dep in self.deps[index] if position[dep] < position[index]]
+                for index in self.order}
+
+    def format_report(self):
+        """按生产者列出实际的依赖边，同一条链中互不依赖的用例不会显示为先后关系"""
+        lines = [f"用例依赖：{len(self.names)} 个用例，{sum(len(d) for d in self.deps)} 条依赖，"
+                 f"{len(self.shared)} 个共享生产者（各 worker 各执行一次），"
+                 f"{len(self.components)} 条依赖链（链内串行，链之间与其余用例并行）"]
+        edges = {}
+        for index in self.order:
+            for dep, variables in self.deps[index].items():
+                edges.setdefault(dep, []).append((index, variables))
+        for dep in self.order:
+            if dep not in edges:
+                continue
+            label = "（共享）" if dep in self.shared else ""
+            consumers = "，".join(f"{self.names[i]}[{', '.join(v)}]" for i, v in edges[dep])
+            lines.append(f"  {self.names[dep]}{label} -> {consumers}")
+        for var, consumers in sorted(self.missing.items()):
+            lines.append(f"  ⚠ 变量 {var} 没有生产者，使用方：" + "，".join(self.names[i] for i in consumers))
+        for cycle in self.cycles:
+            lines.append("  ⚠ 循环依赖：" + "，".join(self.names[i] for i in cycle))
+        return "\n".join(lines)
@@ -0,0 +1,121 @@
+"""
+pytest 插件：按用例之间的变量依赖(common/dependency.py)调整用例的执行顺序
+（YAML 用例与 testcases/ 下以用例数据参数化的测试项，其他测试项位置不变）
+- 用例按拓扑顺序排列，生产者总在消费者之前执行
+- 每条依赖链标记为同一个 xdist_group，-n 时自动改用 --dist loadgroup，链内在同一个 worker 上串行，链之间并行
+- 共享生产者(如登录，见 common/dependency.py)不与使用方分组：xdist worker 在第一个使用方之前
+  不上报地执行一次，变量写入本 worker 的变量存储；它自身仍按正常调度执行并上报
+- 收集结束时报告依赖链、没有生产者的变量、循环依赖，以及被 -k/-m 筛掉的生产者
+"""
+
+import pytest
+from _pytest.runner import runtestprotocol
+
+from common.config import CASE_DAG
+from common.dependency import DependencyGraph
+
+_GRAPH = pytest.StashKey()
+# xdist worker 中：{测试项: [需先在本 worker 执行的共享生产者]} / 本 worker 已执行过的测试项
+_SHARED_DEPS = pytest.StashKey()
+_RAN = pytest.StashKey()
+
+
+def item_case(item):
+    """测试项对应的用例数据：YAML 用例取 item.case，参数化包装取参数中的用例，都没有时为 None"""
+    case = getattr(item, "case", None)
+    if case is not None:
+        return case
+    callspec = getattr(item, "callspec", None)
+    for value in (callspec.params.values() if callspec else ()):
+        if isinstance(value, dict) and "steps" in value:
+            return value
+    return None
+
+
+def pytest_addoption(parser):
+    parser.addoption("--dag", action="store", default="on" if CASE_DAG else "off", choices=["on", "off"],
+                     help="是否按用例变量依赖调整执行顺序并把依赖链分到同一个 xdist worker，默认 on")
+
+
+def pytest_configure(config):
+    if config.getoption("--dag") != "on":
+        return
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is None:
+        # -n 默认的 --dist load 不识别 xdist_group，改为 loadgroup
+        if getattr(config.option, "dist", "no") == "load":
+            config.option.dist = "loadgroup"
+    elif workerinput.get("dist") == "loadgroup":
+        # worker 按命令行重新解析参数，需由主进程告知分组方式
+        config.option.loadgroup = True
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput["dist"] = node.config.option.dist
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    # 需在 xdist 按 xdist_group 改写 nodeid 之前执行
+    if config.getoption("--dag") != "on":
+        return
+    slots = [i for i, item in enumerate(items) if item_case(item) is not None]
+    if not slots:
+        return
+    cases = [items[i] for i in slots]
+    graph = DependencyGraph([(item.reportinfo()[2], item_case(item)) for item in cases])
+    # 只在用例原来占的位置之间调整顺序，其他测试项位置不变
+    for slot, index in zip(slots, graph.order):
+        items[slot] = cases[index]
+    for number, chain in enumerate(graph.components, 1):
+        for index in chain:
+            cases[index].add_marker(pytest.mark.xdist_group(f"dag-{number}"))
+    config.stash[_GRAPH] = (graph, cases)
+
+
+def pytest_collection_finish(session):
+    config = session.config
+    graph, cases = config.stash.get(_GRAPH, (None, None))
+    if graph is None or not graph.shared or not hasattr(config, "workerinput"):
+        return
+    # 在 -k/-m/变更影响筛选之后计算，未选中的生产者不执行
+    selected = set(session.items)
+    shared_deps = {}
+    for index, case in enumerate(cases):
+        producers = [cases[dep] for dep in graph.deps[index] if dep in graph.shared and cases[dep] in selected]
+        if producers and case in selected:
+            shared_deps[case] = producers
+    config.stash[_SHARED_DEPS] = shared_deps
+    config.stash[_RAN] = set()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_protocol(item, nextitem):
+    shared_deps = item.config.stash.get(_SHARED_DEPS, None)
+    if shared_deps is None:
+        return None
+    ran = item.config.stash[_RAN]
+    for producer in shared_deps.get(item, ()):
+        if producer not in ran:
+            # 不上报结果，只为在本 worker 写入变量；生产者失败时使用方按串行执行时的情况失败
+            ran.add(producer)
+            runtestprotocol(producer, log=False, nextitem=item)
+    ran.add(item)
+    return None
+
+
+def pytest_report_collectionfinish(config, items):
+    graph, cases = config.stash.get(_GRAPH, (None, None))
+    if graph is None or not (graph.components or graph.shared or graph.missing or graph.cycles):
+        return None
+    lines = graph.format_report().splitlines()
+    selected = set(items)
+    for index, case in enumerate(cases):
+        if case not in selected:
+            continue
+        for dep, variables in graph.deps[index].items():
+            if cases[dep] not in selected:
+                lines.append(f"  ⚠ {graph.names[index]} 使用的变量 {', '.join(variables)} "
+                             f"由未选中的用例 {graph.names[dep]} 产生")
+    return lines
@@ -0,0 +1,95 @@
+"""
+用例耗时历史库(SQLite)：每次运行结束后记录每个用例的耗时与结果，按 YAML 文件 + 用例键(即不含 xdist 分组后缀的 nodeid)索引，
+供 xdist 调度估算用例开销(common/scheduler.py)；另记每次 xdist 运行的预测与实际总耗时(makespan)
+"""
+
+import os
+import sqlite3
+import statistics
+import time
+
+from common.config import HISTORY_WINDOW, HISTORY_KEEP
+
+# 没有任何历史时每个用例的估算耗时(秒)
+DEFAULT_ESTIMATE = 0.1
+
+
+def case_key(nodeid):
+    """
+    nodeid -> (文件, 用例键)，去掉 --dist loadgroup 追加的 @分组 后缀
+    data/ai_testcases/admin/test_x.yml::case@admin -> ("data/ai_testcases/admin/test_x.yml", "case")
+    """
+    nodeid = nodeid.split("@", 1)[0]
+    file, _, case = nodeid.partition("::")
+    return file, case
+
+
+class RunHistory:
+    """
+    :param path: 历史库文件
+    :param window: 估算耗时时取最近几次运行
+    :param keep: 每个用例最多保留的记录数
+    """
+
+    def __init__(self, path, window=HISTORY_WINDOW, keep=HISTORY_KEEP):
+        self.path = path
+        self.window = window
+        self.keep = keep
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS durations (id INTEGER PRIMARY KEY, file TEXT NOT NULL, case_key TEXT NOT NULL, "
+            "status TEXT, duration REAL NOT NULL, run_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS durations_case ON durations (file, case_key, id);"
+            "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, run_at REAL NOT NULL, workers INTEGER, "
+            "cases INTEGER, predicted REAL, actual REAL);")
+
+    def add_run(self, durations, statuses=None):
+        """
+        写入一次运行中各用例的耗时，并清理超出 keep 的旧记录
+        :param durations: {nodeid: 秒}
+        :param statuses: {nodeid: passed/failed/skipped/error}
+        """
+        statuses = statuses or {}
+        now = time.time()
+        rows = [(*case_key(nodeid), statuses.get(nodeid), duration, now) for nodeid, duration in durations.items()]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO durations (file, case_key, status, duration, run_at) VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.executemany(
+                "DELETE FROM durations WHERE file = ? AND case_key = ? AND id NOT IN "
+                "(SELECT id FROM durations WHERE file = ? AND case_key = ? ORDER BY id DESC LIMIT ?)",
+                [(file, case, file, case, self.keep) for file, case, *_ in rows])
+
+    def add_makespan(self, workers, cases, predicted, actual):
+        with self._conn:
+            self._conn.execute("INSERT INTO runs (run_at, workers, cases, predicted, actual) VALUES (?, ?, ?, ?, ?)",
+                               (time.time(), workers, cases, predicted, actual))
+
+    def estimates(self, nodeids):
+        """
+        :return: {nodeid: 估算耗时(秒)}，取最近 window 次记录的中位数；
+                 没有历史的用例取已知用例估算的中位数，全部没有历史时为 DEFAULT_ESTIMATE
+        """
+        recent = {}
+        rows = self._conn.execute(
+            "SELECT file, case_key, duration FROM (SELECT file, case_key, duration, "
+            "ROW_NUMBER() OVER (PARTITION BY file, case_key ORDER BY id DESC) AS n FROM durations) WHERE n <= ?",
+            (self.window,))
+        for file, case, duration in rows:
+            recent.setdefault((file, case), []).append(duration)
+        known = {nodeid: statistics.median(recent[case_key(nodeid)])
+                 for nodeid in nodeids if case_key(nodeid) in recent}
+        fallback = statistics.median(known.values()) if known else DEFAULT_ESTIMATE
+        return {nodeid: known.get(nodeid, fallback) for nodeid in nodeids}
+
+    def recent_runs(self, limit=10):
+        """:return: 最近的 xdist 运行 [(run_at, workers, cases, predicted, actual)]，新的在前"""
+        return self._conn.execute(
+            "SELECT run_at, workers, cases, predicted, actual FROM runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+
+    def close(self):
+        self._conn.close()
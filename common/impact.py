@@ -0,0 +1,265 @@
+"""
+变更影响选择：只执行受本次改动影响的用例
+- 索引：接口(请求方法 + 路径) -> 调用它的用例，由 data 下的 YAML 用例的 request 建立
+- 改动来源：git diff（YAML 用例按用例粒度比较；Swagger 文档文件按接口比较）和/或新旧两份 Swagger 文档
+- 选中：改动或新增的用例 + 调用了改动接口的用例 + 它们通过 ${extract:} 依赖的生产者(递归)
+- 无法判断影响范围的改动（框架代码、配置等）退回全量执行
+用例以内容指纹标识，YAML 用例与 testcases/ 下参数化包装的用例都能匹配
+"""
+
+import fnmatch
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import subprocess
+from contextlib import redirect_stdout
+from urllib.parse import urlsplit
+
+import yaml
+
+from common.config import IMPACT_CASE_DIRS, IMPACT_IGNORE
+from common.dependency import DependencyGraph, case_variables
+
+_PLACEHOLDER = re.compile(r"\$\{[^}]+\}")
+_TEMPLATE_PARAM = re.compile(r"\\\{[^/]+?\\\}")
+
+
+def case_fingerprint(case):
+    return hashlib.sha1(json.dumps(case, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def is_case_map(data):
+    """YAML 内容是否为用例文件：{用例名: {steps: ...}}"""
+    return isinstance(data, dict) and any(isinstance(case, dict) and "steps" in case for case in data.values())
+
+
+def case_endpoint(case):
+    """:return: (请求方法, 路径)，路径中的 ${...} 保留原样；request 不完整时为 None"""
+    request = (case.get("steps") or {}).get("request") or {}
+    method, url = request.get("method"), request.get("url")
+    if not method or not isinstance(url, str):
+        return None
+    return str(method).upper(), urlsplit(url).path or "/"
+
+
+def _path_pattern(template):
+    """Swagger 路径模板 -> 正则：{id} 匹配一段路径，用例中的 ${...} 视为任意值"""
+    return re.compile("^" + _TEMPLATE_PARAM.sub("[^/]+", re.escape(template)) + "/?$")
+
+
+class CaseIndex:
+    """
+    用例索引
+    :param dirs: 扫描的目录，递归读取其中的 *.yml / *.yaml 用例文件
+    """
+
+    def __init__(self, dirs=None):
+        from utils.data_utils import read_yaml
+
+        dirs = dirs or IMPACT_CASE_DIRS.split(",")
+        files = sorted({path for d in dirs for ext in ("yml", "yaml")
+                        for path in glob.glob(os.path.join(d, "**", f"*.{ext}"), recursive=True)})
+        # [(文件, 用例名, 用例数据)]
+        self.cases = []
+        for path in files:
+            try:
+                data = read_yaml(path)
+            except yaml.YAMLError:
+                continue
+            if is_case_map(data):
+                path = path.replace(os.sep, "/")
+                self.cases.extend((path, name, case) for name, case in data.items()
+                                  if isinstance(case, dict) and "steps" in case)
+        self.names = [f"{path}::{name}" for path, name, _ in self.cases]
+        self.fingerprints = [case_fingerprint(case) for _, _, case in self.cases]
+        # (请求方法, 路径) -> [用例序号]
+        self.endpoints = {}
+        for index, (_, _, case) in enumerate(self.cases):
+            endpoint = case_endpoint(case)
+            if endpoint:
+                self.endpoints.setdefault(endpoint, []).append(index)
+        self.graph = DependencyGraph([(name, case) for name, (_, _, case) in zip(self.names, self.cases)])
+
+    def cases_for(self, method, template):
+        """调用 Swagger 接口 method + template 的用例序号"""
+        pattern = _path_pattern(template)
+        found = []
+        for (case_method, path), indices in self.endpoints.items():
+            if case_method == method.upper() and pattern.match(_PLACEHOLDER.sub("0", path)):
+                found.extend(indices)
+        return found
+
+    def with_producers(self, indices):
+        """加上递归依赖的生产者"""
+        selected = set(indices)
+        pending = list(selected)
+        while pending:
+            for dep in self.graph.deps[pending.pop()]:
+                if dep not in selected:
+                    selected.add(dep)
+                    pending.append(dep)
+        return selected
+
+    def as_dict(self):
+        """{"METHOD path": [用例]}，用于查看索引"""
+        return {f"{method} {path}": [self.names[i] for i in indices]
+                for (method, path), indices in sorted(self.endpoints.items())}
+
+
+def spec_endpoints(doc):
+    """:return: {(请求方法, 路径模板): 接口文档摘要}，解析方式与生成用例时一致(parse_swagger_paths)"""
+    from utils.swagger_utils import parse_swagger_paths
+
+    with redirect_stdout(io.StringIO()):
+        apis = parse_swagger_paths(doc)
+    return {(api["api_doc"]["请求方法"], api["api_doc"]["接口地址"]): case_fingerprint(api["api_doc"]) for api in apis}
+
+
+def spec_changes(old_doc, new_doc):
+    """:return: {(请求方法, 路径模板): added / changed / removed}"""
+    old, new = spec_endpoints(old_doc or {}), spec_endpoints(new_doc or {})
+    changes = {key: "added" for key in new.keys() - old.keys()}
+    changes.update({key: "removed" for key in old.keys() - new.keys()})
+    changes.update({key: "changed" for key in old.keys() & new.keys() if old[key] != new[key]})
+    return changes
+
+
+def _is_spec(data):
+    return isinstance(data, dict) and "paths" in data and ("openapi" in data or "swagger" in data)
+
+
+def _git(*args):
+    result = subprocess.run(["git", *args], capture_output=True, text=True, encoding="utf-8")
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip() or f"git {' '.join(args)} 失败")
+    return result.stdout
+
+
+def _load_revision(base, path):
+    """文件在 base 版本中的内容(已解析)，不存在时为 None"""
+    try:
+        text = _git("show", f"{base}:./{path}")
+    except RuntimeError:
+        return None
+    if path.endswith(".json"):
+        return json.loads(text)
+    return yaml.load(text, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def _load_current(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        return yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+class Selection:
+    """
+    选择结果
+    :param full: 是否全量执行
+    :param fingerprints: 选中用例的内容指纹
+    """
+
+    def __init__(self):
+        self.full = False
+        self.reasons = []
+        self.fingerprints = set()
+        self.names = []
+        self.changed_cases = []
+        self.endpoints = {}
+        self.uncovered = []
+
+    def fall_back(self, reason):
+        self.full = True
+        self.reasons.append(reason)
+
+    def format(self):
+        if self.full:
+            return "影响分析：全量执行（" + "；".join(self.reasons) + "）"
+        lines = [f"影响分析：选中 {len(self.names)} 个用例（改动的用例 {len(self.changed_cases)} 个，"
+                 f"改动的接口 {len(self.endpoints)} 个，含依赖的生产者）"]
+        lines.extend(f"  接口 {method} {path}：{status}" for (method, path), status in sorted(self.endpoints.items()))
+        lines.extend(f"  ⚠ 接口 {method} {path} 没有用例覆盖" for method, path in self.uncovered)
+        return "\n".join(lines)
+
+
+def select_cases(index=None, base=None, spec_old=None, spec_new=None, full=False, ignore=IMPACT_IGNORE):
+    """
+    :param base: git 基准版本，与工作区比较（含未提交与未跟踪的文件）
+    :param spec_old: 旧 Swagger 文档(dict)
+    :param spec_new: 新 Swagger 文档(dict)
+    :param full: 直接全量执行
+    :param ignore: 不影响用例的文件(fnmatch 模式，逗号分隔)
+    :return: Selection
+    """
+    selection = Selection()
+    if full:
+        selection.fall_back("按要求全量执行")
+        return selection
+    index = index or CaseIndex()
+    # 改动用例的指纹 -> 用例数据
+    changed = {}
+    endpoints = {}
+
+    if base:
+        try:
+            files = _git("diff", "--name-only", "--relative", base).split()
+            files += _git("ls-files", "--others", "--exclude-standard").split()
+        except (RuntimeError, OSError) as e:
+            selection.fall_back(f"无法获取 git 改动：{str(e).splitlines()[0]}")
+            return selection
+        patterns = [p.strip() for p in ignore.split(",") if p.strip()]
+        unknown = []
+        for path in sorted(set(files)):
+            if any(fnmatch.fnmatch(path, p) for p in patterns):
+                continue
+            if not path.endswith((".yml", ".yaml", ".json")):
+                unknown.append(path)
+                continue
+            try:
+                old, new = _load_revision(base, path), _load_current(path)
+            except (ValueError, yaml.YAMLError):
+                unknown.append(path)
+                continue
+            if is_case_map(old) or is_case_map(new):
+                old_cases = old if is_case_map(old) else {}
+                for name, case in (new if is_case_map(new) else {}).items():
+                    if isinstance(case, dict) and "steps" in case and old_cases.get(name) != case:
+                        changed[case_fingerprint(case)] = case
+                        selection.changed_cases.append(f"{path}::{name}")
+            elif _is_spec(old) or _is_spec(new):
+                endpoints.update(spec_changes(old, new))
+            else:
+                unknown.append(path)
+        if unknown:
+            more = f" 等 {len(unknown)} 个文件" if len(unknown) > 3 else ""
+            selection.fall_back(f"{', '.join(unknown[:3])}{more}的改动无法判断影响范围")
+            return selection
+
+    if spec_old is not None or spec_new is not None:
+        endpoints.update(spec_changes(spec_old, spec_new))
+
+    selected = [i for i, fingerprint in enumerate(index.fingerprints) if fingerprint in changed]
+    for (method, path), status in endpoints.items():
+        found = index.cases_for(method, path)
+        if not found and status != "removed":
+            selection.uncovered.append((method, path))
+        selected.extend(found)
+    # 不在索引目录中的改动用例(如其他目录下的参数化数据)按指纹直接选中，生产者取索引中最后一个
+    extra = changed.keys() - set(index.fingerprints)
+    for fingerprint in extra:
+        for var in case_variables(changed[fingerprint])[1]:
+            if var in index.graph.producers:
+                selected.append(index.graph.producers[var][-1])
+    selected = index.with_producers(selected)
+
+    selection.endpoints = endpoints
+    selection.names = [index.names[i] for i in sorted(selected)] + sorted(
+        name for name in selection.changed_cases if name not in index.names)
+    selection.fingerprints = {index.fingerprints[i] for i in selected} | extra
+    return selection
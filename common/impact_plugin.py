@@ -0,0 +1,93 @@
+"""
+pytest 插件：按改动只执行受影响的用例(common/impact.py)
+    pytest --impact-base origin/main                          # 与 git 基准版本比较
+    pytest --impact-spec-old old.json --impact-spec-new URL   # 比较新旧两份 Swagger 文档
+    pytest --impact-base origin/main --impact-full            # 退回全量执行（也可设置 IMPACT_FULL=true）
+未指定 --impact-base / --impact-spec-old 时不做选择；无法关联到用例的测试项始终保留
+"""
+
+import pytest
+
+from common.config import IMPACT_FULL
+from common.dependency_plugin import item_case
+
+_SELECTION = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("impact", "变更影响选择")
+    group.addoption("--impact-base", action="store", default=None,
+                    help="git 基准版本(如 origin/main)，只执行与之相比改动的用例、接口及其依赖")
+    group.addoption("--impact-spec-old", action="store", default=None,
+                    help="旧 Swagger 文档(URL/文件/目录)，与 --impact-spec-new 比较得出改动的接口")
+    group.addoption("--impact-spec-new", action="store", default=None,
+                    help="新 Swagger 文档，需与 --impact-spec-old 一起使用，默认 SWAGGER_URL")
+    group.addoption("--impact-full", action="store_true", default=IMPACT_FULL,
+                    help="忽略影响分析，全量执行")
+
+
+def _load_spec(source):
+    from utils.swagger_utils import fetch_swagger_doc, SWAGGER_URL
+
+    return fetch_swagger_doc(source or SWAGGER_URL)
+
+
+def pytest_configure(config):
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None:
+        # xdist worker 使用主进程的分析结果，保证各 worker 收集到相同的测试项
+        if workerinput.get("impact") is not None:
+            config.stash[_SELECTION] = set(workerinput["impact"])
+        return
+    base = config.getoption("--impact-base")
+    spec_old = config.getoption("--impact-spec-old")
+    if config.getoption("--impact-spec-new") and not spec_old:
+        raise pytest.UsageError("--impact-spec-new 需要与 --impact-spec-old 一起使用")
+    if not base and not spec_old:
+        return
+    from common.impact import select_cases
+
+    selection = select_cases(
+        base=base,
+        spec_old=_load_spec(spec_old) if spec_old else None,
+        spec_new=_load_spec(config.getoption("--impact-spec-new")) if spec_old else None,
+        full=config.getoption("--impact-full"))
+    config._impact_selection = selection
+    if not selection.full:
+        config.stash[_SELECTION] = selection.fingerprints
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    fingerprints = node.config.stash.get(_SELECTION, None)
+    node.workerinput["impact"] = sorted(fingerprints) if fingerprints is not None else None
+
+
+def pytest_report_header(config):
+    selection = getattr(config, "_impact_selection", None)
+    return selection.format().splitlines() if selection is not None else None
+
+
+def pytest_collection_modifyitems(config, items):
+    fingerprints = config.stash.get(_SELECTION, None)
+    if fingerprints is None:
+        return
+    from common.impact import case_fingerprint
+
+    selected, deselected = [], []
+    for item in items:
+        case = item_case(item)
+        if case is None or case_fingerprint(case) in fingerprints:
+            selected.append(item)
+        else:
+            deselected.append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session, exitstatus):
+    # 改动不影响任何用例时不算失败
+    if session.config.stash.get(_SELECTION, None) is not None and exitstatus == pytest.ExitCode.NO_TESTS_COLLECTED:
+        session.exitstatus = pytest.ExitCode.OK
@@ -0,0 +1,328 @@
+"""
+压测模式：按目标 RPS 回放 data/ai_testcases 中的 YAML 用例
+
+- open：开环，请求按固定间隔排期，与响应快慢无关；耗时从计划发送时刻算起，
+        工作线程不足导致的排队也计入耗时（避免协调遗漏）
+- closed：闭环，每个工作线程收到响应后立即发送下一个请求，指定 rate 时按 rate 限速
+每个接口一个 LatencyHistogram；状态码每次都校验，ResponseChecker 的完整断言按 check_rate 抽样执行
+"""
+
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from common.api_utils import ApiRunner
+from common.async_runner import load_cases, open_sessions, close_sessions
+from common.config import LOAD_WORKERS, LOAD_LOGIN_PAYLOADS
+from utils.histogram import LatencyHistogram
+
+logger = logging.getLogger("Hsyuan")
+
+_DURATION = re.compile(r'^(\d+(?:\.\d+)?)(ms|s|m|h)?$')
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}
+
+
+def parse_duration(text):
+    """"90" / "30s" / "5m" / "1h" -> 秒"""
+    m = _DURATION.match(str(text).strip())
+    if not m:
+        raise ValueError(f"无法识别的时长: {text}")
+    return float(m.group(1)) * _UNITS[m.group(2)]
+
+
+def parse_mix(text):
+    """"admin:3,user:7" -> {"admin": 3.0, "user": 7.0}，角色 none 表示不登录"""
+    mix = {}
+    for item in filter(None, (s.strip() for s in (text or "").split(","))):
+        role, _, weight = item.partition(":")
+        mix[None if role == "none" else role] = float(weight or 1)
+    return mix
+
+
+class EndpointStats:
+    """单个接口的压测统计"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        # {错误类型: 次数}：request 请求失败 / exception 用例执行异常 / status 状态码不符 / assert 抽样断言失败
+        self.errors = {}
+
+    def add_error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    @property
+    def error_count(self):
+        return sum(self.errors.values())
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.requests += other.requests
+        for kind, count in other.errors.items():
+            self.errors[kind] = self.errors.get(kind, 0) + count
+        return self
+
+    def to_dict(self):
+        return {"histogram": self.histogram.to_dict(), "requests": self.requests, "errors": self.errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.histogram = LatencyHistogram.from_dict(data["histogram"])
+        stats.requests = data["requests"]
+        stats.errors = dict(data["errors"])
+        return stats
+
+
+class LoadRunner:
+    """
+    单进程压测：多个工作线程从同一个序号计数器领取请求
+    :param cases: [(用例名, 用例数据, 角色)]
+    :param mix: {角色: 权重}，为空时按各角色用例数加权
+    """
+
+    def __init__(self, cases, rate=None, duration=60, mix=None, mode="open", workers=LOAD_WORKERS,
+                 check_rate=1.0, seed=None, login_payloads=LOAD_LOGIN_PAYLOADS):
+        if mode == "open" and not rate:
+            raise ValueError("开环模式必须指定 rate")
+        self.rate = rate
+        self.duration = duration
+        self.mode = mode
+        self.workers = workers
+        self.check_rate = check_rate
+        self.seed = seed
+
+        by_role = {}
+        for name, data, role in cases:
+            by_role.setdefault(role, []).append((name, data))
+        mix = mix or {role: len(items) for role, items in by_role.items()}
+        missing = [role or "none" for role in mix if role not in by_role]
+        if missing:
+            raise ValueError(f"没有角色 {', '.join(missing)} 的用例")
+        self.roles = [role for role in mix if mix[role] > 0]
+        self.weights = [mix[role] for role in self.roles]
+        self.cases = by_role
+
+        # 登录用例的密码密文池：{明文密码: deque[密文]}，压测前批量预加密，每个密文只用一次
+        self.login_payloads = login_payloads
+        self._ciphers = {}
+
+        self.sessions = {}
+        self._next = 0
+        self._lock = threading.Lock()
+        self._start = 0.0
+
+    def _ticket(self):
+        """开环模式：领取下一个请求的计划发送时刻，超出时长返回 None"""
+        with self._lock:
+            n = self._next
+            self._next += 1
+        scheduled = self._start + n / self.rate
+        return scheduled if scheduled < self._start + self.duration else None
+
+    @staticmethod
+    def _login_password(data):
+        request = data["steps"].get("request") or {}
+        body = request.get("json")
+        if request.get("url") == "/login" and isinstance(body, dict) and body.get("password"):
+            return str(body["password"])
+        return None
+
+    def _prepare_logins(self):
+        """
+        /login 用例中的明文密码在压测开始前批量加密，压测中每个密文只用一次，
+        重放同一密文会被服务端的防重放校验(random/timestamp)拒绝；用完后改为请求时现场加密
+        """
+        from common.config import PUBLIC_KEY
+        from utils.rsa_utils import batch_encrypt_passwords
+
+        count = self.login_payloads
+        if self.rate:
+            # 不会超过整个压测期间的请求总数，避免多余的加密
+            count = min(count, math.ceil(self.rate * self.duration))
+        passwords = {self._login_password(data) for items in self.cases.values() for _, data in items}
+        passwords.discard(None)
+        for password in passwords:
+            self._ciphers[password] = deque(batch_encrypt_passwords(password, PUBLIC_KEY, count))
+
+    def _login_cipher(self, password):
+        """取一个未用过的预加密密文，密文池耗尽时现场加密"""
+        from common.config import PUBLIC_KEY
+        from utils.rsa_utils import encrypt_password
+
+        try:
+            return self._ciphers[password].popleft()
+        except (KeyError, IndexError):
+            return encrypt_password(password, PUBLIC_KEY)
+
+    @staticmethod
+    def _endpoint_stats(stats, endpoint):
+        endpoint_stats = stats.get(endpoint)
+        if endpoint_stats is None:
+            endpoint_stats = stats[endpoint] = EndpointStats()
+        endpoint_stats.requests += 1
+        return endpoint_stats
+
+    def _send(self, rng, stats):
+        role = rng.choices(self.roles, self.weights)[0]
+        name, data = rng.choice(self.cases[role])
+        # 还没解析出请求参数就出错时，按用例中原始的请求方法与地址计入
+        raw_request = (data.get("steps") or {}).get("request") or {}
+        endpoint = f'{raw_request.get("method", "GET")} {raw_request.get("url", "")}'
+        endpoint_stats = None
+        try:
+            runner = ApiRunner(data, self.sessions[role])
+            request = runner.steps.get("request") or {}
+            kwargs, _ = runner.request_kwargs(request)
+            password = self._login_password(data)
+            if password is not None and self.login_payloads:
+                kwargs = dict(kwargs, json=dict(kwargs["json"], password=self._login_cipher(password),
+                                                timestamp=int(time.time() * 1000)))
+            endpoint = f'{kwargs.get("method", "GET")} {kwargs.get("url", "")}'
+            endpoint_stats = self._endpoint_stats(stats, endpoint)
+
+            runner.resp = runner.send_request(**kwargs)
+            if runner.resp is None:
+                endpoint_stats.add_error("request")
+                return endpoint_stats
+
+            expected = runner.steps.get("expected")
+            if expected and "status_code" in expected and runner.resp.status_code != expected["status_code"]:
+                endpoint_stats.add_error("status")
+                runner.discard_body()
+            elif expected and self.check_rate and rng.random() < self.check_rate:
+                runner.prepare_body(request)
+                try:
+                    runner.check_response(expected)
+                except AssertionError:
+                    endpoint_stats.add_error("assert")
+            else:
+                runner.discard_body()
+        except Exception as e:
+            # 占位符解析、上传文件不存在、响应格式异常等用例自身问题，计入错误后继续压测，工作线程不会因此退出
+            logger.warning(f"{endpoint} 用例 {name} 执行异常: {type(e).__name__}: {e}")
+            if endpoint_stats is None:
+                endpoint_stats = self._endpoint_stats(stats, endpoint)
+            endpoint_stats.add_error("exception")
+        return endpoint_stats
+
+    def _worker(self, index, results):
+        rng = random.Random(None if self.seed is None else self.seed * 1000 + index)
+        stats = {}
+        per_worker_interval = None
+        if self.mode == "closed" and self.rate:
+            per_worker_interval = self.workers / self.rate
+        next_at = self._start
+        while True:
+            if self.mode == "open":
+                scheduled = self._ticket()
+                if scheduled is None:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                if per_worker_interval:
+                    delay = next_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_at += per_worker_interval
+                scheduled = time.perf_counter()
+                if scheduled >= self._start + self.duration:
+                    break
+            endpoint_stats = self._send(rng, stats)
+            endpoint_stats.histogram.record((time.perf_counter() - scheduled) * 1000)
+        results[index] = stats
+
+    def run(self):
+        """
+        执行压测
+        :return: ({接口: EndpointStats}, 实际耗时秒)
+        """
+        if self.login_payloads:
+            self._prepare_logins()
+        self.sessions = open_sessions(self.roles, self.workers, auto_refresh=True)
+        results = [None] * self.workers
+        threads = [threading.Thread(target=self._worker, args=(i, results), name=f"load-{i}", daemon=True)
+                   for i in range(self.workers)]
+        self._start = time.perf_counter()
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            elapsed = time.perf_counter() - self._start
+            close_sessions(self.sessions)
+
+        merged = {}
+        for stats in filter(None, results):
+            for endpoint, endpoint_stats in stats.items():
+                merged.setdefault(endpoint, EndpointStats()).merge(endpoint_stats)
+        return merged, elapsed
+
+
+def _run_process(test_dirs, options):
+    """子进程入口：各自登录、各自压测，返回可序列化的统计结果"""
+    runner = LoadRunner(load_cases(test_dirs), **options)
+    stats, elapsed = runner.run()
+    return {endpoint: s.to_dict() for endpoint, s in stats.items()}, elapsed
+
+
+def run_load(test_dirs, rate=None, duration=60, mix=None, mode="open", workers=LOAD_WORKERS,
+             processes=1, check_rate=1.0, seed=None, login_payloads=LOAD_LOGIN_PAYLOADS):
+    """
+    压测入口
+    :param processes: 进程数，大于 1 时 rate 均分到各进程，每个进程 workers 个线程
+    :return: ({接口: EndpointStats}, 实际耗时秒)
+    """
+    if processes <= 1:
+        return LoadRunner(load_cases(test_dirs), rate, duration, mix, mode, workers, check_rate, seed,
+                          login_payloads).run()
+
+    options = []
+    for i in range(processes):
+        options.append({
+            "rate": rate / processes if rate else None, "duration": duration, "mix": mix, "mode": mode,
+            "workers": workers, "check_rate": check_rate, "seed": None if seed is None else seed + i,
+            "login_payloads": login_payloads,
+        })
+    merged = {}
+    elapsed = 0.0
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for stats, seconds in executor.map(_run_process, [test_dirs] * processes, options):
+            elapsed = max(elapsed, seconds)
+            for endpoint, data in stats.items():
+                merged.setdefault(endpoint, EndpointStats()).merge(EndpointStats.from_dict(data))
+    return merged, elapsed
+
+
+def format_report(stats, elapsed):
+    """按接口输出请求数、吞吐、错误率与 p50/p95/p99/max 耗时"""
+    total = EndpointStats()
+    for endpoint_stats in stats.values():
+        total.merge(endpoint_stats)
+
+    header = f"{'接口':<50}{'请求数':>8}{'RPS':>9}{'错误率':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"
+    lines = [header, "-" * len(header)]
+
+    def row(name, s):
+        h = s.histogram
+        fmt = lambda v: f"{v:.1f}ms" if v is not None else "-"
+        error_rate = s.error_count / s.requests if s.requests else 0
+        return (f"{name:<50}{s.requests:>8}{s.requests / elapsed if elapsed else 0:>9.1f}{error_rate:>9.2%}"
+                f"{fmt(h.percentile(50)):>10}{fmt(h.percentile(95)):>10}{fmt(h.percentile(99)):>10}"
+                f"{fmt(h.max / 1000 if h.max is not None else None):>10}")
+
+    for endpoint in sorted(stats):
+        lines.append(row(endpoint, stats[endpoint]))
+    lines.append("-" * len(header))
+    lines.append(row("合计", total))
+    if total.errors:
+        lines.append("错误分布: " + ", ".join(f"{k} {v}" for k, v in sorted(total.errors.items())))
+    return "\n".join(lines)
@@ -0,0 +1,157 @@
+"""
+由结果文件(common/result_sink.py)生成报告：控制台汇总、单文件 HTML，以及按需导出 Allure 结果
+导出的 Allure 结果与 allure-pytest 的格式相同，可继续用 allure generate 生成 Allure 报告
+"""
+
+import hashlib
+import html
+import json
+import os
+import shutil
+import uuid
+from collections import Counter, defaultdict
+
+from common.timing import percentile
+
+_STATUSES = ("passed", "failed", "error", "skipped")
+# error 对应 Allure 的 broken
+_ALLURE_STATUS = {"passed": "passed", "failed": "failed", "error": "broken", "skipped": "skipped"}
+
+
+def summarize(results, slowest=10):
+    """
+    :return: {total, counts, duration_ms, wall_ms, slowest, failures, latency{count,p50,p95,p99,max}, groups}
+    """
+    counts = Counter(r["status"] for r in results)
+    starts = [r["start"] for r in results if r.get("start")]
+    stops = [r["stop"] for r in results if r.get("stop")]
+    latencies = [t["total_ms"] for r in results for t in r.get("timings", [])]
+    groups = defaultdict(Counter)
+    for r in results:
+        groups[r.get("feature") or r.get("story") or "未分组"][r["status"]] += 1
+    return {
+        "total": len(results),
+        "counts": {status: counts.get(status, 0) for status in _STATUSES},
+        "duration_ms": sum(r.get("duration_ms") or 0 for r in results),
+        "wall_ms": (max(stops) - min(starts)) * 1000 if starts and stops else None,
+        "slowest": sorted(results, key=lambda r: r.get("duration_ms") or 0, reverse=True)[:slowest],
+        "failures": [r for r in results if r["status"] in ("failed", "error")],
+        "latency": {
+            "count": len(latencies), "p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99), "max": max(latencies) if latencies else None,
+        },
+        "groups": {name: dict(c) for name, c in sorted(groups.items())},
+    }
+
+
+def _title(r):
+    return r.get("title") or r.get("name") or r["nodeid"]
+
+
+def format_summary(summary):
+    counts = summary["counts"]
+    lines = [
+        f"共 {summary['total']} 个用例：通过 {counts['passed']}，失败 {counts['failed']}，"
+        f"错误 {counts['error']}，跳过 {counts['skipped']}",
+        f"用例耗时合计 {summary['duration_ms'] / 1000:.2f}s"
+        + (f"，实际用时 {summary['wall_ms'] / 1000:.2f}s" if summary["wall_ms"] else ""),
+    ]
+    latency = summary["latency"]
+    if latency["count"]:
+        lines.append(f"请求 {latency['count']} 次：p50 {latency['p50']:.1f}ms | p95 {latency['p95']:.1f}ms"
+                     f" | p99 {latency['p99']:.1f}ms | max {latency['max']:.1f}ms")
+    if summary["slowest"]:
+        lines.append("最慢的用例：")
+        lines.extend(f"  {r.get('duration_ms', 0):9.1f}ms  {_title(r)}" for r in summary["slowest"])
+    if summary["failures"]:
+        lines.append("失败的用例：")
+        for r in summary["failures"]:
+            message = (r.get("error") or "").strip().splitlines()
+            lines.append(f"  ❌ {_title(r)} ({r['nodeid']})" + (f"\n     {message[0]}" if message else ""))
+    return "\n".join(lines)
+
+
+_CSS = """
+body{font-family:-apple-system,"Segoe UI","Microsoft YaHei",sans-serif;margin:24px;color:#222}
+table{border-collapse:collapse;width:100%;font-size:13px}th,td{border-bottom:1px solid #eee;padding:6px 8px;
+text-align:left;vertical-align:top}th{background:#fafafa}.passed{color:#2e7d32}.failed{color:#c62828}
+.error{color:#ef6c00}.skipped{color:#757575}pre{white-space:pre-wrap;margin:4px 0;font-size:12px}
+.bar button{margin-right:6px}.num{text-align:right}
+"""
+
+_JS = """
+function show(s){document.querySelectorAll('tr[data-status]').forEach(function(r){
+r.style.display=(s==='all'||r.dataset.status===s)?'':'none';});}
+"""
+
+
+def render_html(results, summary, title="接口测试报告"):
+    """单文件 HTML：汇总 + 可按状态筛选的用例表，失败用例展开错误信息与请求耗时"""
+    esc = html.escape
+    counts = summary["counts"]
+    buttons = "".join(
+        f'<button onclick="show(\'{s}\')">{s} ({counts[s]})</button>' for s in _STATUSES)
+    rows = []
+    for r in results:
+        detail = ""
+        if r.get("error"):
+            detail += f"<pre>{esc(r['error'])}</pre>"
+        if r.get("timings") and r["status"] != "passed":
+            detail += "<pre>" + esc("\n".join(_timing_line(i, t) for i, t in enumerate(r["timings"], 1))) + "</pre>"
+        rows.append(
+            f'<tr data-status="{r["status"]}"><td class="{r["status"]}">{r["status"]}</td>'
+            f'<td>{esc(_title(r))}<br><small>{esc(r["nodeid"])}</small>{detail}</td>'
+            f'<td>{esc(str(r.get("feature") or ""))}</td><td>{esc(str(r.get("story") or ""))}</td>'
+            f'<td class="num">{(r.get("duration_ms") or 0):.1f}</td></tr>')
+    return (
+        f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{esc(title)}</title>'
+        f'<style>{_CSS}</style><script>{_JS}</script></head><body>'
+        f'<h2>{esc(title)}</h2><pre>{esc(format_summary(dict(summary, slowest=[], failures=[])))}</pre>'
+        f'<div class="bar"><button onclick="show(\'all\')">all ({summary["total"]})</button>{buttons}</div>'
+        f'<table><tr><th>状态</th><th>用例</th><th>功能</th><th>场景</th><th class="num">耗时(ms)</th></tr>'
+        f'{"".join(rows)}</table></body></html>')
+
+
+def _timing_line(index, t):
+    return (f"#{index} {t['method']} {t['url']} {t['status_code']} | connect {t['connect_ms']:.1f}ms"
+            f" | ttfb {t['ttfb_ms']:.1f}ms | download {t['download_ms']:.1f}ms | total {t['total_ms']:.1f}ms")
+
+
+def export_allure(results, directory, clean=True):
+    """
+    把结果导出为 Allure 结果文件（每个用例一个 *-result.json，请求耗时作为文本附件）
+    :param clean: 导出前清空目录
+    :return: 导出的用例数
+    """
+    if clean and os.path.isdir(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory, exist_ok=True)
+    for r in results:
+        case_uuid = str(uuid.uuid4())
+        history_id = hashlib.md5(r["nodeid"].encode("utf-8")).hexdigest()
+        labels = [{"name": key, "value": str(r[key])} for key in ("epic", "feature", "story", "severity") if r.get(key)]
+        labels += [{"name": "tag", "value": str(tag)} for tag in r.get("tags", [])]
+        # 与 allure-pytest 一致：目录为 parentSuite，文件名为 suite
+        module = r["nodeid"].split("::")[0]
+        labels.append({"name": "parentSuite", "value": os.path.dirname(module).replace("/", ".")})
+        labels.append({"name": "suite", "value": os.path.splitext(os.path.basename(module))[0]})
+        if r.get("worker"):
+            labels.append({"name": "thread", "value": r["worker"]})
+        entry = {
+            "uuid": case_uuid, "historyId": history_id, "testCaseId": history_id, "fullName": r["nodeid"],
+            "name": _title(r), "status": _ALLURE_STATUS.get(r["status"], "unknown"), "stage": "finished",
+            "statusDetails": {"message": r.get("error")} if r.get("error") else {},
+            "labels": labels, "attachments": [],
+        }
+        if r.get("description"):
+            entry["description"] = str(r["description"])
+        if r.get("start") and r.get("stop"):
+            entry["start"], entry["stop"] = int(r["start"] * 1000), int(r["stop"] * 1000)
+        if r.get("timings"):
+            source = f"{uuid.uuid4()}-attachment.txt"
+            with open(os.path.join(directory, source), "w", encoding="utf-8") as f:
+                f.write("\n".join(_timing_line(i, t) for i, t in enumerate(r["timings"], 1)))
+            entry["attachments"].append({"name": "请求耗时", "source": source, "type": "text/plain"})
+        with open(os.path.join(directory, f"{case_uuid}-result.json"), "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+    return len(results)
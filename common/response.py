@@ -0,0 +1,51 @@
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    orjson = None
+
+_UNSET = object()
+
+
+def _loads(resp):
+    if orjson is not None:
+        try:
+            return orjson.loads(resp.content)
+        except orjson.JSONDecodeError:
+            # orjson 不支持 NaN、超过 64 位的整数以及非 UTF-8 编码，交给 requests 按原逻辑解析
+            pass
+    return resp.json()
+
+
+class ApiResponse:
+    """
+    requests.Response 包装：响应体只解码一次，断言(expected)与提取(extract)共用同一份结果，
+    其余属性(status_code / headers / text / iter_content 等)直接代理到原始响应
+    """
+
+    def __init__(self, resp):
+        self.raw_response = resp
+        self._json = _UNSET
+        self._error = None
+
+    def __getattr__(self, name):
+        return getattr(self.raw_response, name)
+
+    def json(self):
+        """与 requests.Response.json 相同，非 JSON 响应同样抛出异常，但只解码一次"""
+        if self._json is _UNSET:
+            try:
+                self._json = _loads(self.raw_response)
+            except Exception as e:
+                self._json = None
+                self._error = e
+        if self._error is not None:
+            raise self._error
+        return self._json
+
+    @property
+    def json_data(self):
+        """解码后的响应体，非 JSON 响应返回 {}"""
+        try:
+            return self.json()
+        except Exception:
+            return {}
@@ -1,5 +1,10 @@
 import re
 import logging
+import threading
+
+from common.timing import percentile
+from utils.json_stream import StreamedList
+from utils.log_utils import LogBody
 
 logger = logging.getLogger("Hsyuan")
 
@@ -116,62 +121,377 @@ def _check_list_data(data: dict,list_config: dict, path: str, errors: list):
                 _run_assertions(item, config["every_item_assert"], f"{full}[{idx}]", errors)
 
 
-class ResponseChecker:
-    def __init__(self, resp):
-        self.resp = resp
+# ---------------- 编译后的断言计划 ----------------
+# expected 每个用例只编译一次：路径预先拆分、正则预编译、比较运算预先绑定，
+# 列表的 object_required_items 与 every_item_assert 合并为一次遍历。
+# 报错信息、报错顺序与上面的逐条解释实现完全一致。
 
-    def check_response(self, expected=None):
-        if expected is None:
-            logger.info("未设置预期结果，跳过断言")
-            return
 
-        if self.resp is None:
-            raise AssertionError("请求失败，响应对象为空")
+def _compile_path(key_path: str):
+    """预拆分点号路径，返回与 _get_nested_value 行为一致的取值函数"""
+    keys = [(key, int(key) if key.isdigit() else None) for key in key_path.split(".")]
 
-        errors = []
+    if len(keys) == 1 and keys[0][1] is None:
+        # 单层非数字路径（最常见）走快速分支
+        only_key = keys[0][0]
+
+        def getter(data):
+            if isinstance(data, dict) and only_key in data:
+                return data[only_key]
+            raise KeyError(f"路径 '{key_path}' 在 '{only_key}' 处中断")
+
+        return getter
+
+    def getter(data):
+        current = data
+        for key, idx in keys:
+            if isinstance(current, dict) and key in current:
+                current = current[key]
+            elif isinstance(current, list) and idx is not None:
+                current = current[idx]
+            else:
+                raise KeyError(f"路径 '{key_path}' 在 '{key}' 处中断")
+        return current
+
+    return getter
+
+
+def _compile_check(way, expected):
+    """返回 (test, fmt)：test(actual) 判断是否通过，fmt(actual, full) 仅在失败时生成报错信息"""
+    match way:
+        case "eq":
+            return (lambda actual: actual == expected,
+                    lambda actual, full: f"[eq] {full}: 期望 {expected!r}, 实际 {actual!r}")
+        case "contains":
+            return (lambda actual: expected in str(actual),
+                    lambda actual, full: f"[contains] {full}: 期望包含 {expected!r}")
+        case "regex":
+            try:
+                match_fn = re.compile(expected).match
+            except (TypeError, re.error):
+                # 非法正则保留运行时报错行为
+                match_fn = lambda text: re.match(expected, text)
+            return (lambda actual: match_fn(str(actual)),
+                    lambda actual, full: f"[regex] {full}: 不匹配 {expected!r}")
+        case "type":
+            t = TYPE_MAP.get(expected)
+            return (lambda actual: t and isinstance(actual, t),
+                    lambda actual, full: f"[type] {full}: 期望 {expected}, 实际 {type(actual).__name__}")
+        case "gt":
+            return (lambda actual: actual > expected,
+                    lambda actual, full: f"[gt] {full}: 期望 > {expected}, 实际 {actual}")
+        case "gte":
+            return (lambda actual: actual >= expected,
+                    lambda actual, full: f"[gte] {full}: 期望 >= {expected}, 实际 {actual}")
+        case "lt":
+            return (lambda actual: actual < expected,
+                    lambda actual, full: f"[lt] {full}: 期望 < {expected}, 实际 {actual}")
+        case "lte":
+            return (lambda actual: actual <= expected,
+                    lambda actual, full: f"[lte] {full}: 期望 <= {expected}, 实际 {actual}")
+    # 未知的断言方式只校验字段是否存在
+    return None, None
+
+
+class _AssertPlan:
+    """编译后的 assert / every_item_assert 断言"""
+
+    def __init__(self, assertions: dict):
+        self.steps = []
+        for way, kv in assertions.items():
+            if not kv:
+                continue
+            for key, expected in kv.items():
+                test, fmt = _compile_check(way, expected)
+                self.steps.append((way, key, _compile_path(key), test, fmt))
+
+    def run(self, data, path: str, errors: list):
+        self.run_item(data, path, None, errors)
+
+    def run_item(self, data, path: str, idx, errors: list):
+        """idx 不为 None 时表示列表第 idx 项，报错路径为 path[idx].key，只在失败时拼接"""
+        for way, key, getter, test, fmt in self.steps:
+            try:
+                actual = getter(data)
+            except KeyError:
+                full = f"{path}.{key}" if idx is None else f"{path}[{idx}].{key}"
+                errors.append(f"[{way}] 字段不存在: {full}")
+                continue
+            if test is not None and not test(actual):
+                full = f"{path}.{key}" if idx is None else f"{path}[{idx}].{key}"
+                errors.append(fmt(actual, full))
+
+
+class _ListPlan:
+    """编译后的单个列表校验，长度、必需字段、逐项断言在一次遍历中完成"""
+
+    def __init__(self, config: dict):
+        self.has_length = "length" in config
+        self.length = config["length"] if self.has_length else None
+        self.required = [f for f in config["object_required_items"] if f] \
+            if "object_required_items" in config else None
+        self.item_assert = _AssertPlan(config["every_item_assert"]) \
+            if "every_item_assert" in config else None
+
+    def check(self, items, full: str, errors: list):
+        if self.has_length and len(items) != self.length:
+            errors.append(f"[length] {full}: 期望 {self.length}, 实际 {len(items)}")
+
+        required_errors = []
+        assert_errors = []
+        if self.required is not None or self.item_assert is not None:
+            required = self.required
+            item_assert = self.item_assert
+            for idx, item in enumerate(items):
+                if required:
+                    for field in required:
+                        if field not in item:
+                            required_errors.append(f"缺少字段: {full}[{idx}].{field}")
+                if item_assert is not None:
+                    item_assert.run_item(item, full, idx, assert_errors)
+        errors.extend(required_errors)
+        errors.extend(assert_errors)
+
+
+    def stream(self, full: str):
+        """流式模式：返回逐项接收元素的校验状态"""
+        return _ListStream(self, full)
+
+
+class _ListStream:
+    """流式列表校验状态：元素逐个 feed 进来，不保留列表本身"""
+
+    def __init__(self, plan: _ListPlan, full: str):
+        self.plan = plan
+        self.full = full
+        self.count = 0
+        self.required_errors = []
+        self.assert_errors = []
+
+    def feed(self, idx, item):
+        self.count += 1
+        if self.plan.required:
+            for field in self.plan.required:
+                if field not in item:
+                    self.required_errors.append(f"缺少字段: {self.full}[{idx}].{field}")
+        if self.plan.item_assert is not None:
+            self.plan.item_assert.run_item(item, self.full, idx, self.assert_errors)
+
+    def finish(self, errors: list):
+        if self.plan.has_length and self.count != self.plan.length:
+            errors.append(f"[length] {self.full}: 期望 {self.plan.length}, 实际 {self.count}")
+        errors.extend(self.required_errors)
+        errors.extend(self.assert_errors)
+
+
+class AssertionPlan:
+    """expected 编译后的断言计划"""
+
+    def __init__(self, expected: dict):
+        self.has_status = "status_code" in expected
+        self.status_code = expected.get("status_code")
+        # 耗时断言：[(键名, 百分位数 / None 表示最大值, 阈值毫秒)]
+        self.latency_checks = [(k, _latency_percentile(k), v) for k, v in expected.items()
+                               if _LATENCY_KEY.match(k)]
+
+        resp_config = expected.get("response", {})
+        self.fields = [(k, v) for k, v in resp_config.items() if k != "data"]
 
-        # 处理非JSON响应的错误
+        data_config = resp_config.get("data")
+        self.data_config = data_config
+        self.has_required_fields = False
+        # 可流式解析的列表：{路径元组: (列表计划, 报错路径)}
+        self.stream_plans = {}
+        self.data_assert = None
+        self.list_checks = None
+        self.list_data = None
+        if data_config:
+            self.has_required_fields = "required_fields" in data_config
+            if "assert" in data_config:
+                self.data_assert = self._compile_or_fallback(
+                    lambda: _AssertPlan(data_config["assert"]).run,
+                    lambda data, path, errors: _run_assertions(data, data_config["assert"], path, errors))
+            if "list_check" in data_config:
+                self.list_checks = self._compile_or_fallback(
+                    lambda: self._compile_list_check(data_config["list_check"]),
+                    lambda data, path, errors, streams: _check_list(data, data_config["list_check"], path, errors))
+            if "list_data" in data_config:
+                self.list_data = self._compile_or_fallback(
+                    lambda: self._compile_list_data(data_config["list_data"]),
+                    lambda data, path, errors, streams: _check_list_data(data, data_config["list_data"], path, errors))
+
+    @staticmethod
+    def _compile_or_fallback(compile_fn, fallback):
+        # 配置本身有问题（如 list_check 下的值为空）时退回逐条解释执行，保证报错时机与原实现一致
         try:
-            json_data = self.resp.json()
+            return compile_fn()
         except Exception:
-            json_data = {}
-
-        logger.info(f"resp.json: {json_data}")
+            return fallback
+
+    def _compile_list_check(self, list_config: dict):
+        plans = [(list_key, _compile_path(list_key), _ListPlan(config))
+                 for list_key, config in list_config.items()]
+        for list_key, _, plan in plans:
+            keys = list_key.split(".")
+            # 只有纯字典路径上的列表可以流式解析
+            if not any(key.isdigit() for key in keys):
+                self.stream_plans[("data",) + tuple(keys)] = (plan, f"data.{list_key}")
+
+        def run(data, path, errors, streams):
+            for list_key, getter, plan in plans:
+                full = f"{path}.{list_key}"
+                try:
+                    actual_list = getter(data)
+                except KeyError:
+                    errors.append(f"列表字段不存在: {full}")
+                    continue
+                if not isinstance(actual_list, list):
+                    errors.append(f"{full} 不是 list")
+                    continue
+                if isinstance(actual_list, StreamedList) and actual_list.path in streams:
+                    streams[actual_list.path].finish(errors)
+                else:
+                    plan.check(actual_list, full, errors)
+
+        return run
+
+    def _compile_list_data(self, list_config: dict):
+        if not list_config:
+            return lambda data, path, errors, streams: None
+        plan = _ListPlan(list_config)
+        self.stream_plans[("data",)] = (plan, "data")
+
+        def run(data, path, errors, streams):
+            if not isinstance(data, list):
+                errors.append(f"{path} 不是 list")
+            if isinstance(data, StreamedList) and data.path in streams:
+                streams[data.path].finish(errors)
+            else:
+                plan.check(data, path, errors)
+
+        return run
+
+    def stream_states(self) -> dict:
+        """流式模式：为每个可流式解析的列表创建校验状态 {路径元组: _ListStream}"""
+        return {path: plan.stream(full) for path, (plan, full) in self.stream_plans.items()}
+
+    def run(self, status_code, json_data, streams=None, latencies=None) -> list:
+        """
+        执行断言计划
+        :param streams: 流式模式下 stream_states() 返回并已喂完元素的列表状态
+        :param latencies: 本用例各次请求的总耗时(毫秒)
+        """
+        streams = streams or {}
+        errors = []
 
         # 1. HTTP 状态码
-        if "status_code" in expected:
-            if self.resp.status_code != expected["status_code"]:
-                errors.append(f"状态码: 期望 {expected['status_code']}, 实际 {self.resp.status_code}")
+        if self.has_status and status_code != self.status_code:
+            errors.append(f"状态码: 期望 {self.status_code}, 实际 {status_code}")
 
-        # 2. 顶层字段 (code, msg)
-        resp_config = expected.get("response", {})
-        for k, v in resp_config.items():
-            if k == "data":
+        # 耗时
+        for key, p, limit in self.latency_checks:
+            if not latencies:
+                errors.append(f"[{key}] 没有耗时记录")
                 continue
+            actual = max(latencies) if p is None else percentile(latencies, p)
+            if actual > limit:
+                errors.append(f"[{key}] 期望 <= {limit}ms, 实际 {actual:.1f}ms (共 {len(latencies)} 次请求)")
+
+        # 2. 顶层字段 (code, msg)
+        for k, v in self.fields:
             if k not in json_data:
                 errors.append(f"缺少响应字段: {k}")
             elif json_data[k] != v:
                 errors.append(f"响应字段: 期望 {k}={v!r}, 实际 {json_data[k]!r}")
 
         # 3. data 层
-        data_config = resp_config.get("data")
-        if data_config and "data" in json_data:
+        if self.data_config and "data" in json_data:
             data = json_data["data"]
 
-            if "required_fields" in data_config:
-                for field in data_config["required_fields"]:
+            if self.has_required_fields:
+                for field in self.data_config["required_fields"]:
                     if field and field not in data:
                         errors.append(f"缺少字段: data.{field}")
 
-            if "assert" in data_config:
-                _run_assertions(data, data_config["assert"], "data", errors)
+            if self.data_assert is not None:
+                self.data_assert(data, "data", errors)
 
-            if "list_check" in data_config:
-                _check_list(data, data_config["list_check"], "data", errors)
+            if self.list_checks is not None:
+                self.list_checks(data, "data", errors, streams)
 
-            if "list_data" in data_config:
-                _check_list_data(data,data_config["list_data"], "data", errors)
+            if self.list_data is not None:
+                self.list_data(data, "data", errors, streams)
+
+        return errors
+
+
+_LATENCY_KEY = re.compile(r'^(max|p\d{1,2}(?:\.\d+)?)_latency_ms$')
+
+
+def _latency_percentile(key):
+    """max_latency_ms -> None，p95_latency_ms -> 95.0"""
+    name = key[:-len("_latency_ms")]
+    return None if name == "max" else float(name[1:])
+
+
+# 编译缓存：{id(expected): (expected, plan)}，未含动态参数的 expected 在多次运行间是同一个对象；
+# 缓存项持有 expected 的引用，命中时再比较对象本身，id 不会因对象回收而被复用
+_PLAN_CACHE = {}
+_PLAN_CACHE_SIZE = 4096
+# 线程池中并发执行的断言会同时写缓存
+_PLAN_LOCK = threading.Lock()
+
+
+def compile_expected(expected: dict) -> AssertionPlan:
+    """编译 expected 为断言计划，同一对象只编译一次"""
+    cached = _PLAN_CACHE.get(id(expected))
+    if cached is not None and cached[0] is expected:
+        return cached[1]
+    plan = AssertionPlan(expected)
+    with _PLAN_LOCK:
+        if len(_PLAN_CACHE) >= _PLAN_CACHE_SIZE:
+            _PLAN_CACHE.pop(next(iter(_PLAN_CACHE)), None)
+        _PLAN_CACHE[id(expected)] = (expected, plan)
+    return plan
+
+
+class ResponseChecker:
+    def __init__(self, resp, body=None, timings=None):
+        self.resp = resp
+        # 流式模式下的 StreamingBody，为 None 时一次性解析 resp.json()
+        self.body = body
+        # 本用例各次请求的 RequestTiming，供 max_latency_ms / p95_latency_ms 等耗时断言使用
+        self.timings = timings or []
+
+    @property
+    def latencies(self):
+        # 流式响应体解析完成后 total 才包含下载耗时，因此在断言时再取值
+        return [t.total_ms for t in self.timings]
+
+    def check_response(self, expected=None):
+        if expected is None:
+            logger.info("未设置预期结果，跳过断言")
+            return
+
+        if self.resp is None:
+            raise AssertionError("请求失败，响应对象为空")
+
+        if self.body is not None:
+            # 流式模式：列表断言已在解析过程中逐项完成，日志只输出截断后的预览
+            self.body.parse()
+            logger.info("resp.json(流式): %s", self.body.preview_text)
+            errors = compile_expected(expected).run(
+                self.resp.status_code, self.body.json_data, self.body.list_states, self.latencies)
+        else:
+            # 处理非JSON响应的错误
+            try:
+                json_data = self.resp.json()
+            except Exception:
+                json_data = {}
+
+            logger.info("resp.json: %s", LogBody(json_data))
 
+            errors = compile_expected(expected).run(self.resp.status_code, json_data, latencies=self.latencies)
 
         # 4. 结果
         if errors:
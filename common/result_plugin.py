@@ -0,0 +1,95 @@
+"""
+pytest 插件：把每个用例的结果追加写入 --results 指定的文件（默认 RESULTS_FILE，off 关闭），见 common/result_sink.py
+xdist 下只有主进程写文件，worker 通过 report.user_properties 把 allure 元数据与请求耗时传回主进程
+"""
+
+import pytest
+
+from common.config import RESULTS_FILE
+from common.result_sink import open_sink, pop_case, case_meta, truncate_error
+
+_PROPERTY = "case_result"
+
+
+def pytest_addoption(parser):
+    parser.addoption("--results", action="store", default=RESULTS_FILE,
+                     help="用例结果输出文件，.jsonl 或 .db/.sqlite，off 表示不输出")
+
+
+def pytest_configure(config):
+    path = config.getoption("--results")
+    # xdist worker 与 --collect-only 不写文件
+    if path and path != "off" and not hasattr(config, "workerinput") and not config.option.collectonly:
+        config.pluginmanager.register(ResultRecorder(path), "result-recorder")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    report = (yield).get_result()
+    if call.when == "setup":
+        # 丢弃上一个测试遗留的记录
+        pop_case()
+    if call.when != "call" and report.passed:
+        return
+    allure_conf, timings = pop_case() if call.when == "call" else ({}, [])
+    if not allure_conf:
+        # YAML 用例在 setup 阶段失败(如登录失败)时还没有执行 ApiRunner，元数据取自用例本身
+        allure_conf = (getattr(item, "case", None) or {}).get("allure") or {}
+    report.user_properties.append((_PROPERTY, {
+        "meta": case_meta(allure_conf), "timings": [t.as_dict() for t in timings],
+    }))
+
+
+def _error_text(report):
+    if report.passed:
+        return None
+    if report.skipped and isinstance(report.longrepr, tuple):
+        return report.longrepr[2]
+    crash = getattr(report.longrepr, "reprcrash", None)
+    return truncate_error(crash.message if crash is not None else str(report.longrepr))
+
+
+class ResultRecorder:
+    """
+    主进程中接收各阶段报告，每个测试写一条记录；setup/teardown 出错时另记一条 error
+    结果文件在收到第一条报告时才打开（覆盖上次的结果），没有执行任何用例时保留上次的结果
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.sink = None
+        self.count = 0
+
+    def pytest_runtest_logreport(self, report):
+        if report.when == "call":
+            status = report.outcome
+        elif report.failed:
+            status = "error"
+        elif report.skipped and report.when == "setup":
+            status = "skipped"
+        else:
+            return
+        extra = next((value for name, value in report.user_properties if name == _PROPERTY), {})
+        node = getattr(report, "node", None)
+        result = {
+            "nodeid": report.nodeid, "name": report.head_line or report.nodeid.rpartition("::")[2],
+            **extra.get("meta", {}),
+            "status": status, "phase": report.when, "duration_ms": round(report.duration * 1000, 3),
+            "start": getattr(report, "start", None), "stop": getattr(report, "stop", None),
+            "worker": getattr(getattr(node, "gateway", None), "id", None),
+            "error": _error_text(report), "timings": extra.get("timings", []),
+        }
+        if self.sink is None:
+            self.sink = open_sink(self.path)
+        self.sink.write(result)
+        self.count += 1
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.sink is None:
+            return
+        terminalreporter.write_line(
+            f"用例结果已写入 {self.path}（{self.count} 条），生成报告：python3 start.py report --results {self.path}")
+
+    def pytest_unconfigure(self, config):
+        if self.sink is not None:
+            self.sink.close()
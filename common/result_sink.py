@@ -0,0 +1,119 @@
+"""
+用例结果输出：每个用例结束后追加一条记录（allure 块中的元数据、状态、耗时、断言错误），
+按扩展名选择 JSONL(.jsonl) 或 SQLite(.db/.sqlite/.sqlite3)，写入开销与用例数量成正比、与报告生成无关
+
+记录字段：nodeid, name, title, description, epic, feature, story, severity, tags, status(passed/failed/skipped/error),
+         phase, duration_ms, start, stop, worker, error, timings([RequestTiming.as_dict()])
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+# 错误信息最多保存的字符数
+ERROR_LIMIT = 4000
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+_META_KEYS = ("title", "description", "epic", "feature", "story", "severity", "tag")
+
+# 测试线程中最近一次 ApiRunner.run 的元数据与耗时，由结果插件在生成报告时取走
+_current = threading.local()
+
+
+def note_case(allure_conf, timings):
+    """ApiRunner.run 结束时调用：记录当前测试的 allure 元数据与请求耗时"""
+    _current.case = (allure_conf or {}, timings)
+
+
+def pop_case():
+    """:return: (allure 元数据, [RequestTiming])，当前测试没有执行 ApiRunner 时为 ({}, [])"""
+    case = getattr(_current, "case", None)
+    _current.case = None
+    return case or ({}, [])
+
+
+def case_meta(allure_conf):
+    """allure 块 -> 记录中的元数据字段，tag 统一为列表"""
+    meta = {key: allure_conf.get(key) for key in _META_KEYS if allure_conf.get(key) is not None}
+    if "tag" in meta:
+        tags = meta.pop("tag")
+        meta["tags"] = tags if isinstance(tags, list) else [tags]
+    return meta
+
+
+def truncate_error(text):
+    if text and len(text) > ERROR_LIMIT:
+        return text[:ERROR_LIMIT] + f"...(共 {len(text)} 字符)"
+    return text
+
+
+class JsonlSink:
+    """每条结果一行 JSON，逐条写入并刷新，进程中途退出也不会丢失已完成用例的结果"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, result):
+        self._file.write(json.dumps(result, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class SqliteSink:
+    """
+    SQLite 结果表，常用字段单独成列便于查询，完整记录保存在 data 列
+    :param batch: 每写入多少条提交一次
+    """
+
+    COLUMNS = ("nodeid", "title", "story", "status", "duration_ms", "worker")
+
+    def __init__(self, path, batch=100):
+        self.path = path
+        self.batch = batch
+        if os.path.exists(path):
+            os.remove(path)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE results (id INTEGER PRIMARY KEY, nodeid TEXT, title TEXT, story TEXT, status TEXT, "
+            "duration_ms REAL, worker TEXT, data TEXT)")
+        self._pending = 0
+
+    def write(self, result):
+        self._conn.execute(
+            "INSERT INTO results (nodeid, title, story, status, duration_ms, worker, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [result.get(c) for c in self.COLUMNS] + [json.dumps(result, ensure_ascii=False)])
+        self._pending += 1
+        if self._pending >= self.batch:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+
+def open_sink(path):
+    """按扩展名创建结果输出"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if path.lower().endswith(SQLITE_EXTENSIONS):
+        return SqliteSink(path)
+    return JsonlSink(path)
+
+
+def read_results(path):
+    """读取 JSONL / SQLite 结果文件，按写入顺序返回记录列表"""
+    if path.lower().endswith(SQLITE_EXTENSIONS):
+        conn = sqlite3.connect(path)
+        try:
+            return [json.loads(row[0]) for row in conn.execute("SELECT data FROM results ORDER BY id")]
+        finally:
+            conn.close()
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
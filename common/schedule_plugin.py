@@ -0,0 +1,75 @@
+"""
+pytest 插件：记录每个用例的耗时到历史库(HISTORY_DB，见 common/history.py)，
+-n/--dist load 或 loadgroup 运行时按历史耗时做 LPT 调度(common/scheduler.py)，结束时输出预测与实际总耗时
+"""
+
+import pytest
+
+from common.config import HISTORY_DB, XDIST_SCHEDULE
+from common.history import RunHistory
+
+_SCHEDULER = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    parser.addoption("--schedule", action="store", default=XDIST_SCHEDULE, choices=["lpt", "default"],
+                     help="xdist 调度方式：lpt 按历史耗时最长优先分配，default 使用 xdist 自带调度")
+    parser.addoption("--history", action="store", default=HISTORY_DB,
+                     help="用例耗时历史库，off 表示不读取也不记录")
+
+
+def pytest_configure(config):
+    path = config.getoption("--history")
+    # xdist worker 不写历史，由主进程统一记录
+    if path and path != "off" and not hasattr(config, "workerinput"):
+        config.pluginmanager.register(HistoryRecorder(path), "history-recorder")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    if config.getoption("--schedule") != "lpt" or config.getvalue("dist") not in ("load", "loadgroup"):
+        return None
+    recorder = config.pluginmanager.get_plugin("history-recorder")
+    if recorder is None:
+        return None
+    from common.scheduler import DurationScheduling
+
+    scheduler = DurationScheduling(config, log, estimates=recorder.history.estimates)
+    config.stash[_SCHEDULER] = scheduler
+    return scheduler
+
+
+class HistoryRecorder:
+    """主进程中累计每个用例 setup/call/teardown 的耗时，会话结束时写入历史库"""
+
+    def __init__(self, path):
+        self.history = RunHistory(path)
+        self.durations = {}
+        self.statuses = {}
+
+    def pytest_runtest_logreport(self, report):
+        self.durations[report.nodeid] = self.durations.get(report.nodeid, 0) + report.duration
+        if report.when == "call":
+            self.statuses[report.nodeid] = report.outcome
+        elif report.failed:
+            self.statuses[report.nodeid] = "error"
+        elif report.skipped:
+            self.statuses.setdefault(report.nodeid, "skipped")
+
+    def pytest_terminal_summary(self, terminalreporter, config):
+        scheduler = config.stash.get(_SCHEDULER, None)
+        if scheduler is None:
+            return
+        for line in scheduler.summary_lines():
+            terminalreporter.write_line(line)
+
+    def pytest_sessionfinish(self, session):
+        if self.durations:
+            self.history.add_run(self.durations, self.statuses)
+        scheduler = session.config.stash.get(_SCHEDULER, None)
+        if scheduler is not None and scheduler.actual is not None:
+            self.history.add_makespan(len(scheduler.predicted_loads), len(scheduler.collection),
+                                      scheduler.predicted, scheduler.actual)
+
+    def pytest_unconfigure(self, config):
+        self.history.close()
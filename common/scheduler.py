@@ -0,0 +1,144 @@
+"""
+按历史耗时调度 xdist：最长处理时间优先(LPT)的列表调度
+- 用例按估算耗时从长到短排队，哪个 worker 先空闲就领取队首，慢用例最先开始，不会在最后拖尾
+- 只给每个 worker 预发少量用例，估算不准时由先空闲的 worker 自动接手剩余用例
+- --dist loadgroup 时同一 xdist_group 的用例作为一个整体发给同一个 worker
+"""
+
+import heapq
+import time
+from collections import deque
+
+from xdist.scheduler import LoadScheduling
+
+
+def plan_makespan(costs, workers):
+    """
+    按 LPT 列表调度模拟总耗时
+    :param costs: 各调度单元的估算耗时，按调度顺序排列
+    :return: (预测总耗时, 各 worker 的预测负载)
+    """
+    loads = [0.0] * max(workers, 1)
+    heapq.heapify(loads)
+    for cost in costs:
+        heapq.heappush(loads, heapq.heappop(loads) + cost)
+    return max(loads), sorted(loads, reverse=True)
+
+
+class DurationScheduling(LoadScheduling):
+    """
+    :param estimates: nodeid 列表 -> {nodeid: 估算耗时(秒)}，见 RunHistory.estimates
+    :param prefetch: worker 排队中(未开始)的用例估算耗时低于该值(秒)时继续发送，短用例因此成批发送；
+                     不超过每个 worker 平均负载的 1/4，用例总量少时也能分散到所有 worker
+    """
+
+    def __init__(self, config, log=None, estimates=None, prefetch=0.5):
+        super().__init__(config, log)
+        self.estimates = estimates
+        self.prefetch = prefetch
+        self.units = deque()
+        self.cost = []
+        self.predicted = None
+        self.predicted_loads = []
+        self.started = None
+        self.finished = None
+        self.busy = {}
+
+    def schedule(self):
+        assert self.collection_is_completed
+        if self.collection is not None:
+            for node in self.nodes:
+                self.check_schedule(node)
+            return
+        if not self._check_nodes_have_same_collection():
+            self.log("**Different tests collected, aborting run**")
+            return
+
+        self.collection = next(iter(self.node2collection.values()))
+        estimates = self.estimates(self.collection)
+        self.cost = [estimates[nodeid] for nodeid in self.collection]
+        # 同一 @分组 的用例合成一个调度单元，保持收集顺序；单元按总耗时从长到短排列
+        groups = {}
+        for index, nodeid in enumerate(self.collection):
+            _, _, group = nodeid.partition("@")
+            groups.setdefault(group or index, []).append(index)
+        units = sorted(groups.values(), key=lambda unit: -sum(self.cost[i] for i in unit))
+        self.units = deque(units)
+        self.pending[:] = [i for unit in units for i in unit]
+        self.predicted, self.predicted_loads = plan_makespan(
+            [sum(self.cost[i] for i in unit) for unit in units], len(self.nodes))
+        self.prefetch = min(self.prefetch, sum(self.cost) / len(self.nodes) / 4)
+        self.started = time.perf_counter()
+        # 先给每个 worker 各发一个最长的单元，再逐个补足，避免最长的几个单元落到同一个 worker
+        for node in self.nodes:
+            if self.units:
+                self._send_unit(node, self.units.popleft())
+        for node in self.nodes:
+            self.check_schedule(node)
+
+    def check_schedule(self, node, duration=0):
+        if node.shutting_down:
+            return
+        if not self.units:
+            node.shutdown()
+            return
+        node_pending = self.node2pending[node]
+        # 第一项是正在执行的用例，其余为排队中的用例；worker 至少需要 2 项才能知道下一个用例
+        while self.units and (len(node_pending) < 2
+                              or sum(self.cost[i] for i in node_pending[1:]) < self.prefetch):
+            self._send_unit(node, self.units.popleft())
+        if not self.units:
+            # 队列已空：通知所有 worker 执行完手头的用例后退出(只剩 1 项的 worker 不会再等下一个用例)
+            for other in self.nodes:
+                if not other.shutting_down:
+                    other.shutdown()
+
+    def _send_unit(self, node, unit):
+        # pending 与 units 顺序一致，队首即当前单元
+        del self.pending[:len(unit)]
+        self.node2pending[node].extend(unit)
+        node.send_runtest_some(unit)
+
+    def mark_test_complete(self, node, item_index, duration=0):
+        self.busy[node.gateway.id] = self.busy.get(node.gateway.id, 0) + duration
+        self.finished = time.perf_counter()
+        super().mark_test_complete(node, item_index, duration)
+
+    def mark_test_pending(self, item):
+        index = self.collection.index(item)
+        self.units.appendleft([index])
+        self.pending.insert(0, index)
+        for node in self.node2pending:
+            self.check_schedule(node)
+
+    def remove_node(self, node):
+        pending = self.node2pending.pop(node)
+        if not pending:
+            return None
+        # worker 异常退出，未执行的用例放回队首重新分配
+        crashitem = self.collection[pending.pop(0)]
+        self.units.extendleft([i] for i in reversed(pending))
+        self.pending[:0] = pending
+        for other in self.node2pending:
+            self.check_schedule(other)
+        return crashitem
+
+    @property
+    def actual(self):
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def summary_lines(self):
+        """预测与实际总耗时对比"""
+        if self.predicted is None:
+            return []
+        total = sum(self.cost)
+        lines = [
+            f"LPT 调度：{len(self.collection)} 个用例，{len(self.predicted_loads)} 个 worker",
+            f"  预测总耗时 {self.predicted:.2f}s（估算合计 {total:.2f}s，理想值 {total / len(self.predicted_loads):.2f}s）",
+        ]
+        if self.actual is not None:
+            lines.append(f"  实际总耗时 {self.actual:.2f}s，各 worker 执行用时："
+                         + "，".join(f"{worker} {busy:.2f}s" for worker, busy in sorted(self.busy.items())))
+        return lines
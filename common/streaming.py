@@ -0,0 +1,96 @@
+import logging
+import re
+import time
+
+from common.config import STREAM_CHUNK_SIZE, STREAM_LOG_LIMIT, STREAM_KEEP_ITEMS
+from common.response_checker import compile_expected
+from utils.json_stream import stream_parse
+from utils.jsonpath_utils import compile_jsonpath
+
+logger = logging.getLogger("Hsyuan")
+
+# 可在流式解析时逐项求值的提取表达式：$.a.b[0].c / $.a.b[*].c
+_ITEM_EXPR = re.compile(r'^\$((?:\.[A-Za-z_][\w-]*)+)\[(\d+|\*)\](.*)$')
+
+
+class StreamingBody:
+    """
+    流式响应体：按块读取并只解析一次，解析过程中同时完成列表断言和 JSONPath 提取，
+    大列表逐项处理后即丢弃，内存中只保留文档骨架和有限长度的预览
+    """
+
+    def __init__(self, resp, expected=None, extract=None, timing=None):
+        self.resp = resp
+        # 请求的 RequestTiming，响应体读取耗时在解析完成后补记为 download
+        self.timing = timing
+        self.plan = compile_expected(expected) if expected else None
+        self.extract_exprs = extract or {}
+        self.parsed = False
+        self.json_data = {}
+        self.preview = ""
+        self.size = 0
+        self.list_states = {}
+        self.extracted = {}
+
+    def _item_extractor(self, specs):
+        extracted = self.extracted
+
+        def feed(idx, item):
+            for var_name, index, sub_expr in specs:
+                if var_name in extracted or (index is not None and idx != index):
+                    continue
+                value = compile_jsonpath("$" + sub_expr)(item) if sub_expr else [item]
+                if value:
+                    extracted[var_name] = value[0]
+
+        return feed
+
+    def parse(self):
+        if self.parsed:
+            return
+        self.parsed = True
+
+        self.list_states = self.plan.stream_states() if self.plan else {}
+        handlers = {path: state.feed for path, state in self.list_states.items()}
+
+        item_specs = {}
+        for var_name, var_exp in self.extract_exprs.items():
+            m = _ITEM_EXPR.match(str(var_exp))
+            if m:
+                path = tuple(m.group(1)[1:].split("."))
+                index = None if m.group(2) == "*" else int(m.group(2))
+                item_specs.setdefault(path, []).append((var_name, index, m.group(3)))
+        for path, specs in item_specs.items():
+            extractor = self._item_extractor(specs)
+            if path in handlers:
+                check = handlers[path]
+                handlers[path] = lambda idx, item, check=check, extractor=extractor: (check(idx, item), extractor(idx, item))
+            else:
+                handlers[path] = extractor
+
+        start = time.perf_counter()
+        try:
+            self.json_data, self.preview, self.size = stream_parse(
+                self.resp.iter_content(STREAM_CHUNK_SIZE), handlers,
+                keep=STREAM_KEEP_ITEMS, preview_limit=STREAM_LOG_LIMIT)
+        except ValueError as e:
+            # 与非流式模式一致：非 JSON 响应按空字典处理
+            logger.info(f"流式解析响应失败，按非JSON响应处理: {e}")
+            self.json_data = {}
+        finally:
+            self.resp.close()
+            if self.timing is not None:
+                self.timing.add_download(time.perf_counter() - start)
+
+    @property
+    def preview_text(self):
+        if self.size > len(self.preview.encode("utf-8")):
+            return f"{self.preview}...(已截断，共 {self.size} 字节)"
+        return self.preview
+
+    def extract_value(self, var_name, var_exp):
+        """返回与 jsonpath.jsonpath 相同格式的结果：匹配列表或 False"""
+        self.parse()
+        if var_name in self.extracted:
+            return [self.extracted[var_name]]
+        return compile_jsonpath(var_exp)(self.json_data)
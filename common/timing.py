@@ -0,0 +1,121 @@
+"""请求耗时采集：每次请求记录建连、首字节、下载、总耗时，供报告展示和 expected 中的耗时断言使用"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# 当前线程正在发送的请求，建连耗时由 common.transport 中的连接类回写
+_local = threading.local()
+
+
+class RequestTiming:
+    """
+    单次请求的阶段耗时(毫秒)
+    connect 为新建连接(含 TLS 握手)耗时，复用已有连接时为 0；
+    ttfb 为发出请求到收到响应头，包含 connect；download 为读取响应体；total = ttfb + download
+    """
+
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+        self.status_code = None
+        self.connect_ms = 0.0
+        self.ttfb_ms = 0.0
+        self.download_ms = 0.0
+        self.total_ms = 0.0
+        # 文件上传：请求体字节数与发送耗时
+        self.upload_bytes = 0
+        self.upload_ms = None
+        self._start = 0.0
+        self._headers_at = None
+
+    @property
+    def upload_mbps(self):
+        """上传吞吐(MB/s)"""
+        if not self.upload_ms:
+            return None
+        return self.upload_bytes / 1024 / 1024 / (self.upload_ms / 1000)
+
+    def set_upload(self, sent_bytes, seconds):
+        self.upload_bytes = sent_bytes
+        self.upload_ms = seconds * 1000 if seconds is not None else None
+
+    def as_dict(self):
+        result = {
+            "method": self.method, "url": self.url, "status_code": self.status_code,
+            "connect_ms": round(self.connect_ms, 3), "ttfb_ms": round(self.ttfb_ms, 3),
+            "download_ms": round(self.download_ms, 3), "total_ms": round(self.total_ms, 3),
+        }
+        if self.upload_bytes:
+            result.update(upload_bytes=self.upload_bytes, upload_ms=self.upload_ms and round(self.upload_ms, 3))
+        return result
+
+    def __str__(self):
+        text = (f"{self.method} {self.url} {self.status_code} | connect {self.connect_ms:.1f}ms"
+                f" | ttfb {self.ttfb_ms:.1f}ms | download {self.download_ms:.1f}ms | total {self.total_ms:.1f}ms")
+        if self.upload_mbps is not None:
+            text += f" | upload {self.upload_bytes} 字节 {self.upload_ms:.1f}ms {self.upload_mbps:.1f}MB/s"
+        return text
+
+    def on_response(self, resp, *args, **kwargs):
+        """requests 的 response 钩子：收到响应头、尚未读取响应体时触发（重定向时以最后一次为准）"""
+        self._headers_at = time.perf_counter()
+        return resp
+
+    @contextmanager
+    def measure(self):
+        """包住一次 session.request 调用"""
+        _local.timing = self
+        self._start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            _local.timing = None
+            end = time.perf_counter()
+            headers_at = self._headers_at or end
+            self.ttfb_ms = (headers_at - self._start) * 1000
+            self.download_ms = (end - headers_at) * 1000
+            self.total_ms = (end - self._start) * 1000
+
+    def add_download(self, seconds):
+        """流式响应体在请求返回后才读取，读取耗时补记到 download 和 total"""
+        self.download_ms += seconds * 1000
+        self.total_ms += seconds * 1000
+
+
+def record_connect(seconds):
+    timing = getattr(_local, "timing", None)
+    if timing is not None:
+        timing.connect_ms += seconds * 1000
+
+
+def percentile(values, p):
+    """最近秩百分位数，如 p=95 时返回至少 95% 的样本不超过的最小样本值"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(timings):
+    """多次请求的总耗时汇总 {count, min, p50, p95, p99, max}"""
+    totals = [t.total_ms for t in timings]
+    if not totals:
+        return {}
+    return {
+        "count": len(totals), "min": min(totals),
+        "p50": percentile(totals, 50), "p95": percentile(totals, 95), "p99": percentile(totals, 99),
+        "max": max(totals),
+    }
+
+
+def format_timings(timings):
+    """Allure 附件文本：逐次耗时 + 多次请求时的汇总"""
+    lines = [f"#{i} {t}" for i, t in enumerate(timings, 1)]
+    if len(timings) > 1:
+        s = summarize(timings)
+        lines.append(f"共 {s['count']} 次 | min {s['min']:.1f}ms | p50 {s['p50']:.1f}ms"
+                     f" | p95 {s['p95']:.1f}ms | p99 {s['p99']:.1f}ms | max {s['max']:.1f}ms")
+    return "\n".join(lines)
@@ -0,0 +1,296 @@
+"""HTTP 传输层：统一创建带连接池、超时、重试配置的 requests 会话，并统计连接复用情况"""
+
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter, BaseAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from common.config import (
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_POOL_MAXSIZE_PER_HOST, HTTP_POOL_BLOCK,
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+    HTTP_RETRIES, HTTP_RETRY_BACKOFF, HTTP_RETRY_STATUS, HTTP2,
+)
+from common.cassette import CassetteAdapter, get_cassette_store
+from common.timing import record_connect
+
+logger = logging.getLogger("Hsyuan")
+
+
+def _parse_host_sizes(text):
+    """"api.example.com:64,localhost:8" -> {"api.example.com": 64, "localhost": 8}"""
+    sizes = {}
+    for item in filter(None, (s.strip() for s in text.split(","))):
+        host, _, size = item.rpartition(":")
+        sizes[host] = int(size)
+    return sizes
+
+
+def build_retry(retries=HTTP_RETRIES, backoff=HTTP_RETRY_BACKOFF, status=HTTP_RETRY_STATUS):
+    """重试策略：只重试幂等请求，重试耗尽后仍返回最后一次响应交给断言处理"""
+    if not retries:
+        return Retry(0, read=False)
+    return Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=[int(s) for s in str(status).split(",") if s.strip()],
+        raise_on_status=False,
+    )
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """记录新建连接耗时的连接类"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            record_connect(time.perf_counter() - start)
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """记录新建连接耗时(含 TLS 握手)的连接类"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            record_connect(time.perf_counter() - start)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """支持单主机连接池大小覆盖与默认超时的 HTTPAdapter"""
+
+    def __init__(self, pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                 host_maxsize=None, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                 max_retries=None, pool_block=HTTP_POOL_BLOCK):
+        self.host_maxsize = _parse_host_sizes(HTTP_POOL_MAXSIZE_PER_HOST) if host_maxsize is None else host_maxsize
+        self.default_timeout = timeout
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                         max_retries=max_retries if max_retries is not None else build_retry(),
+                         pool_block=pool_block)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool,
+        }
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        maxsize = self.host_maxsize.get(host_params["host"])
+        if maxsize:
+            pool_kwargs["maxsize"] = maxsize
+        return host_params, pool_kwargs
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.default_timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+    def stats(self):
+        """各主机连接池的新建连接数与请求数"""
+        result = []
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            result.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "maxsize": pool.pool.maxsize if pool.pool is not None else None,
+                "connections": pool.num_connections,
+                "requests": pool.num_requests,
+            })
+        return result
+
+
+class Http2Adapter(BaseAdapter):
+    """基于 httpx 的 HTTP/2 适配器，把 requests 的请求/响应与 httpx 互相转换"""
+
+    def __init__(self, pool_maxsize=HTTP_POOL_MAXSIZE, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                 retries=HTTP_RETRIES):
+        super().__init__()
+        self.default_timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        # verify / cert / 代理属于 httpx 传输层配置，每种组合一个 Client（通常只有一个）
+        self._clients = {}
+        self.num_requests = 0
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def _get_client(self, verify, cert, proxy):
+        import httpx
+
+        key = (verify, cert, proxy)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                # httpx 传入 transport 时会忽略 Client 上的 limits，连接池上限必须设在传输层
+                limits = httpx.Limits(max_connections=self.pool_maxsize,
+                                      max_keepalive_connections=self.pool_maxsize)
+                transport = httpx.HTTPTransport(http2=True, limits=limits, retries=self.retries,
+                                                verify=verify, cert=cert, proxy=proxy)
+                client = self._clients[key] = httpx.Client(http2=True, transport=transport)
+        return client
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        import httpx
+
+        timeout = self.default_timeout if timeout is None else timeout
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = httpx.Timeout(read, connect=connect)
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        proxy = requests.utils.select_proxy(request.url, proxies) if proxies else None
+        client = self._get_client(verify, cert, proxy)
+        try:
+            http_request = client.build_request(
+                request.method, request.url, headers=dict(request.headers), content=request.body,
+                timeout=timeout)
+            http_response = client.send(http_request, stream=stream)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(e, request=request)
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(e, request=request)
+
+        with self._lock:
+            self.num_requests += 1
+            stream_id = http_response.extensions.get("network_stream")
+            if stream_id is not None:
+                self._connections.add(id(stream_id))
+
+        response = requests.Response()
+        response.status_code = http_response.status_code
+        response.headers = requests.structures.CaseInsensitiveDict(http_response.headers)
+        response.url = str(http_response.url)
+        response.reason = http_response.reason_phrase
+        response.request = request
+        response.connection = self
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        if stream:
+            response.raw = _HttpxRaw(http_response)
+        else:
+            response._content = http_response.content
+            response._content_consumed = True
+            http_response.close()
+        return response
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+
+    def stats(self):
+        return [{
+            "host": "http2",
+            "maxsize": None,
+            "connections": len(self._connections),
+            "requests": self.num_requests,
+        }]
+
+
+class _HttpxRaw:
+    """让 requests.Response.iter_content 可以读取 httpx 的流式响应"""
+
+    def __init__(self, http_response):
+        self._iter = http_response.iter_bytes()
+        self._response = http_response
+        self._buffer = b""
+
+    def read(self, amt=None, decode_content=True):
+        while amt is None or len(self._buffer) < amt:
+            chunk = next(self._iter, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if amt is None:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def close(self):
+        self._response.close()
+
+    def release_conn(self):
+        self._response.close()
+
+
+def mount_transport(session, pool_maxsize=HTTP_POOL_MAXSIZE, http2=HTTP2, **kwargs):
+    """为会话挂载传输层适配器，返回会话本身"""
+    adapter = None
+    if http2:
+        try:
+            adapter = Http2Adapter(pool_maxsize=pool_maxsize)
+        except ImportError:
+            logger.warning("未安装 httpx[http2]，HTTP/2 不可用，退回 HTTP/1.1")
+    if adapter is None:
+        adapter = PooledAdapter(pool_maxsize=pool_maxsize, **kwargs)
+    store = get_cassette_store()
+    if store is not None:
+        adapter = CassetteAdapter(adapter, store)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def create_session(**kwargs):
+    """创建带传输层配置的会话，参数同 mount_transport"""
+    return mount_transport(requests.Session(), **kwargs)
+
+
+_default_session = None
+_default_lock = threading.Lock()
+
+
+def get_default_session():
+    """未登录用例共用的会话（显式创建，替代原先 ApiRunner 参数默认值里导入时创建的会话）"""
+    global _default_session
+    if _default_session is None:
+        with _default_lock:
+            if _default_session is None:
+                _default_session = create_session()
+    return _default_session
+
+
+def transport_stats(session):
+    """
+    会话的连接复用统计
+    :return: [{"host", "maxsize", "connections": 新建连接数, "requests": 请求数, "reuse_ratio": 复用率}]
+    """
+    stats = []
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen or not hasattr(adapter, "stats"):
+            continue
+        seen.add(id(adapter))
+        for item in adapter.stats():
+            requests_count = item["requests"]
+            item["reuse_ratio"] = 1 - item["connections"] / requests_count if requests_count else 0.0
+            stats.append(item)
+    return stats
+
+
+def log_transport_stats(session, name=""):
+    for item in transport_stats(session):
+        logger.info(
+            f"连接复用统计{name}: {item['host']} 请求 {item['requests']} 次，新建连接 {item['connections']} 个，"
+            f"复用率 {item['reuse_ratio']:.1%}")
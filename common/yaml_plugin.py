@@ -0,0 +1,106 @@
+"""
+pytest 插件：直接把 data/**/test_*.yml 中的每个顶层用例收集为一个测试项，
+不再需要在 testcases/ 下为每个目录手写参数化包装
+
+用例级可选字段：
+    auth: admin / user / none   选择登录角色对应的 fixture，缺省时按所在目录名推断
+    allure.pytest_mark          转换为真实的 pytest marker，可直接用 -m 过滤
+
+目录级 marker 由 pytest.ini 的 yaml_dir_markers 配置（如 file 目录附加 file）
+"""
+
+import os
+
+import pytest
+
+from common.auth import DIR_ROLES, ROLE_FIXTURES
+
+
+def pytest_addoption(parser):
+    parser.addini("yaml_case_dirs", type="linelist", default=["data/ai_testcases"],
+                  help="作为测试项收集的 YAML 用例目录")
+    parser.addini("yaml_case_ignore", type="linelist", default=[],
+                  help="不收集的 YAML 用例目录（仍由 testcases/ 下的包装用例执行）")
+    parser.addini("yaml_case_markers", type="args", default=["api", "final"],
+                  help="所有 YAML 用例默认附加的 marker")
+    parser.addini("yaml_dir_markers", type="linelist", default=[],
+                  help="按目录附加的 marker，每行 目录: marker1 marker2")
+
+
+def pytest_configure(config):
+    config._yaml_known_marks = {line.split(":")[0].strip() for line in config.getini("markers")}
+    config._yaml_dir_marks = []
+    for line in config.getini("yaml_dir_markers"):
+        directory, _, marks = line.partition(":")
+        config._yaml_dir_marks.append((config.rootpath / directory.strip(), marks.split()))
+
+
+def _under(path, dirs, rootpath):
+    return any(path.is_relative_to(rootpath / d) for d in dirs)
+
+
+def pytest_collect_file(file_path, parent):
+    if file_path.suffix != ".yml" or not file_path.name.startswith("test_"):
+        return None
+    config = parent.config
+    if not _under(file_path, config.getini("yaml_case_dirs"), config.rootpath):
+        return None
+    if _under(file_path, config.getini("yaml_case_ignore"), config.rootpath):
+        return None
+    return YamlFile.from_parent(parent, path=file_path)
+
+
+def _run_yaml_case(request):
+    """YAML 用例测试函数：按用例的 auth 字段取对应登录 fixture 的会话后执行"""
+    from common.api_utils import ApiRunner
+
+    item = request.node
+    fixture_name = ROLE_FIXTURES.get(item.auth)
+    if fixture_name:
+        runner = ApiRunner(item.case, request.getfixturevalue(fixture_name))
+    else:
+        runner = ApiRunner(item.case)
+    runner.run()
+
+
+class YamlFile(pytest.File):
+    """一个 YAML 用例文件，收集时才解析（命中用例缓存时只需反序列化）"""
+
+    def collect(self):
+        from utils.data_utils import read_yaml
+
+        cases = read_yaml(self.path) or {}
+        default_role = DIR_ROLES.get(self.path.parent.name)
+        default_marks = self.config.getini("yaml_case_markers")
+        for name, case in cases.items():
+            if not isinstance(case, dict) or "steps" not in case:
+                continue
+            item = YamlCaseItem.from_parent(self, name=name, callobj=_run_yaml_case)
+            item.case = case
+            role = case.get("auth", default_role)
+            item.auth = None if role in (None, "none") else role
+
+            marks = list(default_marks)
+            for directory, dir_marks in self.config._yaml_dir_marks:
+                if self.path.is_relative_to(directory):
+                    marks.extend(dir_marks)
+            pytest_mark = (case.get("allure") or {}).get("pytest_mark")
+            if pytest_mark:
+                marks.extend(pytest_mark if isinstance(pytest_mark, list) else [pytest_mark])
+            for mark in marks:
+                if mark not in self.config._yaml_known_marks:
+                    # YAML 中出现的新 marker 自动注册，避免 PytestUnknownMarkWarning
+                    self.config.addinivalue_line("markers", f"{mark}: YAML 用例标记")
+                    self.config._yaml_known_marks.add(mark)
+                item.add_marker(mark)
+            yield item
+
+
+class YamlCaseItem(pytest.Function):
+    """单个 YAML 用例，基于 pytest.Function 以便使用 fixture"""
+
+    case = None
+    auth = None
+
+    def reportinfo(self):
+        return self.path, None, f"{os.path.basename(self.path)}::{self.name}"
@@ -1,85 +1,79 @@
 import os
 from pickle import FALSE
 
-from common.config import SERVER_URL, PUBLIC_KEY
 import pytest
-import time
-import requests
 
-from testcases.test_login_api import TestLoginAPI
-from utils.data_utils import clear_extract_yaml, extract_yaml, read_yaml_list, read_yaml
-from utils.rsa_utils import PasswordEncryptor
+from common.auth import login_role, ROLE_FIXTURES
+from common.config import CASE_CACHE
+from common.transport import get_default_session, log_transport_stats
+
+from utils import case_cache
+from utils.log_utils import setup_logging, shutdown_logging, LOG_FILE
+from utils.extract_store import ExtractStore, get_store
+from utils.data_utils import clear_extract_yaml, extract_yaml, read_yaml_list, read_yaml, export_extract_yaml
 import logging
 
 
+# YAML 用例直接收集为测试项并按变量依赖排序，用例结果写入 --results 指定的文件，用例耗时记入历史库供 xdist 调度，
+# 指定 --impact-base 等参数时只执行受改动影响的用例
+pytest_plugins = ["common.yaml_plugin", "common.dependency_plugin", "common.result_plugin", "common.schedule_plugin",
+                  "common.impact_plugin"]
+
 # 配置日志记录器
 logger = logging.getLogger("Hsyuan")
 
-@pytest.fixture(scope='session',autouse=False)
-def get_admin_token():
+# xdist 主进程记录的本次运行的变量命名空间(即 testrunuid，各 worker 共用)
+_EXTRACT_NAMESPACE = pytest.StashKey()
+
 
-    username = 'admin'
-    password = "123456"
-    user_type = "admin"
+def pytest_addoption(parser):
+    parser.addoption("--case-cache", action="store", default="on" if CASE_CACHE else "off", choices=["on", "off"],
+                     help="是否使用用例解析缓存(.cache/cases)，默认取 .env 中的 CASE_CACHE(on)")
 
-    entrytor = PasswordEncryptor()
-    pem_public_key = "-----BEGIN PUBLIC KEY-----"+PUBLIC_KEY+"-----END PUBLIC KEY-----"
-    entrytor.set_public_key(pem_public_key)
-    password_rsa = entrytor.encryptPassword(password)
 
-    params = {
-        "username": username,
-        "password": password_rsa,
-        "userType": user_type,
-        "timestamp": int(time.time() * 1000)
-    }
+def pytest_configure(config):
+    # 测试模块在导入时读取用例，需在收集前设置好缓存开关
+    case_cache.set_enabled(config.getoption("--case-cache") == "on")
+    # xdist 的 worker 追加写入主进程创建的日志文件
+    setup_logging(LOG_FILE, mode="a" if os.environ.get("PYTEST_XDIST_WORKER") else "w")
 
-    session = requests.Session()
-    resp = session.request("POST", SERVER_URL+"/login", json=params)
-    resp.raise_for_status()
-    token = resp.json()["data"]["token"]
-    session.headers.update({
-        "Token": token
-    })
-    extract_yaml("init_token", token)
 
-    yield session
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.config.stash[_EXTRACT_NAMESPACE] = node.workerinput["testrunuid"]
 
-    session.close()
 
-@pytest.fixture(scope='session',autouse=False)
-def get_user_token():
+def pytest_sessionfinish(session):
+    # worker 之间共用命名空间，不能由某个 worker 清空；所有 worker 结束后由主进程删除本次运行的变量，
+    # 避免 sqlite 后端中按 testrunuid 建立的命名空间越积越多
+    namespace = session.config.stash.get(_EXTRACT_NAMESPACE, None)
+    if namespace is not None:
+        ExtractStore(get_store().backend, namespace).clear()
 
-    username = 'NCHU13312341234'
-    password = "123456"
-    user_type = "user"
 
-    entrytor = PasswordEncryptor()
-    pem_public_key = "-----BEGIN PUBLIC KEY-----"+PUBLIC_KEY+"-----END PUBLIC KEY-----"
-    entrytor.set_public_key(pem_public_key)
-    password_rsa = entrytor.encryptPassword(password)
+def pytest_unconfigure(config):
+    shutdown_logging()
 
-    params = {
-        "username": username,
-        "password": password_rsa,
-        "userType": user_type,
-        "timestamp": int(time.time() * 1000)
-    }
 
-    session = requests.Session()
-    resp = session.request("POST", SERVER_URL+"/login", json=params)
-    resp.raise_for_status()
-    token = resp.json()["data"]["token"]
-    session.headers.update({
-        "Token": token
-    })
-    extract_yaml("init_token", token)
+def _token_fixture(role):
+    """按角色生成会话级登录 fixture：令牌写入变量 <角色>_token，供 ${extract:<角色>_token} 使用"""
 
-    yield session
+    @pytest.fixture(scope='session', name=ROLE_FIXTURES[role])
+    def fixture():
+        session = login_role(role)
+        extract_yaml(f"{role}_token", session.headers["Token"])
 
-    session.close()
+        yield session
 
+        log_transport_stats(session, f"({role})")
+        session.close()
 
+    return fixture
+
+
+# config/roles.yaml 中的每个角色对应一个 get_<角色>_token fixture
+for _role in ROLE_FIXTURES:
+    globals()[ROLE_FIXTURES[_role]] = _token_fixture(_role)
 
 
 @pytest.fixture(scope='session',autouse=True)
@@ -88,7 +82,10 @@ def setup_and_teardown():
     logger = logging.getLogger("Hsyuan")
     logger.info("初始化配置中...测试会话即将开始...")
 
-    clear_extract_yaml()
+    # xdist 的 worker 共用同一个变量命名空间(每次运行新建)，只在非 worker 进程中清空，避免互相清掉已提取的变量；
+    # 运行结束后由主进程在 pytest_sessionfinish 中删除
+    if not os.environ.get("PYTEST_XDIST_WORKER"):
+        clear_extract_yaml()
     # 未获取公钥的情况下
     # get_public_key = TestLoginAPI()
     # get_public_key.test_get_public_key(read_yaml_list("data/test_data/login_public_key.yaml")[0])
@@ -98,6 +95,9 @@ def setup_and_teardown():
 
     logger.info("初始化配置完成,测试会话开始!")
     yield
+
+    log_transport_stats(get_default_session(), "(none)")
+    export_extract_yaml()
     logger.info("测试会话结束...关闭测试环境...")
 
 
@@ -1,8 +1,213 @@
+import argparse
+import logging
+
 import pytest
 import os
+import sys
+
+from utils.log_utils import setup_logging
+
+
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def run_pytest(args, pytest_args):
+    from common.config import RESULTS_FILE
+
+    # 与 common/result_plugin.py 一致：命令行中传给 pytest 的 --results 优先
+    results_parser = argparse.ArgumentParser(add_help=False)
+    results_parser.add_argument("--results", default=RESULTS_FILE)
+    results_file = results_parser.parse_known_args(pytest_args)[0].results
+
+    before = _mtime(results_file)
+    code = pytest.main(pytest_args)
+    # 由结果文件生成汇总与 HTML 报告，--allure 时再导出 Allure 结果并生成 Allure 报告；
+    # 本次没有执行用例(如 --collect-only)时结果文件不变，不重复生成
+    if results_file != "off" and _mtime(results_file) not in (None, before):
+        build_report(results_file, os.path.join(os.path.dirname(results_file), "report.html"),
+                     "temps" if args.allure else None)
+    elif args.allure:
+        print("本次没有写入用例结果，未生成 Allure 报告")
+    return code
+
+
+def build_report(results_file, html_file, allure_dir=None):
+    from common.report import summarize, format_summary, render_html, export_allure
+    from common.result_sink import read_results
+
+    results = read_results(results_file)
+    summary = summarize(results)
+    print(format_summary(summary))
+    if html_file:
+        with open(html_file, "w", encoding="utf-8") as f:
+            f.write(render_html(results, summary))
+        print(f"HTML 报告：{html_file}")
+    if allure_dir:
+        export_allure(results, allure_dir)
+        os.system(f"allure generate -o report -c {allure_dir}")
+
+
+def run_report(args):
+    build_report(args.results, args.html, args.allure)
+    return 0
+
+
+def run_async(args):
+    from common.async_runner import run_dirs
+
+    setup_logging("./logs/async_run.log", logging.INFO, mode="w")
+    results = run_dirs(args.dirs, args.concurrency, args.per_host)
+    failed = [r for r in results if not r.passed]
+    for r in failed:
+        print(f"❌ {r.name} ({r.title})\n{r.error}\n")
+    print(f"共执行 {len(results)} 个用例，通过 {len(results) - len(failed)} 个，失败 {len(failed)} 个")
+    return 1 if failed else 0
+
+
+def run_load(args):
+    from common.load_runner import run_load, parse_duration, parse_mix, format_report
+
+    # 压测时逐请求的 INFO 日志开销过大，只记录告警
+    setup_logging("./logs/load_run.log", logging.WARNING, mode="w")
+    stats, elapsed = run_load(
+        args.dirs, rate=args.rate, duration=parse_duration(args.duration), mix=parse_mix(args.mix),
+        mode=args.mode, workers=args.workers, processes=args.processes, check_rate=args.check_rate,
+        seed=args.seed, login_payloads=args.login_payloads)
+    print(format_report(stats, elapsed))
+    errors = sum(s.error_count for s in stats.values())
+    return 1 if errors else 0
+
+
+def run_impact(args):
+    import json
+
+    from common.impact import CaseIndex, select_cases
+    from utils.swagger_utils import fetch_swagger_doc, SWAGGER_URL
+
+    index = CaseIndex()
+    if args.index:
+        print(json.dumps(index.as_dict(), ensure_ascii=False, indent=2))
+        return 0
+    selection = select_cases(
+        index, base=args.base,
+        spec_old=fetch_swagger_doc(args.spec_old) if args.spec_old else None,
+        spec_new=fetch_swagger_doc(args.spec_new or SWAGGER_URL) if args.spec_old else None,
+        full=args.full)
+    print(selection.format())
+    for name in selection.names:
+        print(f"  {name}")
+    return 0
+
+
+def run_deps(args):
+    from common.async_runner import load_cases
+    from common.dependency import DependencyGraph
+
+    graph = DependencyGraph([(name, data) for name, data, _ in load_cases(args.dirs)])
+    print(graph.format_report())
+    return 1 if graph.missing or graph.cycles else 0
+
+
+def run_replay_server(args):
+    from common.cassette import CassetteStore, serve
+
+    serve(CassetteStore(args.dir, mode="replay"), args.host, args.port)
+    return 0
+
+
+def main():
+    # 不带子命令时运行 pytest，除 --allure 外的参数原样传给 pytest
+    run_parser = argparse.ArgumentParser(add_help=False)
+    run_parser.add_argument("--allure", action="store_true", help="pytest 运行结束后导出 Allure 结果并生成 Allure 报告")
+    parser = argparse.ArgumentParser(description="接口自动化测试启动入口，不带子命令时其余参数传给 pytest，"
+                                                 "如 python3 start.py --allure -n 4 --impact-base origin/main",
+                                     parents=[run_parser])
+    sub = parser.add_subparsers(dest="command")
+
+    async_parser = sub.add_parser("async", help="在单个事件循环中并发执行 YAML 用例")
+    async_parser.add_argument("dirs", nargs="*", default=[
+        "data/ai_testcases/admin", "data/ai_testcases/user", "data/ai_testcases/file"
+    ], help="用例目录，目录名决定登录角色")
+    async_parser.add_argument("--concurrency", type=int, default=None, help="全局最大在途请求数")
+    async_parser.add_argument("--per-host", type=int, default=None, help="单主机最大在途请求数")
+
+    load_parser = sub.add_parser("load", help="按目标 RPS 回放 YAML 用例进行压测")
+    load_parser.add_argument("dirs", nargs="*", default=[
+        "data/ai_testcases/admin", "data/ai_testcases/user", "data/ai_testcases/file"
+    ], help="用例目录，目录名决定登录角色")
+    load_parser.add_argument("--rate", type=float, default=None, help="目标 RPS，开环模式必填")
+    load_parser.add_argument("--duration", default="60s", help="压测时长，如 30s / 5m / 1h")
+    load_parser.add_argument("--mix", default=None, help="角色流量配比，如 admin:3,user:7，缺省按用例数")
+    load_parser.add_argument("--mode", choices=["open", "closed"], default="open",
+                             help="open: 按固定间隔发送；closed: 收到响应后再发下一个")
+    load_parser.add_argument("--workers", type=int, default=None, help="每个进程的工作线程数")
+    load_parser.add_argument("--processes", type=int, default=1, help="进程数，rate 均分到各进程")
+    load_parser.add_argument("--check-rate", type=float, default=1.0,
+                             help="执行完整断言的请求比例(0~1)，状态码始终校验")
+    load_parser.add_argument("--seed", type=int, default=None, help="用例抽取的随机种子")
+    load_parser.add_argument("--login-payloads", type=int, default=None,
+                             help="登录用例每个密码预先加密的密文数，0 表示不处理登录用例")
+
+    report_parser = sub.add_parser("report", help="由用例结果文件生成汇总与 HTML 报告")
+    report_parser.add_argument("--results", default=None, help="结果文件(.jsonl / .db)，默认 RESULTS_FILE")
+    report_parser.add_argument("--html", default=None, help="HTML 报告路径，默认与结果文件同目录的 report.html")
+    report_parser.add_argument("--allure", nargs="?", const="temps", default=None,
+                               help="导出 Allure 结果到该目录(默认 temps)并执行 allure generate")
+
+    impact_parser = sub.add_parser("impact", help="按 git 改动或 Swagger 文档差异列出受影响的用例")
+    impact_parser.add_argument("--base", default=None, help="git 基准版本，如 origin/main")
+    impact_parser.add_argument("--spec-old", default=None, help="旧 Swagger 文档(URL/文件/目录)")
+    impact_parser.add_argument("--spec-new", default=None,
+                               help="新 Swagger 文档，需与 --spec-old 一起使用，默认 SWAGGER_URL")
+    impact_parser.add_argument("--full", action="store_true", help="全量执行")
+    impact_parser.add_argument("--index", action="store_true", help="只输出 接口 -> 用例 索引")
+
+    deps_parser = sub.add_parser("deps", help="分析用例之间的变量依赖，报告依赖链、缺少生产者的变量与循环依赖")
+    deps_parser.add_argument("dirs", nargs="*", default=[
+        "data/ai_testcases/login", "data/ai_testcases/admin", "data/ai_testcases/user", "data/ai_testcases/file"
+    ], help="用例目录，按给出的顺序分析")
+
+    replay_parser = sub.add_parser("replay-server", help="按录制内容应答的本地替身服务")
+    replay_parser.add_argument("--dir", default=None, help="录制目录，默认 CASSETTE_DIR")
+    replay_parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    replay_parser.add_argument("--port", type=int, default=18080, help="监听端口")
+
+    argv = sys.argv[1:]
+    if (argv and argv[0] in sub.choices) or argv in (["-h"], ["--help"]):
+        args, pytest_args = parser.parse_args(argv), []
+    else:
+        args, pytest_args = run_parser.parse_known_args(argv)
+        args.command = None
+    if args.command == "report":
+        from common.config import RESULTS_FILE
+        args.results = args.results or RESULTS_FILE
+        args.html = args.html or os.path.join(os.path.dirname(args.results), "report.html")
+        raise SystemExit(run_report(args))
+    if args.command == "impact":
+        if args.spec_new and not args.spec_old:
+            impact_parser.error("--spec-new 需要与 --spec-old 一起使用")
+        raise SystemExit(run_impact(args))
+    if args.command == "deps":
+        raise SystemExit(run_deps(args))
+    if args.command == "replay-server":
+        from common.config import CASSETTE_DIR
+        args.dir = args.dir or CASSETTE_DIR
+        raise SystemExit(run_replay_server(args))
+    if args.command == "load":
+        from common.config import LOAD_WORKERS, LOAD_LOGIN_PAYLOADS
+        args.workers = args.workers or LOAD_WORKERS
+        if args.login_payloads is None:
+            args.login_payloads = LOAD_LOGIN_PAYLOADS
+        raise SystemExit(run_load(args))
+    if args.command == "async":
+        from common.config import ASYNC_MAX_IN_FLIGHT, ASYNC_PER_HOST_LIMIT
+        args.concurrency = args.concurrency or ASYNC_MAX_IN_FLIGHT
+        args.per_host = args.per_host or ASYNC_PER_HOST_LIMIT
+        raise SystemExit(run_async(args))
+    raise SystemExit(run_pytest(args, pytest_args))
+
 
 # 启动测试
 if __name__ == '__main__':
-    pytest.main()
-    # 生成测试报告
-    os.system("allure generate -o report -c temps")
+    main()
@@ -7,7 +7,7 @@ from common.api_utils import ApiRunner
 from common.config import PUBLIC_KEY
 from utils.allure_utils import AllureUtils
 from utils.data_utils import read_yaml, read_yaml_list
-from utils.rsa_utils import PasswordEncryptor
+from utils.rsa_utils import encrypt_password
 
 
 allure_utils = AllureUtils()
@@ -30,13 +30,9 @@ class TestLoginAPI:
         """测试登录接口"""
 
         test_data = copy.deepcopy(data)
-        encryptor = PasswordEncryptor()
         # public_key=read_yaml("config/extract.yaml")["publicKey"]
-        public_key = PUBLIC_KEY
-        pem_public_key = "-----BEGIN PUBLIC KEY-----" + public_key + "-----END PUBLIC KEY-----"
-        encryptor.set_public_key(pem_public_key)
-
-        test_data["steps"]["request"]["json"]["password"] = encryptor.encryptPassword(test_data["steps"]["request"]["json"]["password"])
+        # 共享加密器，公钥只解析一次
+        test_data["steps"]["request"]["json"]["password"] = encrypt_password(test_data["steps"]["request"]["json"]["password"], PUBLIC_KEY)
         test_data["steps"]["request"]["json"]["timestamp"] = int(time.time() * 1000)
 
         runner = ApiRunner(test_data)
@@ -1,6 +1,12 @@
 from typing import List
 
 import allure
+from allure_commons import plugin_manager
+
+
+def allure_enabled():
+    """allure-pytest 的结果监听器只在传入 --alluredir 时注册，未注册时 allure.dynamic.* 与 attach 都不会产生结果"""
+    return bool(plugin_manager.hook.add_title.get_hookimpls())
 
 
 class AllureUtils:
@@ -10,6 +16,8 @@ class AllureUtils:
                 动态加载Allure配置
                 :param conf: Allure配置字典
                 """
+        if not allure_enabled():
+            return
         # 基础字段映射：{配置键: allure动态方法}
         basic_mapping = {
             "title": allure.dynamic.title,
@@ -32,7 +40,8 @@ class AllureUtils:
                     for item in value:
                         method(item)
 
-
-
-
-
+    def attach_text(self, name, body):
+        """以文本附件形式添加到当前用例报告"""
+        if not allure_enabled():
+            return
+        allure.attach(body, name=name, attachment_type=allure.attachment_type.TEXT)
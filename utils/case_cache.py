@@ -0,0 +1,81 @@
+"""用例解析缓存：按文件路径 + mtime + 内容哈希缓存解析后的 YAML，多个 xdist worker 共享"""
+
+import hashlib
+import os
+import pickle
+import time
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # 未编译 libyaml 时退回纯 Python 解析器
+    from yaml import SafeLoader
+
+from common.config import CASE_CACHE, CASE_CACHE_DIR
+
+# 最近修改的文件 mtime 可能还会在同一时间刻度内再次变化，此时总是校验内容哈希
+_RECENT_SECONDS = 2
+
+_enabled = CASE_CACHE
+
+
+def set_enabled(enabled):
+    """开启/关闭用例缓存（pytest --case-cache=on/off）"""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    return _enabled
+
+
+def parse_yaml(content):
+    return yaml.load(content, Loader=SafeLoader)
+
+
+def _entry_path(file_path):
+    key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+    return os.path.join(CASE_CACHE_DIR, f"{key}.pickle")
+
+
+def _write_entry(entry_path, entry):
+    # 先写临时文件再原子替换，多个 worker 同时写入也不会读到半个文件
+    os.makedirs(CASE_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, entry_path)
+
+
+def load_yaml(file_path):
+    """读取 YAML 文件，命中缓存时直接反序列化，文件变化后自动失效"""
+    if not _enabled:
+        with open(file_path, "rb") as f:
+            return parse_yaml(f.read())
+
+    st = os.stat(file_path)
+    entry_path = _entry_path(file_path)
+    entry = None
+    try:
+        with open(entry_path, "rb") as f:
+            entry = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+
+    recent = time.time() - st.st_mtime < _RECENT_SECONDS
+    if entry is not None and not recent \
+            and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+        return entry["data"]
+
+    with open(file_path, "rb") as f:
+        content = f.read()
+    digest = hashlib.sha1(content).hexdigest()
+    if entry is not None and entry["hash"] == digest:
+        data = entry["data"]
+    else:
+        data = parse_yaml(content)
+
+    if entry is None or entry["hash"] != digest or entry["mtime_ns"] != st.st_mtime_ns:
+        _write_entry(entry_path, {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "hash": digest, "data": data})
+    return data
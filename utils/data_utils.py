@@ -1,13 +1,10 @@
 import csv
 import os
-import random
-import re
-import string
-import time
-import uuid
-import yaml
 import glob
 
+from utils.case_cache import load_yaml
+from utils.extract_store import get_store, EXTRACT_YAML_PATH
+from utils.template_utils import compile_template, render_template
 
 
 def read_csv(file_path):
@@ -29,70 +26,33 @@ def read_csv(file_path):
         return rows
 
 def read_yaml(file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        s = f.read()
-        data = yaml.safe_load(s)
-        return data
+    # 优先读取用例解析缓存，未命中时使用 C 版 YAML 解析器
+    return load_yaml(file_path)
 
 def read_yaml_list(file_path):
-    return list(read_yaml(file_path).values())
+    cases = list(read_yaml(file_path).values())
+    # 加载时预编译动态参数模板，运行时只需渲染
+    for case in cases:
+        compile_template(case)
+    return cases
 
 def extract_yaml(key,value):
-    with open("config/extract.yaml", 'a+', encoding='utf-8') as f:
-        data = {key:value}
-        yaml.dump(data,f,allow_unicode=True)
+    """保存提取变量到变量存储（不再逐条追加写 extract.yaml）"""
+    get_store().set(key, value)
 
 def clear_extract_yaml():
-    with open("config/extract.yaml", 'w', encoding='utf-8') as f:
+    get_store().clear()
+    with open(EXTRACT_YAML_PATH, 'w', encoding='utf-8') as f:
         f.write("")
 
+def export_extract_yaml(file_path=EXTRACT_YAML_PATH):
+    """把变量存储导出为 extract.yaml，便于人工查看"""
+    get_store().export_yaml(file_path)
 
-def resolve_dynamic_params(data):
-    """解析动态参数，如 ${timestamp}, ${random}, ${env:VAR} 等"""
-    if isinstance(data, dict):
-        return {k: resolve_dynamic_params(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [resolve_dynamic_params(item) for item in data]
-    elif isinstance(data, str):
-        return _replace_params(data)
-    return data
-
-
-def _replace_params(text):
-    """替换单个字符串中的动态参数"""
-    if not isinstance(text, str):
-        return text
-
-    # ${timestamp} - 秒级时间戳
-    text = re.sub(r'\$\{timestamp\}', str(int(time.time())), text)
-    # ${timestamp_ms} - 毫秒时间戳
-    text = re.sub(r'\$\{timestamp_ms\}', str(int(time.time() * 1000)), text)
-    # ${date} - 当前日期
-    text = re.sub(r'\$\{date\}', time.strftime("%Y-%m-%d"), text)
-    # ${datetime} - 当前日期时间
-    text = re.sub(r'\$\{datetime\}', time.strftime("%Y-%m-%d %H:%M:%S"), text)
-    # ${random} - 6位随机字符串
-    text = re.sub(r'\$\{random\}', ''.join(random.choices(string.ascii_letters + string.digits, k=6)), text)
-    # ${random_int} - 随机整数
-    text = re.sub(r'\$\{random_int\}', str(random.randint(100000, 999999)), text)
-    # ${uuid} - UUID
-    text = re.sub(r'\$\{uuid\}', str(uuid.uuid4()), text)
-    # ${env:VAR} - 环境变量
-    text = re.sub(r'\$\{env:([^}]+)\}', lambda m: os.environ.get(m.group(1), ''), text)
-    # ${extract:VAR} - 从 extract.yaml 读取变量
-    text = re.sub(r'\$\{extract:([^}]+)\}', _get_extract_var, text)
 
-    return text
-
-
-def _get_extract_var(match):
-    """从 extract.yaml 获取变量值"""
-    var_name = match.group(1)
-    try:
-        extract_data = read_yaml("config/extract.yaml")
-        return str(extract_data.get(var_name, ''))
-    except Exception:
-        return ''
+def resolve_dynamic_params(data):
+    """解析动态参数，如 ${timestamp}, ${random}, ${env:VAR} 等，占位符见 utils/template_utils.py"""
+    return render_template(data)
 
 
 def get_testcases(test_dir):
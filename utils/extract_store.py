@@ -0,0 +1,133 @@
+"""提取变量存储：内存字典为默认实现，可选 SQLite 共享后端供 pytest-xdist 多进程共用"""
+
+import json
+import os
+import sqlite3
+import threading
+
+import yaml
+
+from common.config import EXTRACT_BACKEND, EXTRACT_DB_PATH
+
+EXTRACT_YAML_PATH = "config/extract.yaml"
+
+
+def _default_namespace():
+    """同一次 xdist 运行的所有 worker 共享 testrunuid，天然隔离不同会话"""
+    return os.getenv("EXTRACT_NAMESPACE") or os.getenv("PYTEST_XDIST_TESTRUNUID") or "default"
+
+
+class MemoryBackend:
+    """进程内字典后端，值按原始类型保存"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace, key, default=None):
+        return self._data.get(namespace, {}).get(key, default)
+
+    def set(self, namespace, key, value):
+        with self._lock:
+            self._data.setdefault(namespace, {})[key] = value
+
+    def items(self, namespace):
+        return dict(self._data.get(namespace, {}))
+
+    def clear(self, namespace):
+        with self._lock:
+            self._data.pop(namespace, None)
+
+
+class SqliteBackend:
+    """
+    SQLite 文件后端，依赖 SQLite 自身的文件锁保证多进程写入安全，
+    值以 JSON 保存以保留 int/float/bool/list/dict 等类型
+    """
+
+    def __init__(self, db_path=EXTRACT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS extract ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+
+    def _conn(self):
+        # sqlite3 连接不能跨线程使用，每个线程各持有一个
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace, key, default=None):
+        row = self._conn().execute(
+            "SELECT value FROM extract WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, namespace, key, value):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extract (namespace, key, value) VALUES (?, ?, ?)",
+                (namespace, key, json.dumps(value, ensure_ascii=False, default=str)),
+            )
+
+    def items(self, namespace):
+        rows = self._conn().execute(
+            "SELECT key, value FROM extract WHERE namespace = ?", (namespace,)
+        ).fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+    def clear(self, namespace):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM extract WHERE namespace = ?", (namespace,))
+
+
+class ExtractStore:
+    """按命名空间隔离的提取变量存储"""
+
+    def __init__(self, backend=None, namespace=None):
+        self.backend = backend or MemoryBackend()
+        self.namespace = namespace or _default_namespace()
+
+    def get(self, key, default=None):
+        return self.backend.get(self.namespace, key, default)
+
+    def set(self, key, value):
+        self.backend.set(self.namespace, key, value)
+
+    def items(self):
+        return self.backend.items(self.namespace)
+
+    def clear(self):
+        self.backend.clear(self.namespace)
+
+    def export_yaml(self, file_path=EXTRACT_YAML_PATH):
+        """导出当前命名空间的变量为 YAML 文件（先写临时文件再替换，避免多进程写出半个文件）"""
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            yaml.dump(self.items(), f, allow_unicode=True)
+        os.replace(tmp_path, file_path)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """获取进程级变量存储单例，后端由环境变量 EXTRACT_BACKEND 决定"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = SqliteBackend() if EXTRACT_BACKEND == "sqlite" else MemoryBackend()
+                _store = ExtractStore(backend)
+    return _store
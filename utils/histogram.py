@@ -0,0 +1,87 @@
+"""
+HDR 风格的耗时直方图：对数-线性分桶，以微秒为单位记录，
+任意量级下相对误差都不超过 1 / 2^(sub_bits-1)（默认 8 位即 <1%），内存只与出现过的桶数有关，可跨线程/进程合并
+"""
+
+
+class LatencyHistogram:
+
+    def __init__(self, sub_bits=8):
+        """
+        :param sub_bits: 每个量级内的子桶位数，值越大精度越高
+        """
+        self.sub_bits = sub_bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        # 小于 2^sub_bits 的值逐一分桶；更大的值每翻一倍共用 2^(sub_bits-1) 个桶
+        shift = max(value.bit_length() - self.sub_bits, 0)
+        return (shift << (self.sub_bits - 1)) + (value >> shift)
+
+    def _highest_equivalent(self, index):
+        """桶内最大值，百分位数按 HDR 惯例返回该值，保证不低估"""
+        half = 1 << (self.sub_bits - 1)
+        if index < (half << 1):
+            return index
+        shift = (index >> (self.sub_bits - 1)) - 1
+        return ((index - (shift << (self.sub_bits - 1))) << shift) + (1 << shift) - 1
+
+    def record(self, ms, count=1):
+        """记录一个耗时(毫秒)"""
+        value = max(int(ms * 1000), 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        if other.sub_bits != self.sub_bits:
+            raise ValueError("直方图精度不同，无法合并")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def percentile(self, p):
+        """百分位耗时(毫秒)，无数据时返回 None"""
+        if not self.count:
+            return None
+        target = max(int(self.count * p / 100 + 0.5), 1) if p < 100 else self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max) / 1000
+        return self.max / 1000
+
+    @property
+    def mean(self):
+        return self.total / self.count / 1000 if self.count else None
+
+    def to_dict(self):
+        """可序列化形式，用于多进程汇总"""
+        return {"sub_bits": self.sub_bits, "counts": self.counts, "count": self.count,
+                "total": self.total, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data["sub_bits"])
+        hist.counts = {int(k): v for k, v in data["counts"].items()}
+        hist.count = data["count"]
+        hist.total = data["total"]
+        hist.min = data["min"]
+        hist.max = data["max"]
+        return hist
@@ -0,0 +1,164 @@
+"""增量 JSON 解析：按块读取响应体，指定路径上的数组逐项回调，不在内存中保留整个列表"""
+
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_TAIL = "0123456789.eE+-"
+
+
+class StreamedList(list):
+    """
+    流式解析过的数组占位：只保留前 keep 项，count 为实际元素总数，
+    path 为该数组在文档中的路径，如 ("data", "records")
+    """
+
+    def __init__(self, path, count=0):
+        super().__init__()
+        self.path = path
+        self.count = count
+
+
+class _Reader:
+    def __init__(self, chunks, preview_limit):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.preview_limit = preview_limit
+        self.preview = []
+        self.preview_size = 0
+        self.total = 0
+
+    def _fill(self, min_size=0):
+        """读取更多数据，直到缓冲区新增至少 min_size 个字符；已到末尾返回 False"""
+        if self.eof:
+            return False
+        parts = [self.buf[self.pos:]]
+        added = 0
+        while True:
+            try:
+                chunk = next(self.chunks)
+            except StopIteration:
+                parts.append(self.decoder.decode(b"", final=True))
+                self.eof = True
+                break
+            text = self.decoder.decode(chunk)
+            self.total += len(chunk)
+            if self.preview_size < self.preview_limit:
+                keep = text[:self.preview_limit - self.preview_size]
+                self.preview.append(keep)
+                self.preview_size += len(keep)
+            parts.append(text)
+            added += len(text)
+            if added >= min_size and added:
+                break
+        self.buf = "".join(parts)
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                raise ValueError("JSON 数据不完整")
+
+    def advance(self):
+        self.pos += 1
+
+    def read_value(self):
+        """解析一个完整的 JSON 值，数据不够时按缓冲区大小成倍读取，避免大值反复重解析"""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill(max(len(self.buf) - self.pos, 1)):
+                    raise
+                continue
+            # 数字位于缓冲区末尾附近时可能还没读完（如 12 后面还有 3、-25 后面还有 .0）
+            if not self.eof and isinstance(obj, (int, float)) and not isinstance(obj, bool) \
+                    and (end == len(self.buf) or self.buf[end] in _NUMBER_TAIL):
+                if self._fill(1):
+                    continue
+            self.pos = end
+            return obj
+
+
+def _parse(reader, path, prefixes, handlers, keep):
+    ch = reader.peek()
+    if ch == "{" and path in prefixes:
+        reader.advance()
+        obj = {}
+        if reader.peek() == "}":
+            reader.advance()
+            return obj
+        while True:
+            key = reader.read_value()
+            if reader.peek() != ":":
+                raise ValueError(f"JSON 格式错误：键 {key!r} 后缺少冒号")
+            reader.advance()
+            obj[key] = _parse(reader, path + (key,), prefixes, handlers, keep)
+            ch = reader.peek()
+            reader.advance()
+            if ch == "}":
+                return obj
+            if ch != ",":
+                raise ValueError(f"JSON 格式错误：对象中出现意外字符 {ch!r}")
+
+    if ch == "[" and path in handlers:
+        reader.advance()
+        handler = handlers[path]
+        streamed = StreamedList(path)
+        if reader.peek() == "]":
+            reader.advance()
+            return streamed
+        idx = 0
+        while True:
+            item = reader.read_value()
+            handler(idx, item)
+            if idx < keep:
+                streamed.append(item)
+            idx += 1
+            ch = reader.peek()
+            reader.advance()
+            if ch == "]":
+                streamed.count = idx
+                return streamed
+            if ch != ",":
+                raise ValueError(f"JSON 格式错误：数组中出现意外字符 {ch!r}")
+
+    return reader.read_value()
+
+
+def stream_parse(chunks, handlers, keep=0, preview_limit=0):
+    """
+    增量解析 JSON 文档
+    :param chunks: bytes 块迭代器，如 resp.iter_content(65536)
+    :param handlers: {路径元组: handler(idx, item)}，路径上的数组逐项回调且不整体保留
+    :param keep: 每个流式数组保留的前几项，供 assert / 日志使用
+    :param preview_limit: 保留的原始响应体字符数上限，供日志和报告展示
+    :return: (文档骨架, 响应体预览, 响应体字节数)
+    """
+    prefixes = set()
+    for path in handlers:
+        for i in range(len(path)):
+            prefixes.add(path[:i])
+    reader = _Reader(chunks, preview_limit)
+    doc = _parse(reader, (), prefixes, handlers, keep)
+    # 读完剩余数据，确认文档后面没有多余内容
+    while True:
+        rest = reader.buf[reader.pos:].strip(_WHITESPACE)
+        if rest:
+            raise ValueError("JSON 文档之后存在多余数据")
+        reader.pos = len(reader.buf)
+        if not reader._fill():
+            break
+    return doc, "".join(reader.preview), reader.total
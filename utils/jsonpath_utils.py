@@ -0,0 +1,57 @@
+"""JSONPath 预编译：常见的点号/下标/通配表达式编译为直接取值，结果与 jsonpath 包完全一致"""
+
+import re
+from functools import lru_cache
+
+import jsonpath
+
+# 需要 jsonpath 包自身实现的写法：递归 ..、过滤 ?()、脚本 ()、切片、并集、键名 !
+_SLICE = re.compile(r'(-?[0-9]*):(-?[0-9]*):?(-?[0-9]*)$')
+
+
+def _is_simple(loc):
+    return loc not in ("..", "!") and not loc.startswith("(") and not loc.startswith("?(") \
+        and not _SLICE.match(loc) and "," not in loc
+
+
+@lru_cache(maxsize=1024)
+def compile_jsonpath(expr):
+    """
+    编译 JSONPath 表达式，返回 find(obj)：匹配时返回值列表，否则返回 False（与 jsonpath.jsonpath 相同）
+    不支持的写法退回 jsonpath 包逐次解释执行
+    """
+    if not expr:
+        return lambda obj: False
+
+    cleaned = jsonpath.normalize(expr)
+    if cleaned.startswith("$;"):
+        cleaned = cleaned[2:]
+    steps = cleaned.split(";")
+    if not all(_is_simple(loc) for loc in steps):
+        return lambda obj: jsonpath.jsonpath(obj, expr)
+
+    steps = [(loc, int(loc) if loc.isdigit() else None) for loc in steps]
+
+    def find(obj):
+        if not obj:
+            return False
+        current = [obj]
+        for loc, idx in steps:
+            matched = []
+            for node in current:
+                if loc == "*":
+                    if isinstance(node, list):
+                        matched.extend(node)
+                    elif isinstance(node, dict):
+                        matched.extend(node.values())
+                elif isinstance(node, dict):
+                    if loc in node:
+                        matched.append(node[loc])
+                elif isinstance(node, list) and idx is not None and idx < len(node):
+                    matched.append(node[idx])
+            if not matched:
+                return False
+            current = matched
+        return current
+
+    return find
@@ -0,0 +1,155 @@
+"""
+"Hsyuan" 日志：记录先放入队列，由后台线程格式化并写文件，测试线程只做入队
+- 请求/响应体用 LogBody 包装，写出时才序列化；长列表只保留前几项，超长文本截断
+- LOG_FORMAT=json 时按行输出 JSON，便于程序处理
+- LOG_ASYNC=off 时在测试线程中同步写文件（排查日志丢失等问题时使用）
+- 记录仍会传给根日志器，失败用例的 "Captured log call" 与 allure 的 log 附件照常可用；
+  pytest 的捕获处理器会在测试线程中格式化每条记录，大规模运行不需要这些时可设 LOG_PROPAGATE=off
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+from common.config import (LOG_FILE, LOG_LEVEL, LOG_FORMAT, LOG_ASYNC, LOG_BODY_LIMIT, LOG_LIST_SAMPLE,
+                           LOG_PROPAGATE)
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+logger = logging.getLogger("Hsyuan")
+
+
+def _sample(data, sample):
+    if isinstance(data, dict):
+        return {k: _sample(v, sample) for k, v in data.items()}
+    if isinstance(data, (list, tuple)):
+        if sample and len(data) > sample:
+            return [_sample(v, sample) for v in data[:sample]] + [f"...共 {len(data)} 项"]
+        return [_sample(v, sample) for v in data]
+    return data
+
+
+def format_body(data, limit=LOG_BODY_LIMIT, sample=LOG_LIST_SAMPLE):
+    """请求/响应体 -> 日志文本：长列表抽样，超过 limit 个字符时截断"""
+    if isinstance(data, (bytes, bytearray)):
+        text = f"<{len(data)} 字节>"
+    elif isinstance(data, str):
+        text = data
+    else:
+        text = json.dumps(_sample(data, sample), ensure_ascii=False, default=str)
+    if limit and len(text) > limit:
+        return f"{text[:limit]}...(共 {len(text)} 字符，已截断)"
+    return text
+
+
+class LogBody:
+    """延迟格式化的请求/响应体：logger.info("resp.json: %s", LogBody(data))，日志级别不够时不会序列化"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return format_body(self.data)
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志一行 JSON"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _LazyQueueHandler(QueueHandler):
+    """入队时不格式化，消息连同参数交给后台线程再拼接"""
+
+    def prepare(self, record):
+        return record
+
+
+_listener = None
+_handler = None
+_file_handler = None
+_lock = threading.Lock()
+
+
+def _start(file_handler):
+    global _listener, _handler
+    if LOG_ASYNC:
+        records = queue.SimpleQueue()
+        _listener = QueueListener(records, file_handler, respect_handler_level=True)
+        _listener.start()
+        _handler = _LazyQueueHandler(records)
+    else:
+        _handler = file_handler
+    logger.addHandler(_handler)
+
+
+def setup_logging(path, level=LOG_LEVEL, mode="a", fmt=LOG_FORMAT):
+    """
+    为 "Hsyuan" 日志器配置文件输出，重复调用时先关闭上一次的配置
+    :param path: 日志文件
+    :param mode: w 覆盖 / a 追加
+    :param fmt: text / json
+    """
+    global _file_handler
+    with _lock:
+        _stop()
+        if _file_handler is not None:
+            _file_handler.close()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _file_handler = logging.FileHandler(path, mode=mode, encoding="utf-8")
+        _file_handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT, DATE_FORMAT))
+        logger.setLevel(level)
+        logger.propagate = LOG_PROPAGATE
+        _start(_file_handler)
+
+
+def _stop():
+    global _listener, _handler
+    if _handler is not None:
+        logger.removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def shutdown_logging():
+    """写完队列中剩余的日志并关闭文件"""
+    global _file_handler
+    with _lock:
+        _stop()
+        if _file_handler is not None:
+            _file_handler.close()
+            _file_handler = None
+
+
+def _restart_in_child():
+    # fork 出的子进程(压测多进程)没有后台线程，换一个新队列与线程，继续写同一个文件
+    global _listener, _handler
+    if _file_handler is not None and LOG_ASYNC:
+        logger.removeHandler(_handler)
+        _listener = _handler = None
+        _start(_file_handler)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_in_child)
+atexit.register(shutdown_logging)
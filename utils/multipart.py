@@ -0,0 +1,219 @@
+"""
+流式 multipart/form-data 请求体：文件按块读取、合成数据边发送边生成，内存占用与文件大小无关
+
+YAML 中的 files 写法：
+    files:
+      path: "docx/项目1.docx"            # 磁盘文件
+    files:
+      size: 2GB                         # 合成数据，不落盘
+      pattern: random                   # random / zeros / text
+      seed: 42                          # random 的随机种子，相同种子内容相同
+      filename: big.bin                 # 可选，缺省 synthetic-<size>.bin
+    公共可选项：field（表单字段名，默认 file）、content_type（默认按文件名/内容识别）；
+    多个文件时 files 写成列表
+"""
+
+import mimetypes
+import os
+import random
+import re
+import time
+import uuid
+
+_SIZE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?i?B?)\s*$', re.IGNORECASE)
+_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+_SNIFF_SIZE = 16
+_MAGIC = [
+    (b"%PDF", "application/pdf"),
+    (b"\x89PNG", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"PK\x03\x04", "application/zip"),
+]
+_TEXT = (b"The quick brown fox jumps over the lazy dog. 0123456789\n" * 300)[:16384]
+
+
+def parse_size(value):
+    """2GB / 512KB / 10MiB / 1024 -> 字节数（按 1024 进制）"""
+    if isinstance(value, int):
+        return value
+    m = _SIZE.match(str(value))
+    if not m:
+        raise ValueError(f"无法识别的大小: {value}")
+    unit = m.group(2).upper().replace("I", "").replace("B", "")
+    return int(float(m.group(1)) * _UNITS[unit])
+
+
+def guess_content_type(filename, head=b""):
+    """先按扩展名识别，识别不了再看文件头，都不行时为 application/octet-stream"""
+    content_type = mimetypes.guess_type(filename)[0]
+    if content_type:
+        return content_type
+    for magic, magic_type in _MAGIC:
+        if head.startswith(magic):
+            return magic_type
+    return "application/octet-stream"
+
+
+class FileSource:
+    """磁盘文件，按需打开、按块读取"""
+
+    def __init__(self, path):
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.size = os.path.getsize(path)
+        self._file = None
+
+    def head(self):
+        with open(self.path, "rb") as f:
+            return f.read(_SNIFF_SIZE)
+
+    def read(self, n):
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        return self._file.read(n)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SyntheticSource:
+    """
+    合成数据：边读边生成，不写临时文件
+    :param pattern: random 伪随机字节(不可压缩) / zeros 全零 / text 重复的 ASCII 文本
+    """
+
+    def __init__(self, size, pattern="random", seed=None, filename=None):
+        if pattern not in ("random", "zeros", "text"):
+            raise ValueError(f"不支持的合成数据类型: {pattern}")
+        self.size = parse_size(size)
+        self.pattern = pattern
+        self.seed = seed
+        self.filename = filename or f"synthetic-{size}.bin".replace(" ", "")
+        self._rng = random.Random(seed)
+        self._pos = 0
+
+    def head(self):
+        return b""
+
+    def read(self, n):
+        n = min(n, self.size - self._pos)
+        if n <= 0:
+            return b""
+        if self.pattern == "random":
+            chunk = self._rng.randbytes(n)
+        elif self.pattern == "zeros":
+            chunk = bytes(n)
+        else:
+            offset = self._pos % len(_TEXT)
+            chunk = (_TEXT[offset:] + _TEXT * (n // len(_TEXT) + 1))[:n]
+        self._pos += n
+        return chunk
+
+    def close(self):
+        pass
+
+
+def make_source(spec):
+    """YAML 中的单个文件配置 -> FileSource / SyntheticSource"""
+    if spec.get("path"):
+        return FileSource(spec["path"])
+    if spec.get("size") is not None:
+        return SyntheticSource(spec["size"], spec.get("pattern", "random"), spec.get("seed"), spec.get("filename"))
+    raise ValueError(f"files 需要 path 或 size: {spec}")
+
+
+def _quote(value):
+    # 与 urllib3 一致：换行与双引号转义，非 ASCII 按 UTF-8 原样发送
+    return str(value).translate({10: "%0A", 13: "%0D", 34: "%22"})
+
+
+class StreamingMultipart:
+    """
+    流式 multipart 请求体，作为 requests 的 data 传入：
+    有 __len__ 所以 requests 会带上 Content-Length，urllib3 通过 read() 按块发送
+    :param files: YAML 中的 files 配置（字典或字典列表）
+    :param fields: 普通表单字段 {名称: 值}
+    """
+
+    def __init__(self, files, fields=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        specs = files if isinstance(files, list) else [files]
+
+        # 各段按顺序排列：bytes 为固定内容，source 为文件内容
+        self._parts = []
+        for name, value in (fields or {}).items():
+            self._parts.append(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+                .encode("utf-8") + str(value).encode("utf-8") + b"\r\n")
+        self.sources = []
+        for spec in specs:
+            source = make_source(spec)
+            self.sources.append(source)
+            content_type = spec.get("content_type") or guess_content_type(source.filename, source.head())
+            self._parts.append(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{_quote(spec.get("field", "file"))}"; '
+                f'filename="{_quote(source.filename)}"\r\nContent-Type: {content_type}\r\n\r\n'.encode("utf-8"))
+            self._parts.append(source)
+            self._parts.append(b"\r\n")
+        self._parts.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+
+        self.length = sum(p.size if not isinstance(p, bytes) else len(p) for p in self._parts)
+        self.sent = 0
+        self.started_at = None
+        self.finished_at = None
+        self._index = 0
+        self._buffer = b""
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(65536)
+            if not chunk:
+                return
+            yield chunk
+
+    def read(self, n=-1):
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        if n is None or n < 0:
+            n = self.length - self.sent
+        out = []
+        remaining = n
+        while remaining > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, bytes):
+                if not self._buffer:
+                    self._buffer = part
+                chunk, self._buffer = self._buffer[:remaining], self._buffer[remaining:]
+                if not self._buffer:
+                    self._index += 1
+            else:
+                chunk = part.read(remaining)
+                if not chunk:
+                    part.close()
+                    self._index += 1
+                    continue
+            out.append(chunk)
+            remaining -= len(chunk)
+        data = b"".join(out)
+        self.sent += len(data)
+        if self.sent >= self.length and self.finished_at is None:
+            self.finished_at = time.perf_counter()
+        return data
+
+    def close(self):
+        for source in self.sources:
+            source.close()
+
+    @property
+    def upload_seconds(self):
+        """从开始读取到最后一个字节交给 socket 的耗时"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
@@ -0,0 +1,36 @@
+"""令牌桶限流：多个线程共用，按固定速率补充令牌，允许一定的突发"""
+
+import threading
+import time
+
+
+class TokenBucket:
+
+    def __init__(self, rate, capacity=None):
+        """
+        :param rate: 每秒补充的令牌数
+        :param capacity: 桶容量（允许的突发请求数），默认等于 max(rate, 1)
+        """
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """取令牌，不足时阻塞等待（等待期间不占锁）"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
@@ -1,12 +1,120 @@
+import base64
+import hashlib
 import random
 import string
 import json
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.backends import default_backend
 from cryptography.exceptions import InvalidKey
 
+_PEM_HEADER = "-----BEGIN PUBLIC KEY-----"
+_PEM_FOOTER = "-----END PUBLIC KEY-----"
+_CHAR_SET = string.digits + string.ascii_lowercase
+
+
+def to_pem(public_key):
+    """.env 中的公钥只有 Base64 主体，补上 PEM 头尾；已是 PEM 格式时原样返回"""
+    if _PEM_HEADER in public_key:
+        return public_key
+    return _PEM_HEADER + public_key + _PEM_FOOTER
+
+
+def key_fingerprint(public_key):
+    """公钥指纹：去掉 PEM 头尾与空白后的 Base64 主体的 SHA-256，同一公钥的不同排版得到相同指纹"""
+    body = public_key.replace(_PEM_HEADER, "").replace(_PEM_FOOTER, "")
+    return hashlib.sha256("".join(body.split()).encode("utf-8")).hexdigest()
+
+
+class RSAEncryptor:
+    """RSA公钥加密（PKCS#1 v1.5填充），PEM 只在创建时解析一次"""
+
+    def __init__(self, public_key):
+        """
+        :param public_key: RSA公钥字符串（PEM格式）
+        """
+        self.fingerprint = key_fingerprint(public_key)
+        # 将PEM格式公钥字符串解析为公钥对象
+        try:
+            self.public_key = serialization.load_pem_public_key(
+                public_key.encode('utf-8'),
+                backend=default_backend()
+            )
+        except (InvalidKey, ValueError):
+            raise ValueError("公钥格式无效（请提供PEM格式的RSA公钥）")
+
+    def encrypt(self, data):
+        # 加密（RSA加密长度有限，若数据过长需分段，此处为基础示例）
+        encrypted = self.public_key.encrypt(
+            data.encode('utf-8'),
+            padding.PKCS1v15()
+        )
+        # 返回Base64编码的加密结果（方便传输，和前端加密结果格式一致）
+        return base64.b64encode(encrypted).decode('utf-8')
+
+
+# 进程内共享的加密器：{公钥指纹: RSAEncryptor}
+_ENCRYPTORS = {}
+_ENCRYPTORS_LOCK = threading.Lock()
+
+
+def get_encryptor(public_key):
+    """按公钥指纹返回进程内共享的加密器，同一公钥只解析一次"""
+    fingerprint = key_fingerprint(public_key)
+    encryptor = _ENCRYPTORS.get(fingerprint)
+    if encryptor is None:
+        with _ENCRYPTORS_LOCK:
+            encryptor = _ENCRYPTORS.get(fingerprint)
+            if encryptor is None:
+                encryptor = _ENCRYPTORS[fingerprint] = RSAEncryptor(public_key)
+    return encryptor
+
+
+def generate_random_str():
+    """生成26位随机字符串（数字+小写字母），复刻JS逻辑"""
+    return ''.join(random.choices(_CHAR_SET, k=26))
+
+
+def password_payload(password):
+    """待加密的明文：密码 + 随机串 + 毫秒时间戳，序列化方式与JS的JSON.stringify一致"""
+    data_to_encrypt = {
+        "password": password,
+        "random": generate_random_str(),
+        "timestamp": int(time.time() * 1000)  # 毫秒级时间戳，对应JS的Date.now()
+    }
+    # ensure_ascii=False：避免中文转义；separators：去除多余空格，和JS一致
+    return json.dumps(data_to_encrypt, ensure_ascii=False, separators=(',', ':'))
+
+
+def encrypt_password(password, public_key):
+    """使用共享加密器加密密码，每次调用生成新的 random 与 timestamp"""
+    return get_encryptor(to_pem(public_key)).encrypt(password_payload(password))
+
+
+def _encrypt_chunk(password, public_key, count):
+    # 子进程中同样只解析一次公钥
+    encryptor = get_encryptor(public_key)
+    return [encryptor.encrypt(password_payload(password)) for _ in range(count)]
+
+
+def batch_encrypt_passwords(password, public_key, count, processes=None, chunk_size=64):
+    """
+    批量预加密：在进程池中生成 count 个密文，每个密文的 random 与 timestamp 各不相同，
+    供压测提前备好登录请求，避免客户端加密成为吞吐瓶颈
+    :param processes: 进程数，默认 CPU 核数；为 1 时在当前进程中加密
+    :return: 密文列表
+    """
+    public_key = to_pem(public_key)
+    if processes == 1 or count <= chunk_size:
+        return _encrypt_chunk(password, public_key, count)
+    chunks = [min(chunk_size, count - i) for i in range(0, count, chunk_size)]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = executor.map(_encrypt_chunk, [password] * len(chunks), [public_key] * len(chunks), chunks)
+        return [cipher for chunk in results for cipher in chunk]
+
 
 class PasswordEncryptor:
     """密码加密类"""
@@ -16,39 +124,13 @@ class PasswordEncryptor:
         :param public_key: RSA公钥字符串（PEM格式），可选，后续可通过set_public_key设置
         """
         self.publicKey = public_key  # 对应JS的this.publicKey
-        self.encryptor = self._init_rsa_encryptor()  # 加密器实例（可替换为自定义加密逻辑）
-
-    def _init_rsa_encryptor(self):
-        """初始化RSA加密器"""
-
-        class RSAEncryptor:
-            def __init__(self, parent):
-                self.parent = parent  # 引用外部类实例
-
-            def encrypt(self, data):
-                """RSA公钥加密实现（PKCS#1 v1.5填充）"""
-                if not self.parent.publicKey:
-                    raise ValueError("公钥未初始化")
-
-                # 将PEM格式公钥字符串解析为公钥对象
-                try:
-                    public_key = serialization.load_pem_public_key(
-                        self.parent.publicKey.encode('utf-8'),
-                        backend=default_backend()
-                    )
-                except InvalidKey:
-                    raise ValueError("公钥格式无效（请提供PEM格式的RSA公钥）")
-
-                # 加密（RSA加密长度有限，若数据过长需分段，此处为基础示例）
-                encrypted = public_key.encrypt(
-                    data.encode('utf-8'),
-                    padding.PKCS1v15()
-                )
-                # 返回Base64编码的加密结果（方便传输，和前端加密结果格式一致）
-                import base64
-                return base64.b64encode(encrypted).decode('utf-8')
-
-        return RSAEncryptor(self)
+
+    @property
+    def encryptor(self):
+        """按当前公钥取共享加密器"""
+        if not self.publicKey:
+            raise ValueError("公钥未初始化")
+        return get_encryptor(self.publicKey)
 
     def set_public_key(self, public_key):
         """设置公钥"""
@@ -56,8 +138,7 @@ class PasswordEncryptor:
 
     def generate_random_str(self):
         """生成26位随机字符串（数字+小写字母），复刻JS逻辑"""
-        char_set = string.digits + string.ascii_lowercase
-        return ''.join(random.choice(char_set) for _ in range(26))
+        return generate_random_str()
 
     def encryptPassword(self, password):
         """
@@ -69,20 +150,8 @@ class PasswordEncryptor:
         if not self.publicKey:
             raise ValueError("公钥未初始化")
 
-        # 2. 生成26位随机字符串
-        random_str = self.generate_random_str()
-
-        # 3. 组装数据并序列化为JSON（和JS的JSON.stringify行为一致）
-        data_to_encrypt = {
-            "password": password,
-            "random": random_str,
-            "timestamp": int(time.time() * 1000)  # 毫秒级时间戳，对应JS的Date.now()
-        }
-        # ensure_ascii=False：避免中文转义；separators：去除多余空格，和JS一致
-        json_str = json.dumps(data_to_encrypt, ensure_ascii=False, separators=(',', ':'))
-
-        # 4. 调用加密器加密并返回
-        return self.encryptor.encrypt(json_str)
+        # 2. 组装数据(含26位随机字符串与时间戳)并序列化为JSON，调用共享加密器加密并返回
+        return self.encryptor.encrypt(password_payload(password))
 
 
 # ------------------- 测试示例 -------------------
@@ -105,4 +174,3 @@ if __name__ == "__main__":
         print("加密结果：", encrypted_result)
     except Exception as e:
         print("加密失败：", str(e))
-
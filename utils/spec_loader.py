@@ -0,0 +1,193 @@
+"""
+接口文档加载：支持 URL、本地 JSON/YAML 文件、目录（目录下所有文档合并为一份）
+- URL 带 ETag / Last-Modified 条件请求，304 时直接使用磁盘缓存；服务不可用时回退到缓存，可离线运行
+- 解析后的文档以 pickle 缓存，文档未变化时跳过 JSON/YAML 解析；安装了 orjson 时用它解析 JSON
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from urllib.parse import urlparse
+
+import requests
+import yaml
+from requests.exceptions import RequestException
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SPEC_CACHE_DIR = os.getenv("SPEC_CACHE_DIR", ".cache/swagger")
+SPEC_EXTENSIONS = (".json", ".yaml", ".yml")
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _is_yaml(name: str, content_type: str = "") -> bool:
+    return name.lower().endswith((".yaml", ".yml")) or "yaml" in content_type.lower()
+
+
+def parse_spec(raw: bytes, is_yaml: bool = False) -> dict:
+    """
+    解析文档原始内容
+    :raises RuntimeError: 不是合法的 JSON/YAML 对象时抛出
+    """
+    try:
+        if is_yaml:
+            doc = yaml.load(raw, Loader=_YAML_LOADER)
+        elif orjson is not None:
+            doc = orjson.loads(raw)
+        else:
+            doc = json.loads(raw)
+    except (ValueError, yaml.YAMLError) as e:
+        raise RuntimeError(f"接口文档解析失败！内容不是合法的{'YAML' if is_yaml else 'JSON'}格式：{str(e)}") from e
+    if not isinstance(doc, dict):
+        raise RuntimeError("接口文档解析失败！文档顶层不是对象")
+    return doc
+
+
+class SpecCache:
+    """
+    磁盘缓存，每个来源两个文件：<key>.meta.json 记录 ETag/Last-Modified/内容指纹，<key>.pickle 为解析后的文档
+    :param cache_dir: 缓存目录，为 None 时不缓存
+    """
+
+    def __init__(self, cache_dir=SPEC_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _paths(self, source):
+        key = _sha256(source.encode("utf-8"))[:16]
+        return os.path.join(self.cache_dir, f"{key}.meta.json"), os.path.join(self.cache_dir, f"{key}.pickle")
+
+    def load(self, source):
+        """:return: (meta, doc)，没有缓存或缓存损坏时为 ({}, None)"""
+        if not self.cache_dir:
+            return {}, None
+        meta_path, doc_path = self._paths(source)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(doc_path, "rb") as f:
+                return meta, pickle.load(f)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            return {}, None
+
+    def save(self, source, meta, doc=None):
+        """doc 为 None 时只更新 meta"""
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path, doc_path = self._paths(source)
+        if doc is not None:
+            with open(f"{doc_path}.tmp", "wb") as f:
+                pickle.dump(doc, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{doc_path}.tmp", doc_path)
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(dict(meta, source=source), f, ensure_ascii=False)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+
+def _load_url(url, cache, timeout, offline):
+    meta, cached = cache.load(url)
+    if offline:
+        if cached is None:
+            raise RuntimeError(f"离线模式下没有接口文档缓存：{url}")
+        print("📦 离线模式，使用本地缓存的接口文档")
+        return cached
+
+    headers = {}
+    if cached is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and cached is not None:
+            print("✅ 接口文档未变化(304)，使用本地缓存")
+            return cached
+        response.raise_for_status()
+    except RequestException as e:
+        if cached is not None:
+            print(f"⚠️ 接口文档拉取失败，使用本地缓存：{str(e)}")
+            return cached
+        raise RuntimeError(f"接口文档拉取失败！请检查服务是否启动、URL是否正确：{str(e)}") from e
+
+    raw = response.content
+    new_meta = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"),
+                "sha256": _sha256(raw)}
+    # 服务端不支持条件请求时，内容没变也跳过解析
+    if cached is not None and meta.get("sha256") == new_meta["sha256"]:
+        cache.save(url, new_meta)
+        return cached
+    doc = parse_spec(raw, _is_yaml(urlparse(url).path, response.headers.get("Content-Type", "")))
+    cache.save(url, new_meta, doc)
+    return doc
+
+
+def _load_file(path, cache):
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    fingerprint = f"{stat.st_mtime_ns}:{stat.st_size}"
+    meta, cached = cache.load(path)
+    if cached is not None and meta.get("fingerprint") == fingerprint:
+        return cached
+    with open(path, "rb") as f:
+        doc = parse_spec(f.read(), _is_yaml(path))
+    cache.save(path, {"fingerprint": fingerprint}, doc)
+    return doc
+
+
+def _merge(base, extra):
+    """递归合并：字典逐键合并，其余取先出现的值；不修改入参"""
+    merged = dict(base)
+    for key, value in extra.items():
+        if key not in merged:
+            merged[key] = value
+        elif isinstance(merged[key], dict) and isinstance(value, dict):
+            merged[key] = _merge(merged[key], value)
+    return merged
+
+
+def _load_dir(path, cache):
+    files = sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(path)
+        for name in names if name.lower().endswith(SPEC_EXTENSIONS)
+    )
+    if not files:
+        raise RuntimeError(f"目录中没有接口文档（{'/'.join(SPEC_EXTENSIONS)}）：{path}")
+    doc = {}
+    for file in files:
+        doc = _merge(doc, _load_file(file, cache))
+    return doc
+
+
+def load_spec(source: str, timeout: int = 30, cache_dir: str = SPEC_CACHE_DIR, offline: bool = False) -> dict:
+    """
+    加载接口文档
+    :param source: 文档 URL、本地 JSON/YAML 文件或目录
+    :param timeout: 请求超时时间（秒）
+    :param cache_dir: 缓存目录，为 None 时不缓存
+    :param offline: 只使用缓存，不发请求（仅对 URL 有效）
+    :return: Swagger文档JSON数据
+    :raises RuntimeError: 加载或解析失败时抛出
+    """
+    print(f"正在加载接口文档：{source}")
+    cache = SpecCache(cache_dir)
+    if urlparse(source).scheme in ("http", "https"):
+        doc = _load_url(source, cache, timeout, offline)
+    elif os.path.isdir(source):
+        doc = _load_dir(source, cache)
+    elif os.path.isfile(source):
+        doc = _load_file(source, cache)
+    else:
+        raise RuntimeError(f"接口文档不存在：{source}")
+    print(f"✅ 接口文档加载成功，文档版本：{doc.get('openapi', doc.get('swagger', '未知'))}")
+    print(f"📌 总接口数量：{len(doc.get('paths', {}))} 个")
+    return doc
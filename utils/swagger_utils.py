@@ -1,11 +1,14 @@
 """Swagger/OpenAPI 文档解析工具类"""
 
-import requests
-from requests.exceptions import RequestException, JSONDecodeError
+import os
 from urllib.parse import unquote
 
-# Swagger 配置
-SWAGGER_URL = "http://localhost:8080/v3/api-docs"
+import yaml
+
+from utils.spec_loader import load_spec
+
+# Swagger 配置：文档地址也可以是本地 JSON/YAML 文件或目录
+SWAGGER_URL = os.getenv("SWAGGER_URL", "http://localhost:8080/v3/api-docs")
 REQUEST_TIMEOUT = 30
 # 过滤配置：只生成指定请求方法的接口，空列表=不限制
 ALLOW_METHODS = ["get", "post", "put", "delete", "patch"]
@@ -13,27 +16,112 @@ ALLOW_METHODS = ["get", "post", "put", "delete", "patch"]
 EXCLUDE_PATH_PREFIX = ["/actuator", "/error", "/favicon.ico"]
 
 
-def fetch_swagger_doc(swagger_url: str = SWAGGER_URL, timeout: int = REQUEST_TIMEOUT) -> dict:
+def fetch_swagger_doc(swagger_url: str = SWAGGER_URL, timeout: int = REQUEST_TIMEOUT, offline: bool = False) -> dict:
     """
-    拉取Swagger/OpenAPI接口文档原始JSON数据
+    拉取Swagger/OpenAPI接口文档原始JSON数据，带条件请求与本地缓存，见 utils.spec_loader
 
-    :param swagger_url: Swagger文档地址
+    :param swagger_url: Swagger文档地址，或本地 JSON/YAML 文件、目录
     :param timeout: 请求超时时间（秒）
+    :param offline: 只使用本地缓存
     :return: Swagger文档JSON数据
     :raises RuntimeError: 拉取或解析失败时抛出
     """
-    print(f"正在拉取接口文档：{swagger_url}")
-    try:
-        response = requests.get(swagger_url, timeout=timeout)
-        response.raise_for_status()
-        swagger_json = response.json()
-        print(f"✅ 接口文档拉取成功，文档版本：{swagger_json.get('openapi', swagger_json.get('swagger', '未知'))}")
-        print(f"📌 总接口数量：{len(swagger_json.get('paths', {}))} 个")
-        return swagger_json
-    except RequestException as e:
-        raise RuntimeError(f"接口文档拉取失败！请检查服务是否启动、URL是否正确：{str(e)}") from e
-    except JSONDecodeError as e:
-        raise RuntimeError(f"接口文档解析失败！URL返回的不是合法JSON格式：{str(e)}") from e
+    return load_spec(swagger_url, timeout=timeout, offline=offline)
+
+
+def _iter_refs(obj):
+    """遍历对象中所有文档内部的 $ref（#/ 开头的 JSON Pointer）"""
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/"):
+                yield ref
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+def _pointer_parts(ref):
+    return [p.replace("~1", "/").replace("~0", "~") for p in ref[2:].split("/")]
+
+
+def _resolve_pointer(doc, ref):
+    node = doc
+    for part in _pointer_parts(ref):
+        if isinstance(node, list) and part.isdigit():
+            node = node[int(part)]
+        elif isinstance(node, dict) and part in node:
+            node = node[part]
+        else:
+            return None
+    return node
+
+
+class RefResolver:
+    """
+    $ref 传递闭包：每个引用只展开一次，结果在各接口之间复用
+    :param swagger_doc: Swagger文档JSON数据
+    """
+
+    def __init__(self, swagger_doc: dict):
+        self.doc = swagger_doc
+        self._closures = {}
+
+    def closure(self, ref: str) -> frozenset:
+        """ref 自身及其直接、间接引用的全部 ref"""
+        cached = self._closures.get(ref)
+        if cached is not None:
+            return cached
+        # 迭代展开，循环引用的模型（如树形结构）不会无限递归
+        seen = {ref}
+        pending = [ref]
+        while pending:
+            current = pending.pop()
+            done = self._closures.get(current)
+            if done is not None and current != ref:
+                seen |= done
+                continue
+            target = _resolve_pointer(self.doc, current)
+            for child in _iter_refs(target):
+                if child not in seen:
+                    seen.add(child)
+                    pending.append(child)
+        result = self._closures[ref] = frozenset(seen)
+        return result
+
+    def models_for(self, *objs) -> dict:
+        """
+        对象中用到的全部数据模型，保持文档原有层级：
+        OpenAPI 3 为 {"schemas": {...}, ...}（去掉 components 一层），Swagger 2 为 {"definitions": {...}}
+        """
+        refs = set()
+        for obj in objs:
+            for ref in _iter_refs(obj):
+                refs |= self.closure(ref)
+        models = {}
+        for ref in sorted(refs):
+            parts = _pointer_parts(ref)
+            value = _resolve_pointer(self.doc, ref)
+            if value is None:
+                continue
+            if parts[0] == "components":
+                parts = parts[1:]
+            node = models
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node[parts[-1]] = value
+        return models
+
+
+def _count_models(models: dict) -> int:
+    return sum(len(group) for group in models.values() if isinstance(group, dict))
+
+
+def prompt_text(api_doc: dict) -> str:
+    """接口文档转为YAML字符串，与生成用例时发送给AI的内容一致"""
+    return yaml.dump(api_doc, allow_unicode=True, sort_keys=False)
 
 
 def parse_swagger_paths(
@@ -50,8 +138,12 @@ def parse_swagger_paths(
     :return: 解析后的接口列表，每个元素包含单个接口的完整信息
     """
     paths = swagger_doc.get("paths", {})
-    # 全局组件（请求/响应模型，用于AI理解字段含义）
+    # 数据模型（请求/响应模型，用于AI理解字段含义）：每个接口只附带自身用到的 $ref 闭包
+    resolver = RefResolver(swagger_doc)
     components = swagger_doc.get("components", {})
+    total_models = _count_models(components) or _count_models({"definitions": swagger_doc.get("definitions", {})})
+    # 全量模型的YAML长度，用于估算裁剪前每个提示词的大小
+    full_models_chars = len(prompt_text({"全局数据模型": components})) if components else 0
     api_list = []
 
     for path, path_info in paths.items():
@@ -72,23 +164,42 @@ def parse_swagger_paths(
             file_name = f"test_{method.lower()}{unquote(path).replace('/', '_').replace('{', '').replace('}', '')}.yml"
 
             # 组装单个接口的完整文档，给AI用
+            parameters = api_info.get("parameters", [])
+            request_body = api_info.get("requestBody", {})
+            responses = api_info.get("responses", {})
+            models = resolver.models_for(parameters, request_body, responses)
             single_api_doc = {
                 "接口名称": api_name,
                 "接口地址": path,
                 "请求方法": method.upper(),
                 "接口描述": api_info.get("description", "无"),
-                "请求参数": api_info.get("parameters", []),
-                "请求体": api_info.get("requestBody", {}),
-                "响应参数": api_info.get("responses", {}),
-                "全局数据模型": components
+                "请求参数": parameters,
+                "请求体": request_body,
+                "响应参数": responses,
+                "全局数据模型": models
             }
 
+            prompt_chars = len(prompt_text(single_api_doc))
+            models_chars = len(prompt_text({"全局数据模型": models}))
+            prompt_stats = {
+                "prompt_chars": prompt_chars,
+                "models": _count_models(models),
+                "total_models": total_models,
+                # 附带全量 components 时的提示词长度（估算）
+                "full_prompt_chars": prompt_chars - models_chars + full_models_chars if components else prompt_chars,
+            }
             api_list.append({
                 "api_name": api_name,
                 "file_name": file_name,
-                "api_doc": single_api_doc
+                "api_doc": single_api_doc,
+                "prompt_stats": prompt_stats
             })
-            print(f"📦 解析接口：{method.upper()} {path} -> {api_name}")
+            print(f"📦 解析接口：{method.upper()} {path} -> {api_name}"
+                  f"（数据模型 {prompt_stats['models']}/{total_models}，提示词 {prompt_chars} 字符）")
 
+    if api_list:
+        pruned = sum(api["prompt_stats"]["prompt_chars"] for api in api_list)
+        full = sum(api["prompt_stats"]["full_prompt_chars"] for api in api_list)
+        print(f"📏 提示词总长度：{pruned} 字符（附带全量数据模型约 {full} 字符，减少 {1 - pruned / full:.1%}）")
     print(f"✅ 接口解析完成，共 {len(api_list)} 个有效接口待生成")
     return api_list
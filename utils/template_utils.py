@@ -0,0 +1,179 @@
+"""动态参数模板：用例数据加载时预编译一次，运行时只渲染含占位符的字符串"""
+
+import os
+import random
+import re
+import string
+import threading
+import time
+import uuid
+
+from utils.extract_store import get_store
+
+_PLACEHOLDER = re.compile(r'\$\{([^}:]+)(?::([^}]+))?\}')
+
+# 占位符注册表：{名称: (生成函数, 是否带参数, 单独出现时是否保留原始类型)}
+PLACEHOLDERS = {}
+
+
+def register_placeholder(name, func=None, with_arg=False, typed=False):
+    """
+    注册自定义占位符，可作为装饰器使用
+    :param name: 占位符名称，如 "order_no" 对应 ${order_no}
+    :param func: 生成函数；with_arg=True 时接收冒号后的参数，如 ${env:VAR} 中的 "VAR"
+    :param with_arg: 是否带参数
+    :param typed: 字符串中只有该占位符时是否直接返回生成值（不转字符串）
+    """
+    def decorator(f):
+        PLACEHOLDERS[name] = (f, with_arg, typed)
+        return f
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+register_placeholder("timestamp", lambda: int(time.time()))
+register_placeholder("timestamp_ms", lambda: int(time.time() * 1000))
+register_placeholder("date", lambda: time.strftime("%Y-%m-%d"))
+register_placeholder("datetime", lambda: time.strftime("%Y-%m-%d %H:%M:%S"))
+register_placeholder("random", lambda: ''.join(random.choices(string.ascii_letters + string.digits, k=6)))
+register_placeholder("random_int", lambda: random.randint(100000, 999999))
+register_placeholder("uuid", uuid.uuid4)
+register_placeholder("env", lambda var: os.environ.get(var, ''), with_arg=True)
+register_placeholder("extract", lambda var: get_store().get(var, ''), with_arg=True, typed=True)
+
+
+class _Const:
+    """不含占位符的子树，渲染时原样返回（共享、不拷贝）"""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def render(self):
+        return self.value
+
+
+class _Str:
+    """含占位符的字符串，parts 为字面量与 (原文, 名称, 参数) 交替的列表"""
+    __slots__ = ("parts",)
+
+    def __init__(self, parts):
+        self.parts = parts
+
+    def render(self):
+        parts = self.parts
+        # 单独一个占位符：typed 占位符保留原始类型
+        if len(parts) == 1:
+            raw, name, arg = parts[0]
+            entry = PLACEHOLDERS.get(name)
+            if entry is None or entry[1] != (arg is not None):
+                return raw
+            value = entry[0](arg) if entry[1] else entry[0]()
+            return value if entry[2] else str(value)
+
+        # 同一字符串内同名占位符取同一个值，与逐个 re.sub 替换的行为一致
+        values = {}
+        out = []
+        for part in parts:
+            if part.__class__ is str:
+                out.append(part)
+                continue
+            raw, name, arg = part
+            key = (name, arg)
+            if key not in values:
+                entry = PLACEHOLDERS.get(name)
+                if entry is None or entry[1] != (arg is not None):
+                    values[key] = raw
+                else:
+                    values[key] = str(entry[0](arg) if entry[1] else entry[0]())
+            out.append(values[key])
+        return ''.join(out)
+
+
+class _Dict:
+    """只记录含占位符的键，渲染时浅拷贝原字典并替换这些键"""
+    __slots__ = ("value", "dynamic")
+
+    def __init__(self, value, dynamic):
+        self.value = value
+        self.dynamic = dynamic
+
+    def render(self):
+        out = dict(self.value)
+        for k, t in self.dynamic:
+            out[k] = t.render()
+        return out
+
+
+class _List:
+    __slots__ = ("value", "dynamic")
+
+    def __init__(self, value, dynamic):
+        self.value = value
+        self.dynamic = dynamic
+
+    def render(self):
+        out = list(self.value)
+        for i, t in self.dynamic:
+            out[i] = t.render()
+        return out
+
+
+def _compile_str(text):
+    if '${' not in text:
+        return None
+    parts = []
+    pos = 0
+    for m in _PLACEHOLDER.finditer(text):
+        if m.start() > pos:
+            parts.append(text[pos:m.start()])
+        parts.append((m.group(0), m.group(1), m.group(2)))
+        pos = m.end()
+    if not parts:
+        return None
+    if pos < len(text):
+        parts.append(text[pos:])
+    return _Str(parts)
+
+
+def _compile(data):
+    """返回编译后的节点，不含占位符时返回 None"""
+    if isinstance(data, str):
+        return _compile_str(data)
+    if isinstance(data, dict):
+        dynamic = [(k, t) for k, t in ((k, _compile(v)) for k, v in data.items()) if t is not None]
+        return _Dict(data, dynamic) if dynamic else None
+    if isinstance(data, list):
+        dynamic = [(i, t) for i, t in ((i, _compile(v)) for i, v in enumerate(data)) if t is not None]
+        return _List(data, dynamic) if dynamic else None
+    return None
+
+
+# 编译缓存：{id(原始数据): (原始数据, 模板)}，持有原始数据引用保证 id 不会被复用
+_TEMPLATE_CACHE = {}
+_TEMPLATE_CACHE_SIZE = 4096
+# 异步执行引擎与压测的多个线程会同时写入缓存，淘汰与写入需加锁
+_TEMPLATE_LOCK = threading.Lock()
+
+
+def compile_template(data):
+    """
+    编译用例数据为模板，同一对象只编译一次
+    注意：编译后不要再原地修改该用例数据，需要修改时请先 copy.deepcopy
+    """
+    cached = _TEMPLATE_CACHE.get(id(data))
+    if cached is not None and cached[0] is data:
+        return cached[1]
+    template = _compile(data) or _Const(data)
+    with _TEMPLATE_LOCK:
+        if len(_TEMPLATE_CACHE) >= _TEMPLATE_CACHE_SIZE:
+            _TEMPLATE_CACHE.pop(next(iter(_TEMPLATE_CACHE)), None)
+        _TEMPLATE_CACHE[id(data)] = (data, template)
+    return template
+
+
+def render_template(data):
+    """渲染用例数据中的动态参数，未含占位符的子树与原数据共享"""
+    return compile_template(data).render()